@@ -1,6 +1,7 @@
 """Multi-agent system — state definitions and shared types"""
-from typing import List, Optional
-from typing_extensions import TypedDict
+import operator
+from typing import Annotated, List, Optional
+from typing_extensions import NotRequired, TypedDict
 
 
 class AgentResult(TypedDict):
@@ -9,6 +10,7 @@ class AgentResult(TypedDict):
     content: str
     sources: List[str]
     confidence: str  # "high", "medium", "low", "none"
+    content_ref: NotRequired[str]  # set when content lives in the content store
 
 
 class MultiAgentState(TypedDict):
@@ -19,18 +21,25 @@ class MultiAgentState(TypedDict):
     # ---- coordinator plan ----
     language: str                     # detected language of query ("en", "other")
     translated_query: str             # English version of query (if non-English)
+    query_language: str               # query's language by name, e.g. "Mongolian" (if known)
     plan: List[str]                   # ordered list of agents to run
+    plan_deps: List[List[int]]        # plan_deps[i] = plan indices step i waits for
     plan_reasoning: str               # why coordinator chose this plan
-    current_step: int                 # index into plan[]
+    current_step: int                 # index into plan[] (of the running step, inside an agent)
+    done_steps: List[int]             # plan indices already run
 
     # ---- accumulated context (Option A: agents see prior results) ----
-    agent_results: List[AgentResult]  # each agent appends its output here
+    # Append-only: nodes return just their new entries.  Large content is
+    # a reference (see content_store.resolve).
+    agent_results: Annotated[List[AgentResult], operator.add]
 
     # ---- final output ----
     response: str                     # final answer shown to user
-    agents_used: List[str]            # display: which agents ran
+    agents_used: Annotated[List[str], operator.add]  # display: which agents ran (append-only)
 
     # ---- control flags ----
     needs_human_confirm: bool         # True → ask user before continuing
     human_confirm_message: str        # what to show user
+    human_confirm_for: List[str]      # agents the pending question asks to run
+    declined_agents: List[str]        # agents the user said no to (results ignored)
     should_stop: bool                 # True → short-circuit, skip remaining agents
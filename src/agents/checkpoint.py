@@ -0,0 +1,406 @@
+"""Checkpointer for the multi-agent graph — persistent, batched and bounded.
+
+``MemorySaver`` kept every checkpoint of every ``thread_id`` for the life
+of the process.  :class:`SQLiteCheckpointer` stores them in one SQLite file
+(``~/.cache/ai-assistant/checkpoints.sqlite3``) instead:
+
+* **Batched writes** — checkpoints and task writes are buffered and written
+  in one transaction every CHECKPOINT_BATCH_SIZE puts.  The buffer is also
+  flushed before any read and as soon as a run is interrupted (a paused
+  ``human_check``) or fails, so that state is always on disk.  Runs that
+  finish and are deleted before a flush never touch the disk.
+* **Compaction** — only the newest CHECKPOINT_KEEP checkpoints of a thread
+  (and the pending writes that belong to them) are kept; resuming needs
+  nothing older.
+* **Eviction** — threads untouched for CHECKPOINT_MAX_AGE seconds, and the
+  oldest beyond CHECKPOINT_MAX_THREADS, are dropped on every flush.
+
+A paused thread survives a restart: ``ai resume`` lists such threads and
+continues one (see ``events.ask_events(thread_id=...)``).
+"""
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+from langgraph.checkpoint.serde.types import ERROR, INTERRUPT
+
+from src.config import (
+    CHECKPOINT_BATCH_SIZE,
+    CHECKPOINT_KEEP,
+    CHECKPOINT_MAX_AGE,
+    CHECKPOINT_MAX_THREADS,
+)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS checkpoints ("
+    " thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL,"
+    " parent_id TEXT, type TEXT, checkpoint BLOB NOT NULL,"
+    " metadata_type TEXT, metadata BLOB NOT NULL,"
+    " PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id))",
+    "CREATE TABLE IF NOT EXISTS writes ("
+    " thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL,"
+    " task_id TEXT NOT NULL, idx INTEGER NOT NULL, channel TEXT NOT NULL,"
+    " type TEXT, value BLOB, task_path TEXT NOT NULL DEFAULT '',"
+    " PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx))",
+    "CREATE TABLE IF NOT EXISTS threads ("
+    " thread_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS threads_updated_at ON threads (updated_at)",
+)
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver):
+    """LangGraph checkpoint saver over SQLite with write batching, compaction
+    and thread eviction."""
+
+    def __init__(
+        self,
+        path: Path,
+        batch_size: int = CHECKPOINT_BATCH_SIZE,
+        keep: int = CHECKPOINT_KEEP,
+        max_threads: int = CHECKPOINT_MAX_THREADS,
+        max_age: float | None = CHECKPOINT_MAX_AGE,
+        *,
+        serde=None,
+    ):
+        super().__init__(serde=serde)
+        self.path = Path(path)
+        self.batch_size = max(1, batch_size)
+        self.keep = max(1, keep)
+        self.max_threads = max(1, max_threads)
+        self.max_age = max_age
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+        # Write-behind buffers, keyed like the tables' primary keys
+        self._checkpoints: dict[tuple, tuple] = {}
+        self._writes: dict[tuple, tuple] = {}
+        self._puts = 0
+
+    # ── Writes (buffered) ───────────────────────────────────────
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, blob = self.serde.dumps_typed(checkpoint)
+        meta_type, meta = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        with self._lock:
+            self._checkpoints[(thread_id, checkpoint_ns, checkpoint["id"])] = (
+                config["configurable"].get("checkpoint_id"), type_, blob, meta_type, meta,
+            )
+            self._puts += 1
+            if self._puts >= self.batch_size:
+                self.flush()
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        with self._lock:
+            for idx, (channel, value) in enumerate(writes):
+                idx = WRITES_IDX_MAP.get(channel, idx)
+                key = (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+                if idx >= 0 and key in self._writes:
+                    continue
+                self._writes[key] = (channel, *self.serde.dumps_typed(value), task_path)
+            if any(channel in (INTERRUPT, ERROR) for channel, _ in writes):
+                # The run stops here: make it resumable after a restart
+                self.flush()
+
+    def flush(self) -> None:
+        """Write buffered checkpoints and writes, compact and evict."""
+        with self._lock:
+            if not self._checkpoints and not self._writes:
+                return
+            kept = self._newest_buffered()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(*key, *self._checkpoints[key]) for key in kept],
+            )
+            superseded = set(self._checkpoints) - set(kept)
+            rows = [
+                (*key, *row) for key, row in self._writes.items() if key[:3] not in superseded
+            ]
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [row for row in rows if row[4] >= 0],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [row for row in rows if row[4] < 0],
+            )
+            now = time.time()
+            touched = {key[:2] for key in self._checkpoints} | {key[:2] for key in self._writes}
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO threads VALUES (?, ?)",
+                [(thread_id, now) for thread_id in {t for t, _ in touched}],
+            )
+            for thread_id, checkpoint_ns in touched:
+                self._compact_locked(thread_id, checkpoint_ns)
+            self._evict_locked(now)
+            self._conn.commit()
+            self._checkpoints.clear()
+            self._writes.clear()
+            self._puts = 0
+
+    def _newest_buffered(self) -> list[tuple]:
+        by_thread: dict[tuple, list[tuple]] = {}
+        for key in self._checkpoints:
+            by_thread.setdefault(key[:2], []).append(key)
+        return [
+            key for keys in by_thread.values()
+            for key in sorted(keys, key=lambda k: k[2], reverse=True)[:self.keep]
+        ]
+
+    def _compact_locked(self, thread_id: str, checkpoint_ns: str) -> None:
+        self._conn.execute(
+            "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+            " AND checkpoint_id NOT IN ("
+            "  SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+            "  ORDER BY checkpoint_id DESC LIMIT ?)",
+            (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.keep),
+        )
+        self._conn.execute(
+            "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ?"
+            " AND checkpoint_id < ("
+            "  SELECT MIN(checkpoint_id) FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?)",
+            (thread_id, checkpoint_ns, thread_id, checkpoint_ns),
+        )
+
+    def _evict_locked(self, now: float) -> None:
+        expired = [] if self.max_age is None else [
+            thread_id for (thread_id,) in self._conn.execute(
+                "SELECT thread_id FROM threads WHERE updated_at <= ?", (now - self.max_age,)
+            )
+        ]
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM threads").fetchone()
+        overflow = count - len(expired) - self.max_threads
+        if overflow > 0:
+            expired += [
+                thread_id for (thread_id,) in self._conn.execute(
+                    "SELECT thread_id FROM threads WHERE updated_at > ?"
+                    " ORDER BY updated_at ASC LIMIT ?",
+                    (-1.0 if self.max_age is None else now - self.max_age, overflow),
+                )
+            ]
+        for thread_id in expired:
+            self._delete_locked(thread_id)
+
+    def _delete_locked(self, thread_id: str) -> None:
+        for table in ("checkpoints", "writes", "threads"):
+            self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            for buffer in (self._checkpoints, self._writes):
+                for key in [k for k in buffer if k[0] == thread_id]:
+                    del buffer[key]
+            self._delete_locked(thread_id)
+            self._conn.commit()
+
+    # ── Reads (flush first) ─────────────────────────────────────
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = (
+            "SELECT checkpoint_id, parent_id, type, checkpoint, metadata_type, metadata"
+            " FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        params: tuple = (thread_id, checkpoint_ns)
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params += (checkpoint_id,)
+        with self._lock:
+            self.flush()
+            row = self._conn.execute(
+                query + " ORDER BY checkpoint_id DESC LIMIT 1", params
+            ).fetchone()
+            if row is None:
+                return None
+            return self._tuple_locked(thread_id, checkpoint_ns, *row)
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_id, type, checkpoint,"
+            " metadata_type, metadata FROM checkpoints WHERE 1 = 1"
+        )
+        params: list = []
+        if config:
+            query += " AND thread_id = ?"
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                query += " AND checkpoint_ns = ?"
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                query += " AND checkpoint_id = ?"
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            query += " AND checkpoint_id < ?"
+            params.append(before_id)
+        with self._lock:
+            self.flush()
+            rows = self._conn.execute(query + " ORDER BY checkpoint_id DESC", params).fetchall()
+            found = []
+            for thread_id, checkpoint_ns, *row in rows:
+                item = self._tuple_locked(thread_id, checkpoint_ns, *row)
+                if filter and not all(item.metadata.get(k) == v for k, v in filter.items()):
+                    continue
+                found.append(item)
+                if limit is not None and len(found) >= limit:
+                    break
+        yield from found
+
+    def _tuple_locked(
+        self, thread_id, checkpoint_ns, checkpoint_id, parent_id, type_, blob, meta_type, meta,
+    ) -> CheckpointTuple:
+        writes = self._conn.execute(
+            "SELECT task_id, idx, channel, type, value, task_path FROM writes"
+            " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        writes.sort(key=lambda w: writes_sort_key(w[5], w[0], w[1]))
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+            }},
+            checkpoint=self.serde.loads_typed((type_, blob)),
+            metadata=self.serde.loads_typed((meta_type, meta)),
+            parent_config={"configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": parent_id,
+            }} if parent_id else None,
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((w_type, value)))
+                for task_id, _, channel, w_type, value, _ in writes
+            ],
+        )
+
+    def paused_threads(self) -> list[tuple[str, float]]:
+        """``(thread_id, updated_at)`` of threads stopped at an interrupt, newest first."""
+        with self._lock:
+            self.flush()
+            return self._conn.execute(
+                "SELECT DISTINCT w.thread_id, t.updated_at FROM writes w"
+                " JOIN threads t ON t.thread_id = w.thread_id"
+                " WHERE w.channel = ? ORDER BY t.updated_at DESC",
+                (INTERRUPT,),
+            ).fetchall()
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {
+                table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("threads", "checkpoints", "writes")
+            }
+            counts["buffered"] = len(self._checkpoints) + len(self._writes)
+        return counts
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+    # ── Async API (the graph runs these off the event loop) ─────
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+_checkpointer: SQLiteCheckpointer | None = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer() -> SQLiteCheckpointer:
+    """The process-wide checkpointer (``checkpoints.sqlite3`` in the cache dir)."""
+    global _checkpointer
+    with _checkpointer_lock:
+        if _checkpointer is None:
+            from src.cache import cache_dir
+
+            _checkpointer = SQLiteCheckpointer(cache_dir() / "checkpoints.sqlite3")
+        return _checkpointer
@@ -0,0 +1,97 @@
+"""Content store — agent output kept out of the multi-agent graph state.
+
+The checkpointer snapshots the graph state after every node, so long web
+and book content in ``agent_results`` would be copied into every
+checkpoint of a run.  The dispatcher instead moves any result content
+longer than CONTENT_OFFLOAD_CHARS into this store, keyed by its SHA-256
+(identical content is stored once), and leaves a reference in the state:
+
+    {"agent": "researcher", "content": "", "content_ref": "sha256:…", …}
+
+Agents read prior results through :func:`resolve`, which fills the content
+back in (one batched lookup).  The store is a :class:`~src.cache.DiskCache`
+so a run paused at ``human_check`` can still resolve its results after a
+restart; entries expire after CONTENT_STORE_TTL and are LRU-evicted beyond
+CONTENT_STORE_SIZE — a reference whose content is gone resolves to "".
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+
+from src.agents import AgentResult
+from src.config import CONTENT_OFFLOAD_CHARS, CONTENT_STORE_SIZE, CONTENT_STORE_TTL
+
+_PREFIX = "sha256:"
+
+
+def content_ref(content: str) -> str:
+    return _PREFIX + hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class ContentStore:
+    """Content-addressed text store over a key/value ``store``."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def put_many(self, contents: list[str]) -> list[str]:
+        refs = [content_ref(c) for c in contents]
+        self.store.set_many(dict(zip(refs, contents)))
+        return refs
+
+    def get_many(self, refs: list[str]) -> dict[str, str]:
+        return self.store.get_many(refs)
+
+
+def offload(
+    results: list[AgentResult],
+    store: ContentStore | None = None,
+    limit: int = CONTENT_OFFLOAD_CHARS,
+) -> list[AgentResult]:
+    """``results`` with content longer than ``limit`` replaced by a reference."""
+    if limit <= 0:
+        return results
+    large = [i for i, r in enumerate(results) if len(r.get("content") or "") > limit]
+    if not large:
+        return results
+    store = store if store is not None else get_content_store()
+    if store is None:
+        return results
+    refs = store.put_many([results[i]["content"] for i in large])
+    out = list(results)
+    for i, ref in zip(large, refs):
+        out[i] = {**results[i], "content": "", "content_ref": ref}
+    return out
+
+
+def resolve(results: list[AgentResult], store: ContentStore | None = None) -> list[AgentResult]:
+    """``results`` with referenced content filled back in."""
+    refs = [r["content_ref"] for r in results if r.get("content_ref")]
+    if not refs:
+        return list(results)
+    store = store if store is not None else get_content_store()
+    found = store.get_many(refs) if store is not None else {}
+    return [
+        {**r, "content": found.get(r["content_ref"], "")} if r.get("content_ref") else r
+        for r in results
+    ]
+
+
+_content_store: ContentStore | None = None
+_content_store_lock = threading.Lock()
+
+
+def get_content_store() -> ContentStore | None:
+    """The process-wide content store (None when CONTENT_OFFLOAD_CHARS is 0)."""
+    global _content_store
+    if CONTENT_OFFLOAD_CHARS <= 0:
+        return None
+    with _content_store_lock:
+        if _content_store is None:
+            from src.cache import DiskCache
+
+            _content_store = ContentStore(
+                DiskCache("content", CONTENT_STORE_SIZE, ttl=CONTENT_STORE_TTL)
+            )
+        return _content_store
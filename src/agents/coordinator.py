@@ -2,60 +2,46 @@
 
 Strategy (Option C — Hybrid):
   1. Rule-based pattern matching for common intents.
-  2. Falls back to an LLM call if no rule matches clearly.
+  2. Falls back to an LLM call if no rule matches clearly.  For a non-English
+     query that call is fused (COORDINATOR_FUSED_TRANSLATION): it also returns
+     the query's language and English translation, so the plan needs no
+     input translator step.
+
+The plan is an ordered list of agents plus, per step, the earlier steps it
+depends on (:func:`plan_dependencies`); the dispatcher runs steps whose
+dependencies are done concurrently.
 """
 from __future__ import annotations
 
-import re
+import hashlib
+import json
 from typing import List
 
 from src.agents import MultiAgentState
-from src.config import MODEL_NAME, get_openai_client
+from src.router import route
+from src.config import (
+    COORDINATOR_FUSED_TRANSLATION,
+    DISPATCH_PARALLEL,
+    MODEL_NAME,
+    RESEARCHER_USES_LIBRARIAN,
+    get_openai_client,
+)
 
 
-# ── Rule-based patterns ────────────────────────────────────────────
-_PATTERNS: list[tuple[re.Pattern, list[str], str]] = [
+# ── Rule-based plans ───────────────────────────────────────────────
+# Routing intents (see src/router.py) in priority order → plan.  Task
+# intents are handled first, in _rule_based_plan().
+_INTENT_PLANS: list[tuple[str, list[str], str]] = [
     # Book + verify (MUST come before book-only to match first)
-    (
-        re.compile(r"(verify|fact.?check|still true|still accurate|still relevant|is it correct)", re.I),
-        ["librarian", "researcher", "critic", "summarizer"],
-        "User wants to verify a book claim → full pipeline",
-    ),
+    ("verify", ["librarian", "researcher", "critic", "summarizer"],
+     "User wants to verify a book claim → full pipeline"),
     # Book-only queries
-    (
-        re.compile(r"(my book|my document|my pdf|my epub|in the book|from the book)", re.I),
-        ["librarian"],
-        "Query mentions personal books → Librarian only",
-    ),
-    # Translation
-    (
-        re.compile(r"(translate|翻訳|перевод|орчуул)", re.I),
-        ["translator"],
-        "Explicit translation request",
-    ),
-    # Summarize
-    (
-        re.compile(r"(summarize|summary|тоймло|give me the gist)", re.I),
-        ["summarizer"],
-        "Explicit summarization request",
-    ),
-    # Web search
-    (
-        re.compile(r"(search|latest|current|today|news|trending|2024|2025|2026)", re.I),
-        ["researcher"],
-        "User wants current/web information → Researcher",
-    ),
+    ("book", ["librarian"], "Query mentions personal books → Librarian only"),
+    ("translate", ["translator"], "Explicit translation request"),
+    ("summarize", ["summarizer"], "Explicit summarization request"),
+    ("web", ["researcher"], "User wants current/web information → Researcher"),
 ]
 
-# ── Task-detection helper (imported from tasks module) ──────────
-def _is_task_query(query: str) -> bool:
-    """Check if the query is a macOS task (alarm, calendar, note)."""
-    try:
-        from src.tasks.macos_agent import matches_any_task
-        return matches_any_task(query)
-    except ImportError:
-        return False
-
 # Non-English detection (simple heuristic: if >40% non-ASCII → non-English)
 _NON_ASCII_THRESHOLD = 0.30
 
@@ -69,26 +55,29 @@ def _detect_language(text: str) -> str:
 
 def _rule_based_plan(query: str) -> tuple[list[str], str] | None:
     """Try to match a rule. Returns (plan, reasoning) or None."""
-    # Check task intents first (alarm, calendar, note, timer, stopwatch, world clock)
-    if _is_task_query(query):
-        q_low = query.lower()
+    routed = route(query, with_params=False)
+    # Task intents first (alarm, calendar, note, timer, stopwatch, world clock)
+    if routed.is_task:
         # Hybrid: "summarize my calendar" → get events then summarize them
-        if any(kw in q_low for kw in ("summarize", "summary", "give me the gist")):
+        if "summarize" in routed.intents:
             return ["task_agent", "summarizer"], "Task action + summarization"
         # Hybrid: "remind me about <book topic>" → librarian context then reminder
-        if any(kw in q_low for kw in ("from the book", "my book", "my document")):
+        if "book" in routed.intents:
             return ["librarian", "task_agent"], "Book context + task action"
         return ["task_agent"], "Task/action detected"
 
-    for pattern, plan, reasoning in _PATTERNS:
-        if pattern.search(query):
-            return plan, reasoning
+    for intent, plan, reasoning in _INTENT_PLANS:
+        if intent in routed.intents:
+            return list(plan), reasoning
     return None
 
 
-def _llm_plan(query: str, language: str) -> tuple[list[str], str]:
-    """Fall back to LLM to decide the plan."""
-    system = (
+# Agents the planner may choose (and the dispatcher can run)
+AVAILABLE_AGENTS = ("librarian", "researcher", "translator", "summarizer", "critic", "task_agent")
+
+
+def _planner_system(language: str) -> str:
+    return (
         "You are a task planner for a multi-agent AI system. "
         "Available agents:\n"
         "  - librarian: searches the user's personal book/document collection\n"
@@ -113,6 +102,19 @@ def _llm_plan(query: str, language: str) -> tuple[list[str], str]:
         "  start with translator and end with translator.\n"
     )
 
+
+def planner_version() -> str:
+    """Identifies the planner (model, agent set, prompt) — part of every plan-cache key."""
+    digest = hashlib.sha1(
+        "\0".join([*sorted(AVAILABLE_AGENTS), _planner_system("{language}")]).encode("utf-8")
+    ).hexdigest()
+    return f"{MODEL_NAME}:{digest[:10]}"
+
+
+def _llm_plan(query: str, language: str) -> tuple[list[str], str]:
+    """Fall back to LLM to decide the plan."""
+    system = _planner_system(language)
+
     response = get_openai_client().chat.completions.create(
         model=MODEL_NAME,
         temperature=0,
@@ -123,19 +125,154 @@ def _llm_plan(query: str, language: str) -> tuple[list[str], str]:
         ],
     )
 
-    import json
     raw = response.choices[0].message.content or "{}"
     result = json.loads(raw)
     plan = result.get("plan", [])
     reasoning = result.get("reasoning", "LLM-planned")
 
     # Validate agent names
-    valid = {"librarian", "researcher", "translator", "summarizer", "critic", "task_agent"}
-    plan = [a for a in plan if a in valid]
+    plan = [a for a in plan if a in AVAILABLE_AGENTS]
+
+    return plan, reasoning
+
 
+def _cached_llm_plan(query: str, language: str) -> tuple[list[str], str]:
+    from src.agents.plan_cache import get_plan_cache
+
+    cache = get_plan_cache()
+    if cache is None:
+        return _llm_plan(query, language)
+    hit = cache.lookup(query, language)
+    if hit is not None:
+        plan, reasoning = hit
+        return plan, f"{reasoning} (cached plan)"
+    plan, reasoning = _llm_plan(query, language)
+    cache.save(query, language, plan, reasoning)
     return plan, reasoning
 
 
+_FUSED_SYSTEM_SUFFIX = (
+    "\nThe query is not in English. Return ONLY a JSON object with four keys:\n"
+    '  "plan": list of agent names in execution order (no translator steps — '
+    "the query is translated here and the answer is translated back automatically)\n"
+    '  "reasoning": one-sentence explanation\n'
+    '  "language": the English name of the query\'s language (e.g. "Mongolian")\n'
+    '  "translation": the query translated to English\n'
+)
+
+
+def _fused_system() -> str:
+    return _planner_system("other") + _FUSED_SYSTEM_SUFFIX
+
+
+def _fused_plan(query: str) -> tuple[list[str], str, str, str]:
+    """One completion: plan, reasoning, the query's language and its English translation."""
+    response = get_openai_client().chat.completions.create(
+        model=MODEL_NAME,
+        temperature=0,
+        response_format={"type": "json_object"},
+        messages=[
+            {"role": "system", "content": _fused_system()},
+            {"role": "user", "content": query},
+        ],
+    )
+    result = json.loads(response.choices[0].message.content or "{}")
+    plan = [a for a in result.get("plan", []) if a in AVAILABLE_AGENTS and a != "translator"]
+    reasoning = result.get("reasoning", "LLM-planned")
+    return plan, reasoning, str(result.get("language") or ""), str(result.get("translation") or "")
+
+
+def _plan_with_llm(query: str, language: str, fused: bool) -> tuple[list[str], str, str, str]:
+    """``(plan, reasoning, translated_query, query_language)`` for a query no rule matched.
+
+    A cached plan wins; otherwise a non-English query gets the fused call
+    (translation filled in), an English one the plain planner call.
+    """
+    if not (fused and language != "en"):
+        plan, reasoning = _cached_llm_plan(query, language)
+        return plan, reasoning, "", ""
+
+    from src.agents.plan_cache import get_plan_cache
+
+    cache = get_plan_cache()
+    hit = cache.lookup(query, language) if cache is not None else None
+    if hit is not None:
+        # Plan is known; the input translator step still translates the query
+        plan, reasoning = hit
+        return plan, f"{reasoning} (cached plan)", "", ""
+    plan, reasoning, query_language, translated = _fused_plan(query)
+    if cache is not None:
+        cache.save(query, language, plan, reasoning)
+    return plan, reasoning, translated, query_language
+
+
+# ── Plan dependencies ──────────────────────────────────────────────
+# Agents that only read the (translated) query and never look at other
+# agents' results.  Every other agent merges or acts on what came before
+# it in the plan, so it waits for all earlier steps.
+_INDEPENDENT_AGENTS = frozenset({"librarian", "researcher"})
+
+
+def plan_dependencies(
+    plan: list[str],
+    depends_on: dict[str, list[str]] | None = None,
+    parallel: bool = DISPATCH_PARALLEL,
+) -> list[list[int]]:
+    """For each step of ``plan``, the indices of earlier steps it waits for.
+
+    An input translator (step 0) is a dependency of everything after it.
+    ``depends_on`` adds explicit edges by agent name (e.g. ``{"researcher":
+    ["librarian"]}``), resolved to the nearest earlier occurrence.  With
+    ``parallel`` off every step waits for the one before it.
+    """
+    if not parallel:
+        return [[i - 1] if i else [] for i in range(len(plan))]
+
+    depends_on = depends_on or {}
+    input_translator = bool(plan) and plan[0] == "translator"
+    deps: list[list[int]] = []
+    for i, agent in enumerate(plan):
+        if i == 0:
+            deps.append([])
+        elif agent not in _INDEPENDENT_AGENTS:
+            deps.append(list(range(i)))
+        else:
+            wanted = {0} if input_translator else set()
+            for name in depends_on.get(agent, []):
+                earlier = [j for j in range(i) if plan[j] == name]
+                if earlier:
+                    wanted.add(earlier[-1])
+            deps.append(sorted(wanted))
+    return deps
+
+
+def ready_steps(plan: list[str], deps: list[list[int]], done: list[int]) -> list[int]:
+    """Plan indices not yet run whose dependencies have all run."""
+    finished = set(done)
+    return [
+        i for i in range(len(plan))
+        if i not in finished and all(d in finished for d in deps[i])
+    ]
+
+
+def plan_waves(plan: list[str], deps: list[list[int]] | None = None) -> list[list[str]]:
+    """Group plan steps into the waves the dispatcher will run them in."""
+    if deps is None or len(deps) != len(plan):
+        return [[agent] for agent in plan]
+    done: list[int] = []
+    waves: list[list[str]] = []
+    while wave := ready_steps(plan, deps, done):
+        waves.append([plan[i] for i in wave])
+        done += wave
+    return waves
+
+
+def _explicit_dependencies() -> dict[str, list[str]]:
+    # The researcher can target its search at the librarian's findings
+    # (see researcher._build_search_query) — only if it waits for them.
+    return {"researcher": ["librarian"]} if RESEARCHER_USES_LIBRARIAN else {}
+
+
 # ── Public node function ───────────────────────────────────────────
 
 def coordinator_node(state: MultiAgentState) -> dict:
@@ -143,22 +280,31 @@ def coordinator_node(state: MultiAgentState) -> dict:
     query = state["query"]
     language = _detect_language(query)
 
+    translated_query, query_language = "", ""
+
     # Try rules first (fast, free)
     result = _rule_based_plan(query)
 
     if result:
         plan, reasoning = result
     else:
-        # LLM fallback (slower, costs tokens)
-        plan, reasoning = _llm_plan(query, language)
+        # LLM fallback (slower, costs tokens) — unless this query shape was
+        # planned before
+        plan, reasoning, translated_query, query_language = _plan_with_llm(
+            query, language, fused=COORDINATOR_FUSED_TRANSLATION,
+        )
 
-    # If non-English and plan involves non-translator agents,
-    # bookend with translator
+    # If non-English and plan involves non-translator agents, bookend with
+    # translator — the input step is already done when the plan was fused
     if language != "en" and plan and plan[0] != "translator":
-        plan = ["translator"] + plan
+        if not translated_query:
+            plan = ["translator"] + plan
         if plan[-1] != "translator":
             plan.append("translator")
-        reasoning += " (auto-added translator for non-English query)"
+        if translated_query:
+            reasoning += " (query translated while planning)"
+        else:
+            reasoning += " (auto-added translator for non-English query)"
 
     # If 2+ agents produce content and summarizer not included, add it
     content_agents = [a for a in plan if a in ("librarian", "researcher")]
@@ -171,11 +317,13 @@ def coordinator_node(state: MultiAgentState) -> dict:
 
     return {
         "plan": plan,
+        "plan_deps": plan_dependencies(plan, _explicit_dependencies()),
         "plan_reasoning": reasoning,
         "language": language,
+        "translated_query": translated_query,
+        "query_language": query_language,
         "current_step": 0,
-        "agent_results": [],
-        "agents_used": [],
+        "done_steps": [],
         "needs_human_confirm": False,
         "should_stop": False,
     }
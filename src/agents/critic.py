@@ -7,14 +7,14 @@ Two jobs:
 from __future__ import annotations
 
 from src.agents import MultiAgentState, AgentResult
+from src.agents.content_store import resolve
 from src.config import MODEL_NAME, get_openai_client
 
 
 def critic_node(state: MultiAgentState) -> dict:
     """Review agent outputs for quality and cross-source consistency."""
     query = state.get("translated_query") or state["query"]
-    prior = state.get("agent_results", [])
-    agents_used = state.get("agents_used", [])
+    prior = resolve(state.get("agent_results", []))
 
     # Gather what each agent said
     agent_outputs = {}
@@ -24,7 +24,7 @@ def critic_node(state: MultiAgentState) -> dict:
 
     if not agent_outputs:
         return {
-            "agents_used": agents_used + ["⚖️ Critic (skipped — no content to review)"],
+            "agents_used": ["⚖️ Critic (skipped — no content to review)"],
         }
 
     # Build the review prompt
@@ -70,6 +70,6 @@ def critic_node(state: MultiAgentState) -> dict:
     }
 
     return {
-        "agent_results": prior + [result],
-        "agents_used": agents_used + ["⚖️ Critic"],
+        "agent_results": [result],
+        "agents_used": ["⚖️ Critic"],
     }
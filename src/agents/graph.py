@@ -1,22 +1,32 @@
 """Multi-agent LangGraph workflow.
 
-The Coordinator produces a plan (ordered list of agent names).
-The Dispatcher node runs each agent in sequence, advancing current_step.
-Between steps it checks for human confirmation needs and short-circuit flags.
+The Coordinator produces a plan (ordered list of agent names) and its
+dependency graph (``plan_deps``).  Each Dispatcher pass runs one *wave*:
+every step whose dependencies are done, concurrently, merging their results
+back in plan order.  Between waves it checks for human confirmation needs
+and short-circuit flags.
+
+``agent_results`` / ``agents_used`` are append-only channels: agents return
+just their own entries, and the dispatcher moves large content into the
+content store (src/agents/content_store.py) before it enters the state.
 """
 from __future__ import annotations
 
+import threading
+
+from langchain_core.runnables.config import ContextThreadPoolExecutor
 from langgraph.graph import END, START, StateGraph
 
 from src.agents import MultiAgentState
-from src.agents.coordinator import coordinator_node
+from src.agents.content_store import offload, resolve
+from src.agents.coordinator import coordinator_node, ready_steps
 from src.agents.librarian import librarian_node
 from src.agents.researcher import researcher_node
 from src.agents.translator import translator_node
 from src.agents.summarizer import summarizer_node
 from src.agents.critic import critic_node
 from src.tasks.macos_agent import task_agent_node
-from src.config import MODEL_NAME, get_openai_client
+from src.config import DISPATCH_MAX_WORKERS, MODEL_NAME, get_openai_client
 
 # ── Agent registry ──────────────────────────────────────────────
 AGENT_NODES = {
@@ -29,29 +39,102 @@ AGENT_NODES = {
 }
 
 
-# ── Dispatcher: runs the current agent in the plan ──────────────
+# ── Dispatcher: runs the next wave of ready agents ──────────────
 
-def dispatcher_node(state: MultiAgentState) -> dict:
-    """Execute the current agent in the plan."""
+# Confirmation questions that ask whether another agent should run: the
+# librarian, finding nothing, asks "Should I search the web instead?".  Once
+# that agent has already run (e.g. in the same wave) the question is settled
+# and isn't asked; if the user declines it, the agent's results are ignored.
+_CONFIRM_RUNS = {"librarian": "researcher"}
+
+def _plan_deps(state: MultiAgentState) -> list[list[int]]:
+    """``plan_deps`` from the state, or a strictly sequential chain."""
     plan = state.get("plan", [])
-    step = state.get("current_step", 0)
+    deps = state.get("plan_deps")
+    if deps is None or len(deps) != len(plan):
+        return [[i - 1] if i else [] for i in range(len(plan))]
+    return deps
 
-    if step >= len(plan):
-        return {"should_stop": True}
 
-    agent_name = plan[step]
-    agent_fn = AGENT_NODES.get(agent_name)
+def _done_steps(state: MultiAgentState) -> list[int]:
+    done = state.get("done_steps")
+    if done is None:  # state from before plans had dependencies
+        return list(range(state.get("current_step", 0)))
+    return done
 
+
+def _run_step(state: MultiAgentState, step: int) -> dict:
+    agent_fn = AGENT_NODES.get(state["plan"][step])
     if agent_fn is None:
         # Unknown agent → skip
-        return {"current_step": step + 1}
+        return {}
+    # Agents see current_step as the index of their own step (the translator
+    # relies on it to tell input from output mode).
+    return agent_fn({**state, "current_step": step})
+
 
-    # Run the agent
-    result = agent_fn(state)
+def _merge_wave(state: MultiAgentState, wave: list[int], outcomes: list[dict]) -> dict:
+    """Merge agent updates in plan order.
 
-    # Advance the step counter
-    result["current_step"] = step + 1
+    Agents return only their new ``agent_results`` / ``agents_used``
+    entries; the state's reducers append the wave's combined entries.
+    Confirmation requests from any agent in the wave are combined, except
+    those already settled (see ``_CONFIRM_RUNS``).
+    """
+    plan = state.get("plan", [])
+    ran = {plan[i] for i in _done_steps(state) + wave}
+    merged: dict = {}
+    results, used, messages, confirm_for = [], [], [], []
+    needs_confirm = False
+
+    for step, update in zip(wave, outcomes):
+        update = dict(update)
+        results += update.pop("agent_results", [])
+        used += update.pop("agents_used", [])
+        asks = bool(update.pop("needs_human_confirm", False))
+        message = update.pop("human_confirm_message", "")
+        gated = _CONFIRM_RUNS.get(plan[step])
+        if asks and gated in ran:
+            asks, message = False, ""
+        needs_confirm |= asks
+        if asks and gated:
+            confirm_for.append(gated)
+        if message:
+            messages.append(message)
+        merged.update(update)
+
+    merged.update({
+        "agent_results": offload(results),
+        "agents_used": used,
+        "needs_human_confirm": needs_confirm,
+        "human_confirm_message": "\n".join(messages) if needs_confirm else "",
+        "human_confirm_for": confirm_for,
+    })
+    return merged
 
+
+def dispatcher_node(state: MultiAgentState) -> dict:
+    """Run every plan step whose dependencies are done (concurrently)."""
+    plan = state.get("plan", [])
+    done = _done_steps(state)
+    wave = ready_steps(plan, _plan_deps(state), done)
+
+    if not wave:
+        return {"should_stop": True}
+
+    if len(wave) == 1:
+        outcomes = [_run_step(state, wave[0])]
+    else:
+        # ContextThreadPoolExecutor propagates callbacks to the agent threads;
+        # map() returns in submission (= plan) order.
+        workers = min(DISPATCH_MAX_WORKERS, len(wave))
+        with ContextThreadPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(executor.map(lambda step: _run_step(state, step), wave))
+
+    result = _merge_wave(state, wave, outcomes)
+    done = sorted(done + wave)
+    result["done_steps"] = done
+    result["current_step"] = len(done)
     return result
 
 
@@ -88,10 +171,11 @@ def finalizer_node(state: MultiAgentState) -> dict:
     if state.get("response"):
         return {}
 
-    results = state.get("agent_results", [])
-    # Pick the last content-producing agent's output
+    results = resolve(state.get("agent_results", []))
+    declined = set(state.get("declined_agents", []))
+    # Pick the last content-producing agent's output the user didn't decline
     for r in reversed(results):
-        if r["content"]:
+        if r["content"] and r["agent"] not in declined:
             return {"response": r["content"]}
 
     return {"response": "I wasn't able to find an answer. Please try rephrasing your question."}
@@ -118,21 +202,25 @@ def after_dispatcher(state: MultiAgentState) -> str:
         return "finalizer"
 
     # More agents to run?
-    plan = state.get("plan", [])
-    step = state.get("current_step", 0)
-    if step < len(plan):
+    if _steps_left(state):
         return "dispatcher"
 
     # All done
     return "finalizer"
 
 
+def _steps_left(state: MultiAgentState) -> bool:
+    return len(_done_steps(state)) < len(state.get("plan", []))
+
+
 def human_check_node(state: MultiAgentState) -> dict:
     """Pause and ask the user for confirmation before continuing.
 
     Uses langgraph.types.interrupt so the graph genuinely suspends.
     The CLI resumes the graph with the user's answer via Command(resume=...).
-    If the user declines, should_stop is set to True to skip remaining agents.
+    If the user declines, should_stop is set to True to skip remaining agents,
+    and any agent the question asked about (``human_confirm_for``) is recorded
+    in ``declined_agents`` so the finalizer ignores its results.
     """
     from langgraph.types import interrupt
 
@@ -149,6 +237,7 @@ def human_check_node(state: MultiAgentState) -> dict:
             "needs_human_confirm": False,
             "human_confirm_message": "",
             "should_stop": True,
+            "declined_agents": state.get("human_confirm_for", []),
         }
 
 
@@ -157,9 +246,7 @@ def after_human_check(state: MultiAgentState) -> str:
     if state.get("should_stop", False):
         return "finalizer"
 
-    plan = state.get("plan", [])
-    step = state.get("current_step", 0)
-    if step < len(plan):
+    if _steps_left(state):
         return "dispatcher"
 
     return "finalizer"
@@ -167,13 +254,18 @@ def after_human_check(state: MultiAgentState) -> str:
 
 # ── Build the graph ─────────────────────────────────────────────
 
-def create_multi_agent_graph():
+def create_multi_agent_graph(checkpointer=None):
     """Create and compile the multi-agent LangGraph workflow.
 
-    Uses an in-memory checkpointer so that interrupt() in human_check_node
-    can genuinely pause the graph and resume after user confirmation.
+    Uses a checkpointer so that interrupt() in human_check_node can genuinely
+    pause the graph and resume after user confirmation — by default the
+    process-wide SQLite one (src/agents/checkpoint.py), so a paused run can
+    also be resumed after a restart.
     """
-    from langgraph.checkpoint.memory import MemorySaver
+    if checkpointer is None:
+        from src.agents.checkpoint import get_checkpointer
+
+        checkpointer = get_checkpointer()
 
     workflow = StateGraph(MultiAgentState)
 
@@ -218,4 +310,21 @@ def create_multi_agent_graph():
     workflow.add_edge("simple_answer", END)
     workflow.add_edge("finalizer", END)
 
-    return workflow.compile(checkpointer=MemorySaver())
+    return workflow.compile(checkpointer=checkpointer)
+
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_multi_agent_graph():
+    """The process-wide compiled multi-agent graph, built on first use.
+
+    Requests share it (and its checkpointer); each run is isolated by its
+    own ``thread_id`` (see ``events.ask_events``).
+    """
+    global _graph
+    with _graph_lock:
+        if _graph is None:
+            _graph = create_multi_agent_graph()
+        return _graph
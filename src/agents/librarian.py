@@ -7,7 +7,9 @@ from __future__ import annotations
 
 from src.agents import MultiAgentState, AgentResult
 from src.core import create_vectorstore, create_retrieval_grader
-from src.config import MODEL_NAME, get_openai_client
+from src.config import ADAPTIVE_K_BUDGET, ADAPTIVE_RETRIEVAL, MODEL_NAME, get_openai_client
+from src.grading import adaptive_grade, get_grade_cache, grade_page
+from src.retrieval import rank_candidates
 
 _SYSTEM_PROMPT = (
     "You are a librarian. Using ONLY the provided book excerpts, "
@@ -19,16 +21,22 @@ _SYSTEM_PROMPT = (
 # ── Shared helper ────────────────────────────────────────────────
 
 def _retrieve_and_grade(question: str) -> list:
-    """Retrieve documents from the vectorstore and filter to relevant ones."""
+    """Retrieve documents from the vectorstore and filter to relevant ones.
+
+    With adaptive-k on, grading starts small and widens only while too few
+    chunks come back relevant (see src/grading.py).  Verdicts are shared with
+    the RAG graph through the grade cache.
+    """
     retriever = create_vectorstore()
-    documents = retriever.invoke(question)
     grader = create_retrieval_grader()
-    relevant = []
-    for doc in documents:
-        score = grader.invoke({"question": question, "document": doc.page_content})
-        if score.binary_score == "yes":  # type: ignore[union-attr]
-            relevant.append(doc)
-    return relevant
+    cache = get_grade_cache()
+    if ADAPTIVE_RETRIEVAL:
+        candidates = rank_candidates(retriever, question, ADAPTIVE_K_BUDGET)
+        relevant, _ = adaptive_grade(grader, question, candidates, cache=cache)
+        return relevant
+    documents = retriever.invoke(question)
+    verdicts = grade_page(grader, question, documents, cache=cache)
+    return [doc for doc, ok in zip(documents, verdicts) if ok]
 
 
 def _answer_from_docs(question: str, relevant_docs: list) -> str:
@@ -61,7 +69,6 @@ def search_books(question: str) -> str:
 def librarian_node(state: MultiAgentState) -> dict:
     """Search books, grade relevance, return findings."""
     query = state.get("translated_query") or state["query"]
-    prior = state.get("agent_results", [])
 
     relevant_docs = _retrieve_and_grade(query)
 
@@ -81,11 +88,9 @@ def librarian_node(state: MultiAgentState) -> dict:
         "confidence": confidence,
     }
 
-    agents_used = state.get("agents_used", []) + ["📚 Librarian"]
-
     return {
-        "agent_results": prior + [result],
-        "agents_used": agents_used,
+        "agent_results": [result],
+        "agents_used": ["📚 Librarian"],
         # If nothing found → flag for human confirmation
         "needs_human_confirm": confidence == "none",
         "human_confirm_message": (
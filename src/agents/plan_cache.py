@@ -0,0 +1,95 @@
+"""Plan cache — reuse LLM-made coordinator plans for the same query shape.
+
+When no routing rule matches, the coordinator asks the LLM for a plan.  Users
+send the same shapes over and over ("what's the weather in Paris" / "…in
+Tokyo"), so plans are memoised on disk keyed by a :func:`query_signature`
+— the query lowercased, with numbers, quotes, URLs and named entities
+masked — plus the detected language.
+
+Entries expire after PLAN_CACHE_TTL and are LRU-evicted beyond
+PLAN_CACHE_SIZE.  Every key includes :func:`planner_version` (model, agent
+set, planner prompt); when it changes the whole cache is dropped on open.
+The version is kept in the store's metadata, outside the evictable entries.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+
+from src.config import PLAN_CACHE_ENABLED, PLAN_CACHE_SIZE, PLAN_CACHE_TTL
+
+_URL = re.compile(r"https?://\S+|www\.\S+", re.I)
+_EMAIL = re.compile(r"\b[\w.+-]+@[\w-]+\.[\w.-]+\b")
+_QUOTED = re.compile(r"\"[^\"]*\"|“[^”]*”|«[^»]*»|(?<!\w)'[^']*'(?!\w)")
+_NUMBER = re.compile(r"\d+(?:[.,:/-]\d+)*")
+_TOKEN = re.compile(r"<\w+>|[^\W\d_][\w'’-]*|[.!?]|\S", re.UNICODE)
+_VERSION_KEY = "planner_version"
+
+
+def query_signature(query: str) -> str:
+    """Normalised query shape: masked entities/numbers/quotes/URLs, lowercased."""
+    text = _URL.sub(" <url> ", query)
+    text = _EMAIL.sub(" <email> ", text)
+    text = _QUOTED.sub(" <quote> ", text)
+    text = _NUMBER.sub(" <num> ", text)
+
+    out: list[str] = []
+    sentence_start = True
+    for token in _TOKEN.findall(text):
+        if token in ".!?":
+            sentence_start = True
+            continue
+        # Capitalised mid-sentence words are names, places, titles…
+        if not sentence_start and token[0].isupper() and token != "I":
+            token = "<ent>"
+            if out and out[-1] == "<ent>":
+                continue
+        out.append(token.lower() if not token.startswith("<") else token)
+        sentence_start = False
+    return " ".join(out)
+
+
+class PlanCache:
+    """Persistent plan memo keyed by (planner version, language, query signature)."""
+
+    def __init__(self, store, version: str):
+        self.store = store
+        self.version = version
+        if store.get_meta(_VERSION_KEY) != version:
+            # Agent set or planner prompt changed: every stored plan is stale
+            store.clear()
+            store.set_meta(_VERSION_KEY, version)
+
+    def key(self, query: str, language: str) -> str:
+        raw = f"{self.version}\0{language}\0{query_signature(query)}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def lookup(self, query: str, language: str) -> tuple[list[str], str] | None:
+        hit = self.store.get(self.key(query, language))
+        if hit is None:
+            return None
+        return list(hit["plan"]), hit["reasoning"]
+
+    def save(self, query: str, language: str, plan: list[str], reasoning: str) -> None:
+        self.store.set(self.key(query, language), {"plan": plan, "reasoning": reasoning})
+
+
+_plan_cache: PlanCache | None = None
+_plan_cache_lock = threading.Lock()
+
+
+def get_plan_cache() -> PlanCache | None:
+    """The process-wide plan cache (None when PLAN_CACHE_ENABLED is off)."""
+    global _plan_cache
+    if not PLAN_CACHE_ENABLED:
+        return None
+    with _plan_cache_lock:
+        if _plan_cache is None:
+            from src.agents.coordinator import planner_version
+            from src.cache import DiskCache
+
+            _plan_cache = PlanCache(
+                DiskCache("plans", PLAN_CACHE_SIZE, ttl=PLAN_CACHE_TTL), planner_version(),
+            )
+        return _plan_cache
@@ -1,13 +1,30 @@
 """Researcher agent — searches the live web for current information.
 
-Coordinator mode: targeted search using prior agent context.
+Coordinator mode: one LLM call writes several search-query variants (aimed at
+the librarian's findings when there are any); the searches run concurrently
+— the user's own query starts while the variants are being written — and
+the merged results are deduplicated by canonical URL and content hash and
+ranked by reciprocal rank fusion.
 Standalone mode: search_web(query) → simple direct Tavily + SDK call.
 """
 from __future__ import annotations
 
+import hashlib
+import json
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+
 from src.agents import MultiAgentState, AgentResult
+from src.agents.content_store import resolve
 from src.core import get_web_search_tool
-from src.config import MODEL_NAME, get_openai_client
+from src.config import (
+    MODEL_NAME,
+    RESEARCH_MAX_RESULTS,
+    RESEARCH_QUERY_VARIANTS,
+    get_openai_client,
+)
 
 
 # ── Standalone (simple direct call) ─────────────────────────────
@@ -84,17 +101,144 @@ def _build_search_query(query: str, prior_results: list[AgentResult]) -> str:
     return query
 
 
+def _search_queries(query: str, prior_results: list[AgentResult], variants: int) -> list[str]:
+    """``query`` plus up to ``variants`` alternative search queries from one LLM call.
+
+    Any failure (API error, malformed reply) degrades to just ``[query]``.
+    """
+    librarian_result = next(
+        (r for r in prior_results if r["agent"] == "librarian" and r["content"]),
+        None,
+    )
+    user = f"Question: {query}"
+    if librarian_result:
+        user += f"\n\nBook finding: {librarian_result['content'][:500]}"
+    try:
+        resp = get_openai_client().chat.completions.create(
+            model=MODEL_NAME,
+            temperature=0,
+            response_format={"type": "json_object"},
+            messages=[
+                {
+                    "role": "system",
+                    "content": (
+                        f"Write {variants} different, concise web search queries that together "
+                        "cover the user's question: rephrasings, more specific angles, related "
+                        "terms. If a book finding is given, include queries that look for "
+                        "additional evidence, current data, or verification of it. "
+                        'Return ONLY a JSON object: {"queries": ["...", ...]}'
+                    ),
+                },
+                {"role": "user", "content": user},
+            ],
+        )
+        parsed = json.loads(resp.choices[0].message.content or "{}")
+    except Exception:
+        return [query]
+    proposed = parsed.get("queries") if isinstance(parsed, dict) else None
+    if not isinstance(proposed, list):
+        proposed = []
+    queries = [query]
+    seen = {query.casefold().strip()}
+    for candidate in proposed:
+        if isinstance(candidate, str) and candidate.strip().casefold() not in seen:
+            seen.add(candidate.strip().casefold())
+            queries.append(candidate.strip())
+    return queries[:variants + 1]
+
+
+def _search(tool, query: str) -> list[dict]:
+    try:
+        results = tool.invoke({"query": query})
+    except Exception:
+        return []
+    return results if isinstance(results, list) else []
+
+
+_TRACKING_PARAM = re.compile(r"utm_\w+|fbclid|gclid|mc_[ce]id|ref_src", re.I)
+
+
+def canonical_url(url: str) -> str:
+    """Scheme-less, ``www.``-less, fragment-less URL without tracking parameters."""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").removeprefix("www.")
+    try:
+        port = f":{parts.port}" if parts.port not in (None, 80, 443) else ""
+    except ValueError:
+        port = ""
+    params = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not _TRACKING_PARAM.fullmatch(k)
+    )
+    query = f"?{urlencode(params)}" if params else ""
+    return f"{host}{port}{parts.path.rstrip('/')}{query}"
+
+
+def _content_hash(text: str) -> str:
+    return hashlib.sha1(" ".join(text.lower().split()).encode("utf-8")).hexdigest()
+
+
+_RRF_K = 60
+
+
+def merge_results(result_lists: list[list[dict]], limit: int = RESEARCH_MAX_RESULTS) -> list[dict]:
+    """Deduplicate search results across queries and rank the union.
+
+    A result is a duplicate if its canonical URL or its whitespace/case-
+    normalised content was seen before.  Ranking is reciprocal rank fusion:
+    results found by several queries, near the top, come first.
+    """
+    merged: list[dict] = []
+    scores: list[float] = []
+    by_url: dict[str, int] = {}
+    by_content: dict[str, int] = {}
+    for results in result_lists:
+        counted: set[int] = set()
+        for rank, r in enumerate(results):
+            url = canonical_url(r["url"]) if r.get("url") else ""
+            content = _content_hash(r["content"]) if (r.get("content") or "").strip() else ""
+            if not url and not content:
+                continue
+            idx = by_url.get(url) if url else None
+            if idx is None and content:
+                idx = by_content.get(content)
+            if idx is None:
+                idx = len(merged)
+                merged.append(r)
+                scores.append(0.0)
+            if url:
+                by_url.setdefault(url, idx)
+            if content:
+                by_content.setdefault(content, idx)
+            if idx not in counted:
+                counted.add(idx)
+                scores[idx] += 1.0 / (_RRF_K + rank + 1)
+    order = sorted(range(len(merged)), key=lambda i: -scores[i])
+    return [merged[i] for i in order[:limit]]
+
+
+def _multi_search(query: str, prior_results: list[AgentResult], tool) -> list[dict]:
+    with ContextThreadPoolExecutor(max_workers=RESEARCH_QUERY_VARIANTS + 1) as pool:
+        # The user's own query doesn't wait for the variants
+        first = pool.submit(_search, tool, query)
+        variants = _search_queries(query, prior_results, RESEARCH_QUERY_VARIANTS)[1:]
+        rest = [pool.submit(_search, tool, q) for q in variants]
+        result_lists = [first.result()] + [f.result() for f in rest]
+    return merge_results(result_lists)
+
+
 def researcher_node(state: MultiAgentState) -> dict:
     """Search the web, synthesise findings."""
     query = state.get("translated_query") or state["query"]
-    prior = state.get("agent_results", [])
-
-    # ── Build targeted search query ─────────────────────────────
-    search_query = _build_search_query(query, prior)
+    prior = resolve(state.get("agent_results", []))
+    tool = get_web_search_tool()
 
     # ── Web search ──────────────────────────────────────────────
-    tool = get_web_search_tool()
-    raw_results = tool.invoke({"query": search_query})
+    if RESEARCH_QUERY_VARIANTS > 0:
+        raw_results = _multi_search(query, prior, tool)
+    else:
+        # Single search, targeted at the librarian's findings if any
+        raw_results = tool.invoke({"query": _build_search_query(query, prior)})
 
     if not raw_results:
         result: AgentResult = {
@@ -103,10 +247,9 @@ def researcher_node(state: MultiAgentState) -> dict:
             "sources": [],
             "confidence": "none",
         }
-        agents_used = state.get("agents_used", []) + ["🔍 Researcher"]
         return {
-            "agent_results": prior + [result],
-            "agents_used": agents_used,
+            "agent_results": [result],
+            "agents_used": ["🔍 Researcher"],
             "needs_human_confirm": True,
             "human_confirm_message": (
                 "🔍 Researcher found nothing on the web. "
@@ -150,9 +293,7 @@ def researcher_node(state: MultiAgentState) -> dict:
         "confidence": "high" if len(raw_results) >= 2 else "medium",
     }
 
-    agents_used = state.get("agents_used", []) + ["🔍 Researcher"]
-
     return {
-        "agent_results": prior + [result],
-        "agents_used": agents_used,
+        "agent_results": [result],
+        "agents_used": ["🔍 Researcher"],
     }
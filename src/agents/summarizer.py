@@ -6,6 +6,7 @@ Standalone mode: summarize_text(text) → simple direct SDK call.
 from __future__ import annotations
 
 from src.agents import MultiAgentState, AgentResult
+from src.agents.content_store import resolve
 from src.config import MODEL_NAME, get_openai_client
 
 
@@ -36,8 +37,7 @@ def summarize_text(text: str) -> str:
 def summarizer_node(state: MultiAgentState) -> dict:
     """Merge all agent outputs into a coherent final answer."""
     query = state.get("translated_query") or state["query"]
-    prior = state.get("agent_results", [])
-    agents_used = state.get("agents_used", [])
+    prior = resolve(state.get("agent_results", []))
 
     # Collect content from all content-producing agents
     sections = []
@@ -51,7 +51,7 @@ def summarizer_node(state: MultiAgentState) -> dict:
     if not sections:
         return {
             "response": "No agents produced content to summarize.",
-            "agents_used": agents_used + ["📝 Summarizer (skipped — no content)"],
+            "agents_used": ["📝 Summarizer (skipped — no content)"],
         }
 
     if len(sections) == 1:
@@ -63,7 +63,7 @@ def summarizer_node(state: MultiAgentState) -> dict:
         )
         return {
             "response": content_result["content"] if content_result else "",
-            "agents_used": agents_used + ["📝 Summarizer (passthrough)"],
+            "agents_used": ["📝 Summarizer (passthrough)"],
         }
 
     combined = "\n\n".join(sections)
@@ -104,6 +104,6 @@ def summarizer_node(state: MultiAgentState) -> dict:
 
     return {
         "response": content,
-        "agent_results": prior + [result],
-        "agents_used": agents_used + ["📝 Summarizer"],
+        "agent_results": [result],
+        "agents_used": ["📝 Summarizer"],
     }
@@ -0,0 +1,137 @@
+"""Translation memory — reuse segment translations across runs.
+
+Text is split into segments (one per non-blank line; leading/trailing
+whitespace is kept aside and restored).  Each segment's translation is
+memoised on disk keyed by the normalised segment (Unicode NFKC, collapsed
+whitespace), the source language ("auto" when unknown) and the target
+language, plus a version of the translation prompt.  :func:`translate`
+looks every segment up first and hands only the misses — in one batch —
+to the LLM, so a partially known text costs a smaller call and a fully
+known one costs none.
+
+Entries are LRU-evicted beyond TRANSLATION_MEMORY_SIZE (and expire after
+TRANSLATION_MEMORY_TTL when set).
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+import unicodedata
+from typing import Callable
+
+from src.config import (
+    TRANSLATION_MEMORY_ENABLED,
+    TRANSLATION_MEMORY_SIZE,
+    TRANSLATION_MEMORY_TTL,
+)
+
+_LINE = re.compile(r"^(\s*)(.*?)(\s*)$", re.S)
+
+# translate_batch(segments, source, target) -> (translations, detected source language)
+BatchTranslator = Callable[[list[str], str, str], "tuple[list[str], str | None]"]
+
+
+def normalise_segment(segment: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", segment).split())
+
+
+def _needs_translation(segment: str) -> bool:
+    # Rules, numbers, bare markup: nothing to translate
+    return any(ch.isalpha() for ch in segment)
+
+
+def split_segments(text: str) -> list[tuple[str, str, str]]:
+    """``(leading, segment, trailing)`` per line; joining them with newlines gives ``text``."""
+    return [_LINE.match(line).groups() for line in text.split("\n")]
+
+
+def _language_key(language: str | None) -> str:
+    return (language or "auto").strip().lower()
+
+
+class TranslationMemory:
+    """Persistent segment memo keyed by (version, source, target, normalised segment)."""
+
+    def __init__(self, store, version: str):
+        self.store = store
+        self.version = version
+
+    def key(self, segment: str, source: str | None, target: str) -> str:
+        raw = "\0".join([
+            self.version, _language_key(source), _language_key(target), normalise_segment(segment),
+        ])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def lookup(self, segments: list[str], source: str | None, target: str) -> list[dict | None]:
+        keys = [self.key(s, source, target) for s in segments]
+        found = self.store.get_many(keys)
+        return [found.get(k) for k in keys]
+
+    def save(
+        self, segments: list[str], source: str | None, target: str,
+        translations: list[str], detected: str | None = None,
+    ) -> None:
+        self.store.set_many({
+            self.key(s, source, target): {"text": t, "language": detected}
+            for s, t in zip(segments, translations)
+        })
+
+
+def translate(
+    text: str,
+    target: str,
+    translate_batch: BatchTranslator,
+    source: str | None = None,
+    memory: TranslationMemory | None = None,
+) -> tuple[str, str | None, dict]:
+    """Translate ``text`` segment by segment, calling the LLM only for misses.
+
+    Returns ``(translation, detected source language, stats)``; ``stats`` has
+    ``segments``, ``hits`` and ``translated`` (segments sent to the LLM).
+    """
+    lines = split_segments(text)
+    todo = sorted({seg for _, seg, _ in lines if _needs_translation(seg)})
+    stats = {"segments": len(todo), "hits": 0, "translated": 0}
+    if not todo:
+        return text, source, stats
+
+    found = memory.lookup(todo, source, target) if memory is not None else [None] * len(todo)
+    done = {seg: hit["text"] for seg, hit in zip(todo, found) if hit is not None}
+    detected = next((hit.get("language") for hit in found if hit and hit.get("language")), None)
+    stats["hits"] = len(done)
+
+    missing = [seg for seg in todo if seg not in done]
+    if missing:
+        translations, language = translate_batch(missing, source or "auto", target)
+        detected = language or detected
+        done.update(zip(missing, translations))
+        stats["translated"] = len(missing)
+        if memory is not None:
+            memory.save(missing, source, target, translations, detected)
+
+    out = "\n".join(
+        f"{lead}{done.get(seg, seg)}{trail}" for lead, seg, trail in lines
+    )
+    return out, detected or source, stats
+
+
+_memory: TranslationMemory | None = None
+_memory_lock = threading.Lock()
+
+
+def get_translation_memory() -> TranslationMemory | None:
+    """The process-wide translation memory (None when TRANSLATION_MEMORY_ENABLED is off)."""
+    global _memory
+    if not TRANSLATION_MEMORY_ENABLED:
+        return None
+    with _memory_lock:
+        if _memory is None:
+            from src.agents.translator import translator_version
+            from src.cache import DiskCache
+
+            _memory = TranslationMemory(
+                DiskCache("translations", TRANSLATION_MEMORY_SIZE, ttl=TRANSLATION_MEMORY_TTL),
+                translator_version(),
+            )
+        return _memory
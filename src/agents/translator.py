@@ -6,17 +6,36 @@ Two modes in coordinator pipeline:
 
 Standalone mode:
   translate_text(text, target_language) → simple direct SDK call
+
+Both go through the translation memory (src/agents/translation_memory.py):
+only segments not translated before reach the LLM, in one batched call.
 """
 from __future__ import annotations
 
+import hashlib
+import json
+
 from src.agents import MultiAgentState, AgentResult
+from src.agents.content_store import resolve
+from src.agents.translation_memory import get_translation_memory, translate
 from src.config import MODEL_NAME, get_openai_client
 
+_BATCH_SYSTEM = (
+    "You are a professional translator. You receive a JSON object with "
+    '"target_language" and a list of text "segments". Translate every segment '
+    "to the target language, preserving markdown formatting. If a segment is "
+    "already in the target language, return it as-is. Return ONLY a JSON object: "
+    '{"source_language": "<English name of the segments\' language>", '
+    '"translations": [<one translation per segment, same order>]}'
+)
 
-# ── Standalone (simple direct call) ─────────────────────────────
 
-def translate_text(text: str, target_language: str = "English") -> str:
-    """Translate text to target language. Simple direct SDK call."""
+def translator_version() -> str:
+    """Identifies the translation prompt/model — part of every translation-memory key."""
+    return f"{MODEL_NAME}:{hashlib.sha1(_BATCH_SYSTEM.encode('utf-8')).hexdigest()[:10]}"
+
+
+def _translate_one(text: str, target_language: str) -> str:
     resp = get_openai_client().chat.completions.create(
         model=MODEL_NAME,
         temperature=0,
@@ -34,6 +53,48 @@ def translate_text(text: str, target_language: str = "English") -> str:
     return resp.choices[0].message.content or ""
 
 
+def _translate_batch(
+    segments: list[str], source_language: str, target_language: str
+) -> tuple[list[str], str | None]:
+    """Translate the segments the memory missed in one JSON-mode call.
+
+    Falls back to one call per segment if the reply doesn't line up.
+    """
+    resp = get_openai_client().chat.completions.create(
+        model=MODEL_NAME,
+        temperature=0,
+        response_format={"type": "json_object"},
+        messages=[
+            {"role": "system", "content": _BATCH_SYSTEM},
+            {
+                "role": "user",
+                "content": json.dumps(
+                    {"target_language": target_language, "segments": segments},
+                    ensure_ascii=False,
+                ),
+            },
+        ],
+    )
+    try:
+        result = json.loads(resp.choices[0].message.content or "{}")
+        translations = [str(t) for t in result["translations"]]
+        if len(translations) == len(segments):
+            return translations, result.get("source_language") or None
+    except (ValueError, KeyError, TypeError):
+        pass
+    return [_translate_one(segment, target_language) for segment in segments], None
+
+
+# ── Standalone (simple direct call) ─────────────────────────────
+
+def translate_text(text: str, target_language: str = "English") -> str:
+    """Translate text to target language (reusing remembered segments)."""
+    translated, _, _ = translate(
+        text, target_language, _translate_batch, memory=get_translation_memory(),
+    )
+    return translated
+
+
 # ── Coordinator pipeline node ───────────────────────────────────
 
 
@@ -44,33 +105,23 @@ def translator_node(state: MultiAgentState) -> dict:
     # current_step is the index of THIS invocation in the plan (not yet incremented
     # by dispatcher — dispatcher increments AFTER the agent returns).
     current_step = state.get("current_step", 0)
-    prior = state.get("agent_results", [])
-    agents_used = state.get("agents_used", [])
+    prior = resolve(state.get("agent_results", []))
 
     # Determine mode: "input" if this is the FIRST translator in the plan,
     # "output" if it's the LAST.  Use plan-index comparison, not current_step
     # arithmetic, so the logic is explicit and immune to dispatcher ordering.
+    # A query the coordinator already translated (fused planning) only
+    # needs the output step.
     translator_indices = [i for i, a in enumerate(plan) if a == "translator"]
     first_translator_idx = translator_indices[0] if translator_indices else 0
-    is_input_mode = current_step == first_translator_idx
+    is_input_mode = current_step == first_translator_idx and not state.get("translated_query")
 
     if is_input_mode:
         # ── Input mode: translate query to English ──────────────
-        resp = get_openai_client().chat.completions.create(
-            model=MODEL_NAME,
-            temperature=0,
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "Detect the language of the input text, then translate it to English. "
-                        "Return ONLY the English translation. If it's already English, return it as-is."
-                    ),
-                },
-                {"role": "user", "content": query},
-            ],
+        translated, language, stats = translate(
+            query, "English", _translate_batch, memory=get_translation_memory(),
         )
-        translated = resp.choices[0].message.content or query
+        translated = translated or query
 
         result: AgentResult = {
             "agent": "translator",
@@ -81,8 +132,9 @@ def translator_node(state: MultiAgentState) -> dict:
 
         return {
             "translated_query": translated,
-            "agent_results": prior + [result],
-            "agents_used": agents_used + ["🌍 Translator (→ English)"],
+            "query_language": language or "",
+            "agent_results": [result],
+            "agents_used": [f"🌍 Translator (→ English{_memory_note(stats)})"],
         }
 
     else:
@@ -95,28 +147,16 @@ def translator_node(state: MultiAgentState) -> dict:
             if content_results:
                 response_so_far = content_results[-1]["content"]
 
-        resp = get_openai_client().chat.completions.create(
-            model=MODEL_NAME,
-            temperature=0,
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "Translate the following text to the same language as the user's "
-                        "original query below. Preserve all formatting (markdown, bullet "
-                        "points, etc). Return ONLY the translation."
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": (
-                        f"Original query (detect target language from this): {query}\n\n"
-                        f"Text to translate:\n{response_so_far}"
-                    ),
-                },
-            ],
-        )
-        translated = resp.choices[0].message.content or response_so_far
+        target = state.get("query_language")
+        if target:
+            translated, _, stats = translate(
+                response_so_far, target, _translate_batch,
+                source="English", memory=get_translation_memory(),
+            )
+        else:
+            # Query language unknown: let the model infer it from the query
+            translated, stats = _translate_like_query(query, response_so_far), None
+        translated = translated or response_so_far
 
         result = {
             "agent": "translator",
@@ -127,6 +167,39 @@ def translator_node(state: MultiAgentState) -> dict:
 
         return {
             "response": translated,
-            "agent_results": prior + [result],
-            "agents_used": agents_used + ["🌍 Translator (→ user language)"],
+            "agent_results": [result],
+            "agents_used": [f"🌍 Translator (→ user language{_memory_note(stats)})"],
         }
+
+
+def _memory_note(stats: dict | None) -> str:
+    if not stats or not stats["hits"]:
+        return ""
+    if not stats["translated"]:
+        return ", from memory"
+    return f", {stats['hits']}/{stats['segments']} from memory"
+
+
+def _translate_like_query(query: str, text: str) -> str:
+    resp = get_openai_client().chat.completions.create(
+        model=MODEL_NAME,
+        temperature=0,
+        messages=[
+            {
+                "role": "system",
+                "content": (
+                    "Translate the following text to the same language as the user's "
+                    "original query below. Preserve all formatting (markdown, bullet "
+                    "points, etc). Return ONLY the translation."
+                ),
+            },
+            {
+                "role": "user",
+                "content": (
+                    f"Original query (detect target language from this): {query}\n\n"
+                    f"Text to translate:\n{text}"
+                ),
+            },
+        ],
+    )
+    return resp.choices[0].message.content or text
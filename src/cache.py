@@ -0,0 +1,202 @@
+"""Small persistent caches shared across runs (and with the ``ai serve`` daemon).
+
+Each cache is one SQLite file under :func:`cache_dir` holding JSON values,
+bounded by ``max_entries`` with least-recently-used eviction and an optional
+per-entry time-to-live.  SQLite gives us atomic writes and safe concurrent
+access from several CLI processes for free.
+
+Bookkeeping that must never be evicted lives beside the entries: a ``meta``
+table of JSON values (e.g. the version the entries were made with) and a
+``counters`` table of integers bumped in place by SQL.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable
+
+
+def cache_dir() -> Path:
+    """``$AI_ASSISTANT_CACHE_DIR`` or ``~/.cache/ai-assistant``."""
+    override = os.getenv("AI_ASSISTANT_CACHE_DIR")
+    if override:
+        return Path(override)
+    return Path.home() / ".cache" / "ai-assistant"
+
+
+class DiskCache:
+    """SQLite-backed JSON key/value cache with LRU eviction and optional TTL."""
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int,
+        ttl: float | None = None,
+        path: Path | None = None,
+    ):
+        self.name = name
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.path = path or cache_dir() / f"{name}.sqlite3"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS counters ("
+            " name TEXT PRIMARY KEY,"
+            " count INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.commit()
+
+    # ── Reads ───────────────────────────────────────────────────
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        """Values for the keys that are present and fresh (touching them)."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        now = time.time()
+        found: dict[str, Any] = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, value, expires_at FROM entries WHERE key IN ({marks})",
+                    chunk,
+                ).fetchall()
+                for key, value, expires_at in rows:
+                    if expires_at is None or expires_at > now:
+                        found[key] = json.loads(value)
+            if found:
+                self._conn.executemany(
+                    "UPDATE entries SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+        return found
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.get_many([key]).get(key, default)
+
+    # ── Writes ──────────────────────────────────────────────────
+
+    def set_many(self, items: dict[str, Any], ttl: float | None = None) -> None:
+        """Store ``items``; ``ttl`` (seconds) overrides the cache default."""
+        if not items:
+            return
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = now + ttl if ttl else None
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at, last_used)"
+                " VALUES (?, ?, ?, ?)",
+                [
+                    (key, json.dumps(value, ensure_ascii=False), expires_at, now)
+                    for key, value in items.items()
+                ],
+            )
+            self._evict_locked(now)
+            self._conn.commit()
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        self.set_many({key: value}, ttl)
+
+    def _evict_locked(self, now: float) -> None:
+        self._conn.execute(
+            "DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+        )
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                " SELECT key FROM entries ORDER BY last_used ASC LIMIT ?)",
+                (overflow,),
+            )
+
+    def clear(self) -> int:
+        """Drop every entry; returns how many were removed."""
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM entries").rowcount
+            self._conn.commit()
+        return removed
+
+    # ── Metadata and counters ───────────────────────────────────
+
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (key, json.dumps(value, ensure_ascii=False)),
+            )
+            self._conn.commit()
+
+    def increment(self, name: str, by: int = 1) -> None:
+        """Add ``by`` to counter ``name`` (atomic across processes)."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO counters (name, count) VALUES (?, ?)"
+                " ON CONFLICT (name) DO UPDATE SET count = count + excluded.count",
+                (name, by),
+            )
+            self._conn.commit()
+
+    def counters(self) -> dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT name, count FROM counters").fetchall()
+        return dict(rows)
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM counters")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+        return count
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def list_caches() -> list[str]:
+    """Names of the :class:`DiskCache` files in :func:`cache_dir`."""
+    names = []
+    for path in sorted(cache_dir().glob("*.sqlite3")):
+        conn = sqlite3.connect(str(path), timeout=5.0)
+        try:
+            found = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'entries'"
+            ).fetchone()
+        finally:
+            conn.close()
+        if found:
+            names.append(path.stem)
+    return names
@@ -6,6 +6,7 @@ from rich.console import Console
 from rich.panel import Panel
 from rich.markdown import Markdown
 from rich.progress import Progress, SpinnerColumn, TextColumn
+from rich.table import Table
 
 # Get version from package metadata
 try:
@@ -72,142 +73,416 @@ def rag_ask(
     question: str = typer.Argument(..., help="Your question about books"),
     stream: bool = typer.Option(True, "--stream/--no-stream", help="Stream intermediate steps"),
     verbose: bool = typer.Option(False, "--verbose", "-v", help="Show detailed output"),
+    local: bool = typer.Option(False, "--local", help="Run in-process even if `ai serve` is up"),
 ):
     """Ask a question about your books using RAG pipeline"""
-    from src.core import setup_environment
-    from src.graph import create_graph
+    events = None if local else _daemon_events({"cmd": "rag_ask", "question": question})
 
-    setup_environment()
+    if events is None:
+        from src.core import setup_environment
+        from src.events import rag_ask_events
+        from src.graph import get_graph
 
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        console=console,
-        transient=True,
-    ) as progress:
-        progress.add_task("Loading documents and creating vectorstore...", total=None)
-        rag_app = create_graph()
+        setup_environment()
+
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            console=console,
+            transient=True,
+        ) as progress:
+            progress.add_task("Loading documents and creating vectorstore...", total=None)
+            rag_app = get_graph()
+        events = rag_ask_events(rag_app, question)
 
     console.print(Panel(f"[bold cyan] Question:[/] {question}", border_style="cyan"))
 
-    inputs = {"question": question}
+    _render_events(events, verbose=verbose, show_nodes=stream)
+
+
+def _daemon_events(request: dict):
+    """Event stream from a running ``ai serve`` daemon, or None to run locally."""
+    from src.daemon import is_interactive_query, remote_events
+
+    if is_interactive_query(request.get("query") or request.get("question", "")):
+        return None
+    return remote_events(request)
+
+
+def _answer_panel(text: str, title: str) -> Panel:
+    return Panel(
+        Markdown(text),
+        title=f"[bold green]{title}[/]",
+        border_style="green",
+        padding=(1, 2),
+    )
+
+
+def _render_events(events, verbose: bool = False, show_nodes: bool = True) -> None:
+    """Render a pipeline event stream (see src/events.py), answering confirms.
+
+    ``token`` events fill a live answer panel as they arrive; the ``answer``
+    event that follows freezes it with the final text.
+    """
+    from rich.live import Live
 
-    if stream:
-        last_state = None
-        for step in rag_app.stream(inputs): # type: ignore
-            for node_name, state in step.items():
-                console.print(f"  [dim]→ {node_name}[/]")
+    live = None
+    streamed = ""
+    reply = None
+    try:
+        while True:
+            try:
+                event = events.send(reply)
+            except StopIteration:
+                break
+            reply = None
+            kind = event.get("type")
+
+            if kind == "token":
+                streamed += event["text"]
+                if live is None:
+                    live = Live(console=console, refresh_per_second=12, vertical_overflow="visible")
+                    live.start()
+                live.update(_answer_panel(streamed, "✍️  Answering..."))
+                continue
+
+            if kind == "plan":
+                # Show coordinator plan
+                # Agents in the same wave run concurrently
+                waves = event.get("waves") or [[agent] for agent in event["plan"]]
+                console.print(f"\n  [bold]🎯 Plan:[/] {' → '.join(' + '.join(w) for w in waves)}")
+                if verbose and event.get("reasoning"):
+                    console.print(f"  [dim]   Reasoning: {event['reasoning']}[/]")
+                console.print()
+
+            elif kind == "agent":
+                # Show which agent is working
+                console.print(f"  {event['agent']} working...")
                 if verbose:
-                    console.print(f"    [dim]keys: {list(state.keys())}[/]")
-                last_state = state
+                    if event.get("confidence"):
+                        console.print(f"    [dim]confidence: {event['confidence']}[/]")
+                    for s in event.get("sources", []):
+                        console.print(f"    [dim]source: {s}[/]")
+
+            elif kind == "node":
+                if show_nodes:
+                    console.print(f"  [dim]→ {event['name']}[/]")
+                    if verbose:
+                        console.print(f"    [dim]keys: {event.get('keys', [])}[/]")
+
+            elif kind == "status":
+                console.print(f"\n[bold cyan]{event['message']}[/]")
+
+            elif kind == "confirm":
+                if event.get("kind") == "interrupt":
+                    console.print(f"\n[bold yellow]❓ {event['notice']}[/]")
+                else:
+                    console.print(f"\n[yellow]{event['notice']}[/]")
+                try:
+                    reply = typer.confirm(event["prompt"], default=event.get("default", False))
+                except typer.Abort:
+                    if event.get("thread_id"):
+                        console.print(f"\n[dim]⏸️  Paused — continue with: ai resume {event['thread_id']}[/]")
+                    raise
+
+            elif kind == "answer":
+                if live is not None:
+                    if event.get("text"):
+                        live.update(_answer_panel(event["text"], event["title"]))
+                    live.stop()
+                    live, streamed = None, ""
+                elif not event.get("text"):
+                    console.print("[red]❌ No answer generated.[/]")
+                    continue
+                else:
+                    console.print(_answer_panel(event["text"], event["title"]))
+                if verbose and event.get("ttft") is not None:
+                    console.print(f"\n  [dim]⏱️  Time to first token: {event['ttft']:.2f}s[/]")
+                if verbose and event.get("sources"):
+                    console.print("\n[bold]Documents used:[/]")
+                    for i, source in enumerate(event["sources"], 1):
+                        console.print(f"  {i}. {source}")
+                if verbose and event.get("agents_used"):
+                    console.print(f"\n  [dim]Agents used: {' → '.join(event['agents_used'])}[/]")
+                if verbose and event.get("context"):
+                    _print_context_report(event["context"])
+                if verbose and event.get("grading"):
+                    _print_grading_report(event["grading"])
+                if verbose and event.get("speculation"):
+                    _print_speculation_report(event["speculation"])
+
+            elif kind == "error":
+                if live is not None:
+                    live.stop()
+                    live, streamed = None, ""
+                console.print(f"[red]❌ {event['message']}[/]")
+    finally:
+        if live is not None:
+            live.stop()
+
+
+def _print_grading_report(stats: dict) -> None:
+    """One-line grading summary; in batch mode, also the calls saved vs per-document."""
+    tokens = stats["prompt_tokens"] + stats["completion_tokens"]
+    console.print(
+        f"\n  [dim]Grading ({stats['mode']}): {stats['docs']} docs, "
+        f"{stats['llm_calls']} LLM call(s), {tokens} tokens, {stats['seconds']:.2f}s[/]"
+    )
+    if stats.get("cached"):
+        console.print(f"  [dim]   {stats['cached']} verdict(s) reused from the grade cache[/]")
+    if stats.get("early_exit_saved"):
+        console.print(f"  [dim]   {stats['early_exit_saved']} grader call(s) saved by early exit[/]")
+    if stats.get("pregraded"):
+        console.print(f"  [dim]   {stats['pregraded']} chunk(s) decided locally by the pre-grader[/]")
+    if stats["mode"] == "batch":
+        saved = stats["docs"] - stats["llm_calls"]
+        console.print(
+            f"  [dim]   {saved} call(s) saved vs per-document grading, "
+            f"{stats['fallbacks']} per-document fallback(s)[/]"
+        )
 
-        if last_state and "generation" in last_state:
-            console.print(Panel(
-                Markdown(last_state["generation"]),
-                title="[bold green]✅ Answer[/]",
-                border_style="green",
-                padding=(1, 2),
-            ))
-            if verbose and "documents" in last_state:
-                console.print("\n[bold]Documents used:[/]")
-                for i, doc in enumerate(last_state["documents"][:5], 1):
-                    source = doc.metadata.get("source", "Unknown")
-                    console.print(f"  {i}. {source}")
-
-            # If some (but not the majority) docs were irrelevant, offer a web search follow-up
-            irrelevant = last_state.get("irrelevant_count", 0)
-            total = last_state.get("total_retrieved", 0)
-            web_search_done = last_state.get("web_search", "No") == "Yes"
-            if irrelevant > 0 and not web_search_done:
-                console.print(
-                    f"\n[yellow]⚠️  {irrelevant}/{total} retrieved document(s) were not relevant "
-                    f"to your question. The answer above is based on the {total - irrelevant} "
-                    f"relevant document(s) found.[/]"
-                )
-                if typer.confirm("🌐 Would you like to supplement with a web search?", default=False):
-                    _run_web_supplemented_rag(question, last_state.get("generation", ""), rag_app)
-        else:
-            console.print("[red]❌ No answer generated.[/]")
+
+def _print_context_report(report: dict) -> None:
+    """What the context packer sent to generation and what it cut."""
+    console.print(
+        f"\n  [dim]Context: {report['kept']} chunk(s), "
+        f"{report['tokens']}/{report['budget']} tokens[/]"
+    )
+    if report["duplicates"]:
+        console.print(f"  [dim]   cut {len(report['duplicates'])} duplicate(s): "
+                      f"{', '.join(report['duplicates'])}[/]")
+    if report["truncated"]:
+        console.print(f"  [dim]   shortened {len(report['truncated'])} to fit: "
+                      f"{', '.join(report['truncated'])}[/]")
+    if report["over_budget"]:
+        console.print(f"  [dim]   cut {len(report['over_budget'])} over budget: "
+                      f"{', '.join(report['over_budget'])}[/]")
+
+
+def _print_speculation_report(report: dict) -> None:
+    """This run's speculative web search outcome plus the running totals."""
+    outcome = report["outcome"]
+    if outcome == "used":
+        line = f"used (saved {report['saved_seconds']:.2f}s)"
+    elif outcome == "capped":
+        line = "skipped (hourly cap reached)"
     else:
-        state = rag_app.invoke(inputs) # type: ignore
-        console.print(Panel(
-            Markdown(state.get("generation", "No answer generated")),
-            title="[bold green]✅ Answer[/]",
-            border_style="green",
-            padding=(1, 2),
-        ))
+        line = "discarded (answered from local documents)"
+    console.print(f"  [dim]Speculative web search: {line}[/]")
+
+    totals = report.get("totals") or {}
+    settled = totals.get("used", 0) + totals.get("discarded", 0)
+    if settled:
+        console.print(
+            f"  [dim]   paid off {totals['used']}/{settled} "
+            f"({totals['used'] / settled:.0%}), {totals['saved_seconds']:.1f}s saved in total[/]"
+        )
+
+
+@rag_cli.command("bench-grading")
+def bench_grading(
+    question: str = typer.Argument(..., help="Question to grade retrieved chunks against"),
+    k: int = typer.Option(6, "--k", help="Number of chunks to grade"),
+):
+    """⏱️  Compare per-document, batched and logprob relevance grading on one question"""
+    from src.core import create_retrieval_grader, create_vectorstore, setup_environment
+    from src.grading import grade_page, new_grading_stats
+    from src.retrieval import rank_candidates
 
-        irrelevant = state.get("irrelevant_count", 0)
-        total = state.get("total_retrieved", 0)
-        web_search_done = state.get("web_search", "No") == "Yes"
-        if irrelevant > 0 and not web_search_done:
-            console.print(
-                f"\n[yellow]⚠️  {irrelevant}/{total} retrieved document(s) were not relevant "
-                f"to your question. The answer above is based on the {total - irrelevant} "
-                f"relevant document(s) found.[/]"
+    setup_environment()
+    docs = rank_candidates(create_vectorstore(), question, k)
+    if not docs:
+        console.print("[yellow]No documents retrieved.[/]")
+        raise typer.Exit(1)
+
+    results = {}
+    for mode in ("per_document", "batch", "logprob"):
+        stats = new_grading_stats()
+        with console.status(f"[bold cyan]Grading {len(docs)} chunks ({mode})..."):
+            verdicts = grade_page(
+                create_retrieval_grader(mode), question, docs, stats=stats, pregrade=False,
             )
-            if typer.confirm("🌐 Would you like to supplement with a web search?", default=False):
-                _run_web_supplemented_rag(question, state.get("generation", ""), rag_app)
+        results[mode] = (verdicts, stats)
+
+    table = Table(title=f"Grading {len(docs)} chunks")
+    table.add_column("Mode", style="cyan")
+    table.add_column("LLM calls", justify="right")
+    table.add_column("Prompt tok", justify="right")
+    table.add_column("Completion tok", justify="right")
+    table.add_column("Latency", justify="right")
+    table.add_column("Relevant", justify="right")
+    table.add_column("Agrees", justify="right")
+    baseline = results["per_document"][0]
+    for mode, (verdicts, stats) in results.items():
+        table.add_row(
+            mode,
+            str(stats["llm_calls"]),
+            str(stats["prompt_tokens"]),
+            str(stats["completion_tokens"]),
+            f"{stats['seconds']:.2f}s",
+            str(sum(verdicts)),
+            f"{sum(a == b for a, b in zip(baseline, verdicts))}/{len(docs)}",
+        )
+    console.print(table)
 
+    scores = [doc.metadata.get("relevance_score") for doc in docs]
+    if all(score is not None for score in scores):
+        console.print("\n[bold]P(yes) by chunk (logprob grader):[/]")
+        for i, (doc, score) in enumerate(zip(docs, scores), 1):
+            console.print(f"  {i}. {score:.2f}  [dim]{doc.metadata.get('source', 'unknown')}[/]")
 
-def _run_web_supplemented_rag(question: str, local_answer: str, rag_app):
-    """Run a web-supplemented RAG pass after the user opts in."""
-    from src.core import (
-        create_question_rewriter,
-        get_web_search_tool,
-        create_rag_chain,
-    )
-    from langchain_core.documents import Document
 
-    console.print("\n[bold cyan]🌐 Searching the web...[/]")
+@rag_cli.command("bench-async")
+def bench_async(
+    path: str = typer.Argument(..., help="Text file with one question per line"),
+    concurrency: int = typer.Option(None, "--concurrency", "-c", help="Questions in flight at once"),
+    skip_sync: bool = typer.Option(False, "--skip-sync", help="Only run the async graph"),
+):
+    """🚀 Compare sequential sync answering with concurrent async answering"""
+    from pathlib import Path
+    from src.config import ASYNC_CONCURRENCY
+    from src.core import setup_environment
+    from src.graph import get_graph
+    from src.throughput import run_async, run_sync
+
+    source = Path(path)
+    if not source.exists():
+        console.print(f"[red]File not found:[/] {path}")
+        raise typer.Exit(1)
+    questions = [line.strip() for line in source.read_text(encoding="utf-8").splitlines() if line.strip()]
+    if not questions:
+        console.print("[yellow]No questions in file.[/]")
+        raise typer.Exit(1)
+    concurrency = concurrency or ASYNC_CONCURRENCY
 
-    try:
-        rewriter = create_question_rewriter()
-        web_tool = get_web_search_tool()
-        rag_chain = create_rag_chain()
+    setup_environment()
+    results = {}
+    if not skip_sync:
+        with console.status(f"[bold cyan]Answering {len(questions)} questions sequentially..."):
+            results["sync"] = run_sync(get_graph(), questions)
+    with console.status(f"[bold cyan]Answering {len(questions)} questions ({concurrency} concurrent)..."):
+        results[f"async ×{concurrency}"] = run_async(get_graph(use_async=True), questions, concurrency)
+
+    table = Table(title=f"{len(questions)} questions")
+    table.add_column("Mode", style="cyan")
+    table.add_column("Wall time", justify="right")
+    table.add_column("Questions/s", justify="right")
+    table.add_column("p50", justify="right")
+    table.add_column("p95", justify="right")
+    table.add_column("Errors", justify="right")
+    for mode, report in results.items():
+        table.add_row(
+            mode,
+            f"{report['seconds']:.2f}s",
+            f"{report['qps']:.2f}",
+            f"{report['p50']:.2f}s",
+            f"{report['p95']:.2f}s",
+            str(report["errors"]),
+        )
+    console.print(table)
 
-        better_question = rewriter.invoke({"question": question})
-        docs = web_tool.invoke({"query": better_question})
-        web_content = "\n".join(d["content"] for d in docs)
-        web_doc = Document(page_content=web_content)
 
-        generation = rag_chain.invoke({
-            "context": [web_doc],
-            "question": question,
-        })
+@rag_cli.command("calibrate-pregrade")
+def calibrate_pregrade(
+    path: str = typer.Argument(
+        ..., help="Labelled set (.jsonl) or a text file with one question per line"
+    ),
+    k: int = typer.Option(9, "--k", help="Chunks to label per question"),
+    accept_sim: float = typer.Option(None, "--accept-sim", help="Accept at/above this similarity"),
+    accept_overlap: float = typer.Option(None, "--accept-overlap", help="…with at least this keyword overlap"),
+    reject_sim: float = typer.Option(None, "--reject-sim", help="Reject at/below this similarity"),
+    reject_overlap: float = typer.Option(None, "--reject-overlap", help="…with at most this keyword overlap"),
+):
+    """🎚️  Check the local pre-grader against LLM grading on a labelled set"""
+    from dataclasses import replace
+    from pathlib import Path
+    from src.pregrade import PregradeThresholds, calibrate, load_labelled, save_labelled
 
-        console.print(Panel(
-            Markdown(generation),
-            title="[bold green]✅ Web-Supplemented Answer[/]",
-            border_style="green",
-            padding=(1, 2),
-        ))
-    except Exception as e:
-        console.print(f"[red]❌ Web search failed: {e}[/]")
+    source = Path(path)
+    if not source.exists():
+        console.print(f"[red]❌ Not found: {source}[/]")
+        raise typer.Exit(1)
+
+    if source.suffix == ".jsonl":
+        items = load_labelled(source)
+    else:
+        # Label every retrieved chunk with the LLM grader, keep the set for re-runs
+        from src.core import create_retrieval_grader, create_vectorstore, setup_environment
+        from src.grading import grade_page
+        from src.retrieval import rank_candidates
+
+        setup_environment()
+        retriever = create_vectorstore()
+        grader = create_retrieval_grader("per_document")
+        questions = [q.strip() for q in source.read_text(encoding="utf-8").splitlines() if q.strip()]
+        items = []
+        with console.status(f"[bold cyan]Labelling chunks for {len(questions)} question(s)..."):
+            for question in questions:
+                docs = rank_candidates(retriever, question, k)
+                labels = grade_page(grader, question, docs, pregrade=False)
+                items.extend((question, doc, label) for doc, label in zip(docs, labels))
+        labelled = source.with_suffix(".labelled.jsonl")
+        save_labelled(labelled, items)
+        console.print(f"  [dim]Saved labelled set to {labelled}[/]")
+
+    overrides = {
+        name: value for name, value in {
+            "accept_similarity": accept_sim,
+            "accept_overlap": accept_overlap,
+            "reject_similarity": reject_sim,
+            "reject_overlap": reject_overlap,
+        }.items() if value is not None
+    }
+    thresholds = replace(PregradeThresholds(), **overrides)
+    report = calibrate(items, thresholds)
+
+    table = Table(title=f"Pre-grader vs LLM grader ({report['total']} chunks)")
+    table.add_column("Metric", style="cyan")
+    table.add_column("Value", justify="right")
+    table.add_row("Accepted locally", str(report["accepted"]))
+    table.add_row("Rejected locally", str(report["rejected"]))
+    table.add_row("Sent to LLM", str(report["uncertain"]))
+    table.add_row("False accepts", str(report["false_accepts"]))
+    table.add_row("False rejects", str(report["false_rejects"]))
+    table.add_row("LLM calls saved", f"{report['coverage']:.0%}")
+    table.add_row("Agreement on local decisions", f"{report['agreement']:.0%}")
+    console.print(table)
+    console.print(
+        f"  [dim]accept: sim ≥ {thresholds.accept_similarity}, overlap ≥ {thresholds.accept_overlap} · "
+        f"reject: sim ≤ {thresholds.reject_similarity}, overlap ≤ {thresholds.reject_overlap}[/]"
+    )
 
 
 @rag_cli.command("rebuild")
-def rebuild_index():
+def rebuild_index(
+    shard: bool = typer.Option(
+        None,
+        "--shard/--no-shard",
+        help="Shard the index per book (default: config.INDEX_SHARDING)",
+    ),
+):
     """🔄 Rebuild the vector index from scratch"""
     from src.core import setup_environment, create_vectorstore
     
     setup_environment()
     
+    sharding = None if shard is None else ("source" if shard else "none")
+
     if typer.confirm("⚠️  This will delete and rebuild the entire index. Continue?"):
         with console.status("[bold yellow]Rebuilding index..."):
-            create_vectorstore(force_rebuild=True)
+            create_vectorstore(force_rebuild=True, sharding=sharding)
         console.print("[green]✅ Index rebuilt successfully![/]")
     else:
         console.print("[yellow]Cancelled[/]")
 
 
 @rag_cli.command("status")
-def index_status():
+def index_status(
+    deep: bool = typer.Option(False, "--deep", help="Verify the manifest against the live index"),
+):
     """📊 Show vector index statistics"""
     from pathlib import Path
-    from src.core import setup_environment
-    
-    setup_environment()
+    from src.manifest import read_manifest, verify_manifest
     
     project_root = Path(__file__).parent.parent
     persist_dir = project_root / "chroma_db"
@@ -216,24 +491,65 @@ def index_status():
         console.print("[yellow]⚠️  No index found. Run 'ai rag ask <question>' to create one.[/]")
         return
     
-    from langchain_community.vectorstores import Chroma
-    from langchain_openai import OpenAIEmbeddings
-    
-    with console.status("[bold cyan]Loading index..."):
-        vectorstore = Chroma(
-            collection_name="rag-chroma",
-            embedding_function=OpenAIEmbeddings(),
-            persist_directory=str(persist_dir)
+    manifest = read_manifest(persist_dir)
+    if manifest is None:
+        console.print(
+            "[yellow]⚠️  Index has no manifest (built by an older version). "
+            "Run 'ai rag rebuild' to create one; counting the live index instead…[/]"
         )
-        
-        count = vectorstore._collection.count()
-        size_mb = sum(f.stat().st_size for f in persist_dir.rglob("*") if f.is_file()) / (1024 * 1024)
-    
+        manifest = {}
+        deep = True
+
+    verified = None
+    if deep:
+        with console.status("[bold cyan]Verifying index..."):
+            try:
+                verified = verify_manifest(persist_dir, manifest)
+            except Exception as e:
+                console.print(f"[red]❌ Could not read the live index: {e}[/]")
+                raise typer.Exit(1)
+
+    count = manifest.get("total_chunks", verified["total_chunks"] if verified else 0)
+    size_mb = manifest.get("bytes", verified["bytes"] if verified else 0) / (1024 * 1024)
+    shards = manifest.get("shards") or (verified["shards"] if verified else {})
+    layout = f"{len(shards)} shards" if shards else "single collection"
+
+    lines = [
+        f"[bold]Index Location:[/] {persist_dir}",
+        f"[bold]Layout:[/] {layout}",
+        f"[bold]Total Chunks:[/] {count:,}",
+        f"[bold]Disk Size:[/] {size_mb:.2f} MB",
+    ]
+    if manifest:
+        lines += [
+            f"[bold]Embedding Model:[/] {manifest.get('embedding_model', 'unknown')}",
+            f"[bold]Built:[/] {manifest.get('built_at', 'unknown')} "
+            f"[dim](index v{manifest.get('index_version', '?')})[/]",
+        ]
+        by_type = manifest.get("chunks_by_content_type", {})
+        if by_type:
+            lines.append("[bold]By Type:[/] " + ", ".join(f"{t} {n:,}" for t, n in by_type.items()))
+        by_source = manifest.get("chunks_by_source", {})
+        if by_source:
+            lines.append(f"[bold]Sources:[/] {len(by_source)}")
+            for source, n in sorted(by_source.items(), key=lambda kv: -kv[1])[:10]:
+                lines.append(f"  [dim]{n:>7,}[/]  {source}")
+            if len(by_source) > 10:
+                lines.append(f"  [dim]… and {len(by_source) - 10} more[/]")
+
+    if verified is None:
+        lines.append("[bold]Status:[/] [green]Ready ✅[/] [dim](from manifest; --deep to verify)[/]")
+    elif manifest and verified["problems"]:
+        lines.append("[bold]Status:[/] [red]Manifest out of sync ❌[/]")
+        lines += [f"  [red]• {p}[/]" for p in verified["problems"][:10]]
+    elif verified["problems"]:
+        lines.append("[bold]Status:[/] [yellow]Ready, unverified ⚠️[/]")
+        lines += [f"  [yellow]• {p}[/]" for p in verified["problems"] if "unreadable" in p]
+    else:
+        lines.append("[bold]Status:[/] [green]Ready ✅ (verified)[/]")
+
     console.print(Panel(
-        f"[bold]Index Location:[/] {persist_dir}\n"
-        f"[bold]Total Chunks:[/] {count:,}\n"
-        f"[bold]Disk Size:[/] {size_mb:.2f} MB\n"
-        f"[bold]Status:[/] [green]Ready ✅[/]",
+        "\n".join(lines),
         title="[bold cyan]📊 Vector Index Status[/]",
         border_style="cyan"
     ))
@@ -246,6 +562,7 @@ def index_status():
 def ask(
     query: str = typer.Argument(..., help="Ask anything — the AI figures out the rest"),
     verbose: bool = typer.Option(False, "--verbose", "-v", help="Show detailed agent steps"),
+    local: bool = typer.Option(False, "--local", help="Run in-process even if `ai serve` is up"),
 ):
     """
     🤖 Ask anything. The coordinator automatically picks the right agents.
@@ -256,116 +573,217 @@ def ask(
       ai ask "Set a reminder in 30 minutes to stretch"\n
       ai "What time is it in Tokyo?"\n
     """
-    _run_ask(query, verbose)
+    _run_ask(query, verbose, local=local)
+
+
+def _run_ask(query: str, verbose: bool = False, local: bool = False) -> None:
+    """Core ask logic — shared by the ``ask`` subcommand and the bare ``ai "query"`` callback.
+
+    Talks to the ``ai serve`` daemon when one is running; otherwise builds the
+    graph in this process.
+    """
+    console.print(Panel(f"[bold cyan]🤖 Query:[/] {query}", border_style="cyan"))
+
+    events = None if local else _daemon_events({"cmd": "ask", "query": query})
 
+    if events is None:
+        from src.core import setup_environment
+        from src.agents.graph import get_multi_agent_graph
+        from src.events import ask_events
+
+        setup_environment()
+
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            console=console,
+            transient=True,
+        ) as progress:
+            task = progress.add_task("Coordinator is planning...", total=None)
+            graph = get_multi_agent_graph()
+            progress.remove_task(task)
+        events = ask_events(graph, query)
+
+    _render_events(events, verbose=verbose)
+
+
+@app_cli.command("resume")
+def resume(
+    thread_id: str = typer.Argument("", help="Paused run to continue (omit to list them)"),
+    verbose: bool = typer.Option(False, "--verbose", "-v", help="Show agent details"),
+):
+    """⏯️  Continue a multi-agent run paused at a confirmation (survives restarts)"""
+    import time
+
+    from src.agents.checkpoint import get_checkpointer
+
+    if not thread_id:
+        paused = get_checkpointer().paused_threads()
+        if not paused:
+            console.print("[dim]No paused runs.[/]")
+            return
+        table = Table(title="Paused runs")
+        table.add_column("Run", style="cyan")
+        table.add_column("Paused at")
+        for run, updated_at in paused:
+            table.add_row(run, time.strftime("%Y-%m-%d %H:%M", time.localtime(updated_at)))
+        console.print(table)
+        return
 
-def _run_ask(query: str, verbose: bool = False) -> None:
-    """Core ask logic — shared by the ``ask`` subcommand and the bare ``ai "query"`` callback."""
     from src.core import setup_environment
-    from src.agents.graph import create_multi_agent_graph
+    from src.agents.graph import get_multi_agent_graph
+    from src.events import ask_events
 
     setup_environment()
+    _render_events(ask_events(get_multi_agent_graph(), "", thread_id=thread_id), verbose=verbose)
 
-    console.print(Panel(f"[bold cyan]🤖 Query:[/] {query}", border_style="cyan"))
 
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        console=console,
-        transient=True,
-    ) as progress:
-        task = progress.add_task("Coordinator is planning...", total=None)
-        graph = create_multi_agent_graph()
-        progress.remove_task(task)
-
-    # Each run needs a unique thread_id so the MemorySaver checkpointer
-    # can store and resume state if a human_check interrupt fires.
-    import uuid
-    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
-
-    # Initial state
-    initial_state = {
-        "query": query,
-        "language": "",
-        "translated_query": "",
-        "plan": [],
-        "plan_reasoning": "",
-        "current_step": 0,
-        "agent_results": [],
-        "response": "",
-        "agents_used": [],
-        "needs_human_confirm": False,
-        "human_confirm_message": "",
-        "should_stop": False,
-    }
+@app_cli.command("bench-startup")
+def bench_startup(
+    queries: int = typer.Option(20, "--queries", "-n", help="Simulated queries per variant"),
+):
+    """⏱️  Per-query graph startup cost: rebuilt every query vs. compiled once"""
+    from src.agents.graph import create_multi_agent_graph, get_multi_agent_graph
+    from src.core import reset_chains, setup_environment
+    from src.graph import create_graph, get_graph
+    from src.throughput import startup_cost
 
-    def _stream_until_interrupt(input_or_command):
-        """Stream steps and return (last_state, interrupt_value) — interrupt_value
-        is non-None when the graph has paused for human confirmation."""
-        from langgraph.types import Command
-
-        accumulated = {}
-        for step in graph.stream(input_or_command, config=config):  # type: ignore[arg-type]
-            # LangGraph surfaces interrupts as a special __interrupt__ key
-            if "__interrupt__" in step:
-                interrupt_data = step["__interrupt__"][0]
-                return accumulated, interrupt_data.value
-            for node_name, state in step.items():
-                # Show coordinator plan
-                if node_name == "coordinator" and state.get("plan"):
-                    plan_str = " → ".join(state["plan"])
-                    console.print(f"\n  [bold]🎯 Plan:[/] {plan_str}")
-                    if verbose and state.get("plan_reasoning"):
-                        console.print(f"  [dim]   Reasoning: {state['plan_reasoning']}[/]")
-                    console.print()
+    setup_environment()
 
-                # Show which agent is working
-                elif node_name == "dispatcher":
-                    used = state.get("agents_used", [])
-                    if used:
-                        latest = used[-1]
-                        console.print(f"  {latest} working...")
-                        if verbose:
-                            results = state.get("agent_results", [])
-                            if results:
-                                last_result = results[-1]
-                                conf = last_result.get("confidence", "")
-                                if conf:
-                                    console.print(f"    [dim]confidence: {conf}[/]")
-                                sources = last_result.get("sources", [])
-                                for s in sources[:3]:
-                                    console.print(f"    [dim]source: {s}[/]")
-
-                accumulated = {**accumulated, **state}
-        return accumulated, None
-
-    # ── Run, handling any human-confirmation interrupts ─────────
-    from langgraph.types import Command
-
-    last_state, interrupt_val = _stream_until_interrupt(initial_state)
-
-    while interrupt_val is not None:
-        msg = interrupt_val.get("message", "Continue?") if isinstance(interrupt_val, dict) else str(interrupt_val)
-        console.print(f"\n[bold yellow]❓ {msg}[/]")
-        confirmed = typer.confirm("  Proceed?", default=True)
-        answer = "yes" if confirmed else "no"
-        last_state, interrupt_val = _stream_until_interrupt(Command(resume=answer))
-
-    # ── Display final answer ────────────────────────────────────
-    if last_state and last_state.get("response"):
-        console.print(Panel(
-            Markdown(last_state["response"]),
-            title="[bold green]✅ Answer[/]",
-            border_style="green",
-            padding=(1, 2),
-        ))
+    def rebuilt(factory):
+        def build():
+            reset_chains()
+            return factory()
+        return build
+
+    variants = [
+        ("ai ask", "rebuilt per query", rebuilt(create_multi_agent_graph)),
+        ("ai ask", "compiled once", get_multi_agent_graph),
+        ("ai rag ask", "rebuilt per query", rebuilt(create_graph)),
+        ("ai rag ask", "compiled once", get_graph),
+    ]
+    table = Table(title=f"Graph startup over {queries} queries")
+    table.add_column("Command", style="cyan")
+    table.add_column("Graph", style="cyan")
+    table.add_column("First query", justify="right")
+    table.add_column("Per query after", justify="right")
+    table.add_column("Total", justify="right")
+    for command, label, build in variants:
+        try:
+            with console.status(f"[bold cyan]{command}: {label}..."):
+                report = startup_cost(build, queries)
+        except Exception as e:
+            table.add_row(command, label, f"[red]{e}[/]", "", "")
+            continue
+        table.add_row(
+            command,
+            label,
+            f"{report['first'] * 1000:.1f} ms",
+            f"{report['per_query'] * 1000:.2f} ms",
+            f"{report['total'] * 1000:.0f} ms",
+        )
+    console.print(table)
 
-        if verbose:
-            used = last_state.get("agents_used", [])
-            if used:
-                console.print(f"\n  [dim]Agents used: {' → '.join(used)}[/]")
-    else:
-        console.print("[red]❌ No answer generated.[/]")
+
+@app_cli.command("bench-router")
+def bench_router(
+    queries: int = typer.Option(100_000, "--queries", "-n", help="Synthetic queries to route"),
+):
+    """⏱️  Intent routing throughput: one compiled scan vs. one regex per intent"""
+    from src.router import route, route_sequential, sample_queries
+    from src.throughput import call_throughput
+
+    corpus = sample_queries(queries)
+    variants = [
+        ("one regex per intent", route_sequential),
+        ("compiled router", lambda q: route(q, with_params=False)),
+        ("compiled router + params", route),
+    ]
+    table = Table(title=f"Routing {len(corpus):,} queries")
+    table.add_column("Router", style="cyan")
+    table.add_column("Total", justify="right")
+    table.add_column("Queries/s", justify="right")
+    table.add_column("µs/query", justify="right")
+    for label, fn in variants:
+        with console.status(f"[bold cyan]{label}..."):
+            report = call_throughput(fn, corpus)
+        table.add_row(
+            label,
+            f"{report['seconds']:.2f}s",
+            f"{report['per_second']:,.0f}",
+            f"{report['us_per_call']:.1f}",
+        )
+    console.print(table)
+
+
+# Non-English queries no routing rule catches, per language
+_COORDINATOR_BENCH_QUERIES = {
+    "Mongolian": ["Стоицизм гэж юу вэ?", "Монголын түүхийн талаар товч ярина уу", "Яагаад тэнгэр цэнхэр байдаг вэ?"],
+    "Japanese": ["ストア派とは何ですか？", "睡眠を改善する方法を教えて", "なぜ空は青いのですか？"],
+    "Russian": ["Что такое стоицизм?", "Как улучшить сон?", "Почему небо голубое?"],
+    "Chinese": ["什么是斯多葛主义？", "如何改善睡眠？", "为什么天空是蓝色的？"],
+}
+
+
+@app_cli.command("bench-coordinator")
+def bench_coordinator(
+    repeat: int = typer.Option(1, "--repeat", "-r", help="Passes over the query set"),
+):
+    """⏱️  Non-English planning: planner + translator calls vs. one fused call"""
+    from src.agents.coordinator import _fused_plan, _llm_plan
+    from src.agents.translation_memory import translate
+    from src.agents.translator import _translate_batch
+    from src.core import setup_environment
+    from src.throughput import call_latency
+
+    setup_environment()
+
+    def separate(query: str) -> None:
+        # Caches bypassed: what a first-seen query costs
+        _llm_plan(query, "other")
+        translate(query, "English", _translate_batch)
+
+    variants = [("planner + translator", separate, 2), ("fused", _fused_plan, 1)]
+    table = Table(title="Coordinator latency per language (non-English queries)")
+    table.add_column("Language", style="cyan")
+    table.add_column("Mode")
+    table.add_column("LLM calls", justify="right")
+    table.add_column("Mean", justify="right")
+    table.add_column("p50", justify="right")
+    table.add_column("p95", justify="right")
+    table.add_column("Errors", justify="right")
+    for language, queries in _COORDINATOR_BENCH_QUERIES.items():
+        for label, fn, calls in variants:
+            with console.status(f"[bold cyan]{language}: {label}..."):
+                report = call_latency(fn, queries * max(1, repeat))
+            table.add_row(
+                language, label, str(calls),
+                f"{report['mean']:.2f}s", f"{report['p50']:.2f}s", f"{report['p95']:.2f}s",
+                str(report["errors"]),
+            )
+    console.print(table)
+
+
+# ================================================================
+# serve  –  Warm daemon; `ai ask` / `ai rag ask` become thin clients
+# ================================================================
+@app_cli.command("serve")
+def serve(
+    socket: str = typer.Option("", "--socket", help="Unix socket path (default: auto)"),
+):
+    """🔥 Keep models, index and graphs warm for instant `ai` queries"""
+    from pathlib import Path
+    from src.daemon import serve as run_daemon, socket_path
+
+    path = Path(socket) if socket else socket_path()
+    console.print(f"[bold cyan]🔥 Warming up…[/] [dim]({path})[/]")
+    try:
+        run_daemon(path)
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Daemon stopped[/]")
+    except RuntimeError as e:
+        console.print(f"[red]❌ {e}[/]")
+        raise typer.Exit(1)
 
 
 # ================================================================
@@ -436,6 +854,63 @@ def search(
         ))
 
 
+# ================================================================
+# cache  –  On-disk caches (web search results, grades, plans, …)
+# ================================================================
+cache_cli = typer.Typer(help="Inspect and clear the on-disk caches")
+app_cli.add_typer(cache_cli, name="cache")
+
+
+@cache_cli.command("stats")
+def cache_stats():
+    """📦 Entries and size of every cache; web search hit rate"""
+    from src.cache import DiskCache, cache_dir, list_caches
+    from src.search_cache import get_search_cache
+
+    table = Table(title=f"Caches in {cache_dir()}")
+    table.add_column("Cache", style="cyan")
+    table.add_column("Entries", justify="right")
+    table.add_column("Size", justify="right")
+    for name in list_caches():
+        path = cache_dir() / f"{name}.sqlite3"
+        store = DiskCache(name, 1, path=path)
+        table.add_row(name, f"{len(store):,}", f"{path.stat().st_size / 1024:,.0f} KB")
+        store.close()
+    console.print(table)
+
+    search = get_search_cache()
+    if search is not None:
+        stats = search.stats()
+        lookups = stats["hits"] + stats["misses"]
+        rate = f"{stats['hits'] / lookups:.0%}" if lookups else "n/a"
+        console.print(
+            f"\n[bold]Web search:[/] {stats['entries']:,} cached result set(s), "
+            f"{stats['hits']:,} hit(s) / {lookups:,} lookup(s) ({rate})"
+        )
+
+
+@cache_cli.command("clear")
+def cache_clear(
+    name: str = typer.Argument("search", help="Cache to clear (see `ai cache stats`)"),
+    all_caches: bool = typer.Option(False, "--all", help="Clear every cache"),
+):
+    """🧹 Clear the web search cache (or another / every cache)"""
+    from src.cache import DiskCache, cache_dir, list_caches
+    from src.search_cache import SearchCache
+
+    known = list_caches()
+    names = known if all_caches else [name]
+    for cache in names:
+        if cache not in known:
+            console.print(f"[yellow]No cache named {cache!r}.[/] Known: {', '.join(known) or 'none'}")
+            raise typer.Exit(1)
+        store = DiskCache(cache, 1, path=cache_dir() / f"{cache}.sqlite3")
+        # The search cache also resets its hit / miss counters
+        removed = SearchCache(store).clear() if cache == "search" else store.clear()
+        store.close()
+        console.print(f"🧹 {cache}: removed {removed:,} entr{'y' if removed == 1 else 'ies'}")
+
+
 # ================================================================
 # joke  –  Random joke (no API key needed)
 # ================================================================
@@ -570,6 +1045,7 @@ def info():
         f"  [cyan]ai joke[/]                    😂 Random joke\n"
         f"  [cyan]ai rag status[/]              📊 Index statistics\n"
         f"  [cyan]ai rag rebuild[/]             🔄 Rebuild index\n"
+        f"  [cyan]ai serve[/]                   🔥 Warm daemon (instant queries)\n"
         f"  [cyan]ai info[/]                    ℹ️  This screen\n"
         f"  [cyan]ai --version[/]               📦 Version\n",
         title="[bold blue]ℹ️  System Info[/]",
@@ -1,9 +1,13 @@
 """Central configuration constants for the AI assistant."""
 from __future__ import annotations
 
+import asyncio
+import threading
+import weakref
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
+    import httpx
     from openai import OpenAI
 
 # LLM model used by all multi-agent nodes and standalone helpers.
@@ -13,6 +17,13 @@ MODEL_NAME = "gpt-4o-mini"
 # Lazy singleton — created on first call, *after* setup_environment() has
 # loaded the .env file and set OPENAI_API_KEY.  Never instantiated at import time.
 _openai_client: "OpenAI | None" = None
+_async_http_client: "httpx.AsyncClient | None" = None
+# Pooled connections belong to the event loop that opened them, so each
+# running loop gets its own pool (dropped with the loop).
+_loop_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+_loop_http_clients_lock = threading.Lock()
 
 
 def get_openai_client() -> "OpenAI":
@@ -22,3 +33,229 @@ def get_openai_client() -> "OpenAI":
         from openai import OpenAI
         _openai_client = OpenAI()
     return _openai_client
+
+
+def loop_http_client() -> "httpx.AsyncClient":
+    """The running event loop's pooled async HTTP client, created on first use."""
+    loop = asyncio.get_running_loop()
+    with _loop_http_clients_lock:
+        client = _loop_http_clients.get(loop)
+        if client is None:
+            import httpx
+            from openai import DefaultAsyncHttpxClient
+            client = DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=ASYNC_MAX_CONNECTIONS,
+                    max_keepalive_connections=ASYNC_MAX_CONNECTIONS,
+                ),
+            )
+            _loop_http_clients[loop] = client
+    return client
+
+
+def get_async_http_client() -> "httpx.AsyncClient":
+    """Return the shared async HTTP client behind every ChatOpenAI model.
+
+    Concurrent async graph runs on one event loop reuse its connection pool
+    (at most ASYNC_MAX_CONNECTIONS sockets) instead of each model opening its own.
+    The models are built once per process but ``asyncio.run`` may be called
+    many times, so this client only forwards each request to
+    :func:`loop_http_client` — a pool opened on one loop is never reused on
+    the next.
+    """
+    global _async_http_client
+    if _async_http_client is None:
+        from openai import DefaultAsyncHttpxClient
+
+        class _PerLoopAsyncClient(DefaultAsyncHttpxClient):
+            async def send(self, request, **kwargs):
+                return await loop_http_client().send(request, **kwargs)
+
+            async def aclose(self) -> None:
+                with _loop_http_clients_lock:
+                    client = _loop_http_clients.pop(asyncio.get_running_loop(), None)
+                if client is not None:
+                    await client.aclose()
+
+        _async_http_client = _PerLoopAsyncClient()
+    return _async_http_client
+
+
+# ── Vector index sharding ──────────────────────────────────────────
+# "none"   → one ``rag-chroma`` collection holds every book (default).
+# "source" → every book gets its own shard under chroma_db/shards/; books
+#            smaller than SMALL_BOOK_CHUNKS are pooled into hash buckets so
+#            thousands of tiny files don't become thousands of shards.
+INDEX_SHARDING = "none"
+SMALL_BOOK_CHUNKS = 50
+SHARD_BUCKETS = 16
+
+# Upper bound on shard handles kept open at once (LRU-evicted beyond this)
+# and on threads used to fan a query out across shards.
+MAX_OPEN_SHARDS = 64
+SHARD_SEARCH_WORKERS = 8
+
+
+# ── Retrieval mode ─────────────────────────────────────────────────
+# "similarity" → plain top-4 nearest chunks (default).
+# "mmr"        → over-fetch MMR_FETCH_K candidates, keep MMR_K diverse ones.
+# MMR_LAMBDA trades relevance (1.0) against diversity (0.0).
+RETRIEVAL_MODE = "similarity"
+MMR_FETCH_K = 20
+MMR_K = 3
+MMR_LAMBDA = 0.5
+
+
+# ── Adaptive-k retrieval ───────────────────────────────────────────
+# Grade ADAPTIVE_K_START chunks first; while fewer than ADAPTIVE_MIN_RELEVANT
+# are relevant, grade ADAPTIVE_K_STEP more, up to ADAPTIVE_K_BUDGET in total.
+# Set ADAPTIVE_RETRIEVAL = False to grade the retriever's fixed top-k instead.
+ADAPTIVE_RETRIEVAL = True
+ADAPTIVE_K_START = 3
+ADAPTIVE_K_STEP = 3
+ADAPTIVE_K_BUDGET = 9
+ADAPTIVE_MIN_RELEVANT = 2
+
+
+# ── Relevance grading ──────────────────────────────────────────────
+# Documents in a page are graded concurrently on up to GRADE_CONCURRENCY
+# threads; a failed grader call is retried GRADE_RETRIES times (exponential
+# backoff from GRADE_RETRY_BACKOFF seconds) without touching the others.
+GRADE_CONCURRENCY = 8
+GRADE_RETRIES = 2
+GRADE_RETRY_BACKOFF = 0.5
+
+# "per_document" → one grader call per chunk.
+# "batch"        → one call grades the whole page (question sent once);
+#                  documents missing from the reply fall back to per-document.
+# "logprob"      → one call per chunk with a single output token; P(yes) from
+#                  its logprobs is the relevance score, relevant at/above
+#                  LOGPROB_GRADE_THRESHOLD.
+GRADER_MODE = "per_document"
+LOGPROB_GRADE_THRESHOLD = 0.5
+
+
+# Verdicts are memoised on disk (~/.cache/ai-assistant/grades.sqlite3) keyed
+# by normalised question, chunk content and grader version; least recently
+# used entries are evicted beyond GRADE_CACHE_SIZE.
+GRADE_CACHE_ENABLED = True
+GRADE_CACHE_SIZE = 20_000
+
+# Early exit: stop grading (cancelling calls not yet started) once the
+# web-search decision can no longer change and at least
+# EARLY_EXIT_MIN_RELEVANT relevant chunks are in hand.  Ungraded chunks are
+# left out of the generation context.
+GRADE_EARLY_EXIT = False
+EARLY_EXIT_MIN_RELEVANT = 3
+
+
+# ── Generation context ─────────────────────────────────────────────
+# generate() packs relevant chunks into at most CONTEXT_TOKEN_BUDGET tokens,
+# most relevant first; a chunk sharing CONTEXT_DEDUP_OVERLAP or more of its
+# word 5-grams with chunks already packed is dropped as a duplicate.
+CONTEXT_TOKEN_BUDGET = 3000
+CONTEXT_DEDUP_OVERLAP = 0.8
+
+
+# ── Speculative web search ─────────────────────────────────────────
+# Start the question rewrite + Tavily search while documents are still being
+# graded; the result is used only if the graph takes the web branch.  Each
+# discarded speculation still costs a rewrite call and a search, so starts
+# are capped per rolling hour.
+SPECULATIVE_WEB_SEARCH = False
+SPECULATIVE_MAX_PER_HOUR = 30
+
+
+# ── Local pre-grading ──────────────────────────────────────────────
+# Clear-cut chunks are decided locally from retrieval similarity and query
+# keyword overlap; only the uncertain middle band reaches the LLM grader.
+# Similarity is cosine (1.0 = identical), derived from Chroma's squared L2
+# distance (unit-norm embeddings: d = 2 - 2·cos); overlap is the fraction of
+# query keywords found in the chunk.  Calibrate with `ai rag calibrate-pregrade`.
+PREGRADE_ENABLED = False
+PREGRADE_ACCEPT_SIMILARITY = 0.88   # accept at/above this similarity…
+PREGRADE_ACCEPT_OVERLAP = 0.5       # …if at least this share of keywords appear
+PREGRADE_REJECT_SIMILARITY = 0.72   # reject at/below this similarity…
+PREGRADE_REJECT_OVERLAP = 0.0       # …if at most this share of keywords appear
+
+
+# ── Async RAG path ─────────────────────────────────────────────────
+# ``create_graph(use_async=True)`` runs the network-bound nodes on their
+# async APIs so many questions can be answered concurrently on one event
+# loop.  All models share one pooled HTTP client of this size; questions
+# beyond ASYNC_CONCURRENCY wait for a free slot (`ai rag bench-async`).
+ASYNC_MAX_CONNECTIONS = 32
+ASYNC_CONCURRENCY = 8
+
+
+# ── Multi-agent dispatch ───────────────────────────────────────────
+# The coordinator's plan is run as a dependency graph: agents that don't
+# need each other's output (librarian, researcher) run concurrently, in
+# waves of at most DISPATCH_MAX_WORKERS; merging agents (critic, summarizer,
+# output translator) wait for everything planned before them.
+# RESEARCHER_USES_LIBRARIAN makes the researcher wait for the librarian and
+# target its web search at the book findings (one extra LLM call, serial).
+DISPATCH_PARALLEL = True
+DISPATCH_MAX_WORKERS = 4
+RESEARCHER_USES_LIBRARIAN = False
+
+# The researcher asks for RESEARCH_QUERY_VARIANTS extra search queries in one
+# LLM call and runs all searches concurrently; merged results are deduplicated
+# (canonical URL, content hash), ranked and cut to RESEARCH_MAX_RESULTS.
+# 0 = a single search, as before.
+RESEARCH_QUERY_VARIANTS = 3
+RESEARCH_MAX_RESULTS = 8
+
+# Plans the LLM makes (no routing rule matched) are memoised on disk
+# (~/.cache/ai-assistant/plans.sqlite3) by query shape + language, expire
+# after PLAN_CACHE_TTL seconds and are LRU-evicted beyond PLAN_CACHE_SIZE.
+PLAN_CACHE_ENABLED = True
+PLAN_CACHE_SIZE = 2_000
+PLAN_CACHE_TTL = 7 * 24 * 3600
+
+# Agent results longer than CONTENT_OFFLOAD_CHARS are kept out of the graph
+# state (and so out of every checkpoint) in a content-addressed store
+# (~/.cache/ai-assistant/content.sqlite3); the state holds references.
+# 0 keeps all content inline.
+CONTENT_OFFLOAD_CHARS = 2_000
+CONTENT_STORE_SIZE = 10_000
+CONTENT_STORE_TTL = 7 * 24 * 3600
+
+# Multi-agent checkpoints (so a human_check pause can be resumed, even after
+# a restart) live in ~/.cache/ai-assistant/checkpoints.sqlite3.  Writes are
+# batched (CHECKPOINT_BATCH_SIZE puts per transaction; a paused run is
+# written at once), only the newest CHECKPOINT_KEEP checkpoints of a thread
+# are kept, and threads are evicted after CHECKPOINT_MAX_AGE seconds or
+# beyond CHECKPOINT_MAX_THREADS.
+CHECKPOINT_BATCH_SIZE = 64
+CHECKPOINT_KEEP = 1
+CHECKPOINT_MAX_THREADS = 500
+CHECKPOINT_MAX_AGE = 7 * 24 * 3600
+
+# Non-English queries the LLM has to plan get one fused completion returning
+# the plan, the query's language and its English translation, instead of a
+# planner call plus an input-translator step (one LLM round trip fewer).
+COORDINATOR_FUSED_TRANSLATION = True
+
+
+# ── Translation memory ─────────────────────────────────────────────
+# Segment translations (translator agent and `ai translate`) are memoised on
+# disk (~/.cache/ai-assistant/translations.sqlite3) by normalised segment,
+# source and target language; only unseen segments reach the LLM.  Least
+# recently used entries are evicted beyond TRANSLATION_MEMORY_SIZE;
+# TRANSLATION_MEMORY_TTL (seconds, None = keep) expires old ones.
+TRANSLATION_MEMORY_ENABLED = True
+TRANSLATION_MEMORY_SIZE = 50_000
+TRANSLATION_MEMORY_TTL = None
+
+
+# ── Web search cache ───────────────────────────────────────────────
+# Web search results (researcher, RAG web fallback, `ai search`) are cached
+# on disk (~/.cache/ai-assistant/search.sqlite3) by normalised query and
+# result count.  Time-sensitive queries ("latest", "news", "today", a year…)
+# stay fresh for SEARCH_CACHE_TTL["fresh"] seconds, others for
+# SEARCH_CACHE_TTL["evergreen"]; at most SEARCH_CACHE_SIZE result sets are
+# kept (least recently used evicted).  `ai cache stats` / `ai cache clear`.
+SEARCH_CACHE_ENABLED = True
+SEARCH_CACHE_SIZE = 5_000
+SEARCH_CACHE_TTL = {"fresh": 15 * 60, "evergreen": 7 * 24 * 3600}
@@ -0,0 +1,155 @@
+"""Context packing for generation — compact, de-duplicated, token-budgeted.
+
+``generate()`` used to drop the raw ``Document`` list into the prompt, so the
+model saw Python reprs, metadata noise and the same passage several times.
+:func:`pack_context` instead:
+
+1. orders chunks by relevance (grader score, else retrieval similarity,
+   else retrieval order) — web search results come first, since search only
+   runs when the local chunks were not enough,
+2. drops chunks whose text is mostly already in the context (word 5-gram
+   shingle overlap at or above CONTEXT_DEDUP_OVERLAP),
+3. renders each as ``[n] source p.X`` followed by its text, and
+4. fills CONTEXT_TOKEN_BUDGET using the token counts stored at ingest time
+   (``metadata["tokens"]``), counting with tiktoken only for chunks indexed
+   before counts were stored.  A chunk that doesn't fit is cut down to the
+   tokens left rather than dropped (unless fewer than _MIN_TRUNCATED remain),
+   and the top-ranked chunk is always kept — one long web result or book
+   chunk never leaves generation with an empty context.
+
+It returns the packed string plus a report of what was kept and cut.
+"""
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+
+from langchain_core.documents import Document
+
+from src.config import CONTEXT_DEDUP_OVERLAP, CONTEXT_TOKEN_BUDGET
+
+TOKENS_KEY = "tokens"
+_SHINGLE = 5
+_MIN_TRUNCATED = 32  # smallest useful fragment of a cut-down chunk, in tokens
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """tiktoken's cl100k encoding, or None if it can't be loaded (e.g. offline)."""
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Token count of ``text`` (≈ 4 characters per token without tiktoken)."""
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text))
+
+
+def add_token_counts(docs: list[Document]) -> list[Document]:
+    """Store each chunk's token count in its metadata (done once at ingest)."""
+    for doc in docs:
+        doc.metadata[TOKENS_KEY] = count_tokens(doc.page_content)
+    return docs
+
+
+def truncate_tokens(text: str, tokens: int) -> str:
+    """The first ``tokens`` tokens of ``text`` (≈ 4 characters each without tiktoken)."""
+    encoding = _encoding()
+    if encoding is None:
+        return text[:max(tokens, 0) * 4]
+    return encoding.decode(encoding.encode(text)[:max(tokens, 0)])
+
+
+def _tokens(doc: Document) -> int:
+    stored = doc.metadata.get(TOKENS_KEY)
+    return int(stored) if stored is not None else count_tokens(doc.page_content)
+
+
+def _relevance(doc: Document) -> float:
+    from src.grading import SCORE_KEY
+    from src.pregrade import DISTANCE_KEY, similarity_from_distance
+
+    if doc.metadata.get(SCORE_KEY) is not None:
+        return float(doc.metadata[SCORE_KEY])
+    if doc.metadata.get(DISTANCE_KEY) is not None:
+        return similarity_from_distance(float(doc.metadata[DISTANCE_KEY]))
+    if not doc.metadata.get("source"):
+        return 1.0  # web search result: neither graded nor retrieved
+    return 0.0
+
+
+def _shingles(text: str) -> set[tuple[str, ...]]:
+    words = [w.lower() for w in _WORD.findall(text)]
+    if len(words) < _SHINGLE:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + _SHINGLE]) for i in range(len(words) - _SHINGLE + 1)}
+
+
+def source_tag(doc: Document) -> str:
+    """``source p.X`` label for a chunk ("web" for search results)."""
+    source = doc.metadata.get("source") or "web"
+    page = doc.metadata.get("page")
+    return f"{source} p.{page}" if page not in (None, "") else source
+
+
+def pack_context(
+    documents: list[Document],
+    budget: int = CONTEXT_TOKEN_BUDGET,
+    dedup_overlap: float = CONTEXT_DEDUP_OVERLAP,
+) -> tuple[str, dict]:
+    """Render ``documents`` into a prompt context of at most ``budget`` tokens.
+
+    Returns ``(context, report)`` where ``report`` has ``kept``, ``tokens``,
+    ``budget``, ``duplicates``, ``truncated`` (source tags of chunks cut short)
+    and ``over_budget`` (source tags of chunks left out).
+    """
+    # Stable sort: equally relevant chunks keep retrieval order
+    ranked = sorted(documents, key=_relevance, reverse=True)
+
+    seen: set[tuple[str, ...]] = set()
+    blocks: list[str] = []
+    used = 0
+    duplicates: list[str] = []
+    truncated: list[str] = []
+    over_budget: list[str] = []
+
+    for doc in ranked:
+        text = doc.page_content.strip()
+        shingles = _shingles(text)
+        if not shingles or len(shingles & seen) / len(shingles) >= dedup_overlap:
+            duplicates.append(source_tag(doc))
+            continue
+
+        header = f"[{len(blocks) + 1}] {source_tag(doc)}"
+        overhead = count_tokens(header) + 2  # + blank-line separator
+        cost = _tokens(doc) + overhead
+        if used + cost > budget:
+            left = budget - used - overhead
+            if blocks and left < _MIN_TRUNCATED:
+                over_budget.append(source_tag(doc))
+                continue
+            text = truncate_tokens(text, max(left, _MIN_TRUNCATED))
+            shingles = _shingles(text)
+            cost = count_tokens(text) + overhead
+            truncated.append(source_tag(doc))
+
+        blocks.append(f"{header}\n{text}")
+        seen |= shingles
+        used += cost
+
+    return "\n\n".join(blocks), {
+        "kept": len(blocks),
+        "tokens": used,
+        "budget": budget,
+        "duplicates": duplicates,
+        "truncated": truncated,
+        "over_budget": over_budget,
+    }
@@ -1,6 +1,8 @@
 """Core RAG system components - chains, tools, and configuration"""
 import getpass
 import os
+import shutil
+from functools import lru_cache
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_openai import ChatOpenAI
@@ -66,6 +68,14 @@ class GraphState(TypedDict):
         documents: List of documents retrieved
         irrelevant_count: Number of irrelevant docs found during grading
         total_retrieved: Total docs retrieved before filtering
+        candidates: Ranked candidate pool for adaptive-k grading
+        graded_count: How many candidates have been graded so far
+        next_k: Grade candidates up to this rank on the next grading pass
+        grading_stats: Grader calls, tokens and time for this run
+        speculation_id: Handle of a speculative web search still in flight
+        web_results: Search results from a speculative web search
+        speculation: Outcome of this run's speculation (used/discarded/capped)
+        context_report: What the context packer kept and cut for generation
     """
     question: str
     generation: str
@@ -73,6 +83,14 @@ class GraphState(TypedDict):
     documents: List[str]
     irrelevant_count: int
     total_retrieved: int
+    candidates: List[str]
+    graded_count: int
+    next_k: int
+    grading_stats: dict
+    speculation_id: str
+    web_results: list
+    speculation: dict
+    context_report: dict
 
 
 # ========== Data Models ==========
@@ -84,25 +102,126 @@ class GradeDocuments(BaseModel):
     )
 
 
+class DocumentGrade(BaseModel):
+    """Relevance verdict for one numbered document in a batch"""
+    index: int = Field(description="The document number, as given in brackets")
+    binary_score: str = Field(
+        description="Document is relevant to the query, 'yes' or 'no'"
+    )
+
+
+class BatchGradeDocuments(BaseModel):
+    """Relevance verdicts for every numbered document in a batch"""
+    grades: List[DocumentGrade] = Field(
+        description="One verdict per document, covering every document number"
+    )
+
+
 # ========== Chains ==========
+# Chains and tools are stateless and thread-safe, so each factory builds its
+# object once per process and every request (and both graphs) share it.
 
-def create_retrieval_grader():
-    """Create a chain to grade document relevance"""
-    llm = ChatOpenAI(model='gpt-3.5-turbo', temperature=0)
-    structured_llm_grader = llm.with_structured_output(GradeDocuments)
-    
-    system = """You are a grader for the relevance of retrieved documents to the question. 
+def _chat_model(**kwargs) -> ChatOpenAI:
+    """ChatOpenAI on the shared async connection pool (used by the async graph)."""
+    from src.config import get_async_http_client
+
+    return ChatOpenAI(http_async_client=get_async_http_client(), **kwargs)
+
+
+_GRADER_MODEL = 'gpt-3.5-turbo'
+
+_GRADER_SYSTEM = """You are a grader for the relevance of retrieved documents to the question. 
     If the document contains keyword(s) or semantic meaning to the question, grade it as relevant. 
     Give a binary score 'yes' or 'no' to indicate whether the document is relevant to the question."""
+
+
+def grader_version(mode: str | None = None) -> str:
+    """Identifies the grader's model, mode and prompt — part of every grade-cache key.
+
+    Editing the grader prompt or model changes the version, so stale cached
+    verdicts are never reused.
+    """
+    import hashlib
+    from src.config import GRADER_MODE, LOGPROB_GRADE_THRESHOLD
+
+    mode = mode or GRADER_MODE
+    prompt_hash = hashlib.sha1(_GRADER_SYSTEM.encode("utf-8")).hexdigest()[:10]
+    if mode == "logprob":
+        # Cached verdicts are thresholded scores
+        mode = f"logprob@{LOGPROB_GRADE_THRESHOLD}"
+    return f"{_GRADER_MODEL}:{mode}:{prompt_hash}"
+
+
+@lru_cache(maxsize=None)
+def create_retrieval_grader(mode: str | None = None):
+    """Create a chain to grade document relevance
+
+    Args:
+        mode: "per_document", "batch" or "logprob" (see ``config.GRADER_MODE``).
+            The batch grader still answers single-document ``invoke()`` calls.
+    """
+    from src.config import GRADER_MODE
+
+    mode = mode or GRADER_MODE
+    if mode == "logprob":
+        return create_logprob_retrieval_grader()
+
+    llm = _chat_model(model=_GRADER_MODEL, temperature=0)
+    structured_llm_grader = llm.with_structured_output(GradeDocuments)
     
     grade_prompt = ChatPromptTemplate.from_messages([
-        ('system', system),
+        ('system', _GRADER_SYSTEM),
         ('human', "Retrieved document:\n\n{document}\n\nUser question: {question}"),
     ])
     
+    per_document = grade_prompt | structured_llm_grader
+
+    if mode == "batch":
+        from src.grading import BatchRetrievalGrader
+        return BatchRetrievalGrader(create_batch_retrieval_grader(), per_document)
+    return per_document
+
+
+@lru_cache(maxsize=None)
+def create_batch_retrieval_grader():
+    """Create a chain that grades N numbered documents in a single call"""
+    llm = _chat_model(model=_GRADER_MODEL, temperature=0)
+    structured_llm_grader = llm.with_structured_output(BatchGradeDocuments)
+
+    system = _GRADER_SYSTEM + """
+    You will receive several numbered documents. Grade each one independently and
+    return exactly one verdict per document number."""
+
+    grade_prompt = ChatPromptTemplate.from_messages([
+        ('system', system),
+        ('human', "User question: {question}\n\n{count} retrieved documents:\n\n{documents}"),
+    ])
+
     return grade_prompt | structured_llm_grader
 
 
+@lru_cache(maxsize=None)
+def create_logprob_retrieval_grader():
+    """Create a single-token grader that scores relevance as P(yes) from logprobs"""
+    from src.config import LOGPROB_GRADE_THRESHOLD
+    from src.grading import LogprobRetrievalGrader
+
+    llm = _chat_model(
+        model=_GRADER_MODEL, temperature=0, max_tokens=1, logprobs=True, top_logprobs=5,
+    )
+
+    system = _GRADER_SYSTEM + """
+    Answer with exactly one word: yes or no."""
+
+    grade_prompt = ChatPromptTemplate.from_messages([
+        ('system', system),
+        ('human', "Retrieved document:\n\n{document}\n\nUser question: {question}"),
+    ])
+
+    return LogprobRetrievalGrader(grade_prompt | llm, threshold=LOGPROB_GRADE_THRESHOLD)
+
+
+@lru_cache(maxsize=None)
 def create_rag_chain():
     """Create the main RAG chain for generation"""
     prompt = ChatPromptTemplate.from_messages([
@@ -113,13 +232,14 @@ def create_rag_chain():
          "Context:\n{context}\n\nQuestion: {question}\n\nAnswer:")
     ])
     
-    llm = ChatOpenAI(model='gpt-3.5-turbo', temperature=0)
+    llm = _chat_model(model='gpt-3.5-turbo', temperature=0)
     return prompt | llm | StrOutputParser()
 
 
+@lru_cache(maxsize=None)
 def create_question_rewriter():
     """Create a chain to rewrite questions for better web search"""
-    llm = ChatOpenAI(model='gpt-3.5-turbo', temperature=0)
+    llm = _chat_model(model='gpt-3.5-turbo', temperature=0)
     
     system = """You are a question re-writer. Your task is to re-write the user's question 
     to a better version that is optimized for web search. Look at the input and try to reason 
@@ -135,10 +255,25 @@ def create_question_rewriter():
 
 # ========== Tools ==========
 
+@lru_cache(maxsize=None)
 def get_web_search_tool():
-    """Get web search tool (lazy initialization)"""
+    """Get web search tool (lazy initialization), answering repeats from the search cache"""
     from langchain_community.tools.tavily_search import TavilySearchResults
-    return TavilySearchResults(k=3)
+    from src.search_cache import CachedSearchTool, get_search_cache
+
+    tool = TavilySearchResults(k=3)
+    cache = get_search_cache()
+    return CachedSearchTool(tool, cache) if cache is not None else tool
+
+
+def reset_chains() -> None:
+    """Forget every memoised chain/tool so the next call rebuilds it."""
+    for factory in (
+        create_retrieval_grader, create_batch_retrieval_grader,
+        create_logprob_retrieval_grader, create_rag_chain,
+        create_question_rewriter, get_web_search_tool,
+    ):
+        factory.cache_clear()
 
 
 # ========== Retriever Setup ==========
@@ -147,15 +282,78 @@ def get_web_search_tool():
 _retriever = None
 
 
-def create_vectorstore(force_rebuild: bool = False):
+def _split_documents(docs):
+    """Split text/heading chunks; keep tables and image_descriptions as-is.
+
+    Every resulting chunk gets its token count in ``metadata["tokens"]``.
+    """
+    text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+        chunk_size=250,
+        chunk_overlap=0,
+    )
+
+    splittable = [d for d in docs if d.metadata.get("content_type") in ("text", "heading", None)]
+    preserved  = [d for d in docs if d.metadata.get("content_type") in ("table", "image_description")]
+
+    split_chunks = text_splitter.split_documents(splittable)
+    doc_splits   = split_chunks + preserved
+
+    # Token counts are stored with each chunk so generation can budget its
+    # context without re-tokenising (see src/context.py)
+    from src.context import add_token_counts
+    add_token_counts(doc_splits)
+
+    print(f"Split into {len(doc_splits)} chunks ({len(preserved)} tables/images kept whole)")
+    return doc_splits
+
+
+def _as_retriever(store):
+    """Wrap a Chroma store or ShardedRetriever according to config.RETRIEVAL_MODE."""
+    from src.config import RETRIEVAL_MODE
+    from src.retrieval import MMRRetriever
+
+    if RETRIEVAL_MODE == "mmr":
+        return MMRRetriever(store=store)
+    if hasattr(store, "as_retriever"):
+        return store.as_retriever()
+    return store
+
+
+def _reset_retriever():
+    """Drop the cached retriever, closing any open shard handles."""
+    global _retriever
+    store = getattr(_retriever, "store", _retriever)
+    pool = getattr(store, "pool", None)
+    if pool is not None:
+        pool.close_all()
+    _retriever = None
+
+
+def _swap_in(build_dir: Path, persist_dir: Path) -> None:
+    """Replace ``persist_dir`` with the freshly built ``build_dir``."""
+    old_dir = persist_dir.with_name(persist_dir.name + ".old")
+    if old_dir.exists():
+        shutil.rmtree(old_dir)
+    if persist_dir.exists():
+        persist_dir.rename(old_dir)
+    build_dir.rename(persist_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def create_vectorstore(force_rebuild: bool = False, sharding: str | None = None):
     """
     Load or create a persistent vectorstore.
 
     Uses a module-level cache so subsequent calls return the same retriever
     without reloading Chroma or re-embedding documents.
 
+    An index built with sharding (``chroma_db/shards/``) is detected on load
+    and served by a :class:`~src.sharding.ShardedRetriever`.
+
     Args:
         force_rebuild: If True, drop the cache and rebuild the index from scratch.
+        sharding: Layout for a rebuild — "none" or "source".  Defaults to
+            ``config.INDEX_SHARDING``.
 
     Returns:
         retriever: VectorStore retriever backed by the Chroma persistent store.
@@ -166,7 +364,12 @@ def create_vectorstore(force_rebuild: bool = False):
     if _retriever is not None and not force_rebuild:
         return _retriever
 
+    from src.config import INDEX_SHARDING
     from src.ingest.loaders import load_all_books
+    from src.manifest import build_manifest, read_manifest, write_manifest
+    from src.sharding import (
+        ShardPool, ShardedRetriever, build_shards, close_store, list_shards, shards_root,
+    )
 
     # Persistent storage location
     project_root = Path(__file__).parent.parent
@@ -174,18 +377,26 @@ def create_vectorstore(force_rebuild: bool = False):
 
     if force_rebuild:
         # Clear the in-memory cache so we rebuild cleanly
-        _retriever = None
+        _reset_retriever()
 
     # Check if index already exists on disk
     if persist_dir.exists() and not force_rebuild:
         print("Loading existing vectorstore...")
+        if shards_root(persist_dir).exists():
+            names = list_shards(persist_dir)
+            _retriever = _as_retriever(ShardedRetriever(
+                pool=ShardPool(persist_dir, OpenAIEmbeddings()),
+                shard_names=names,
+            ))
+            print(f"✅ Found {len(names)} index shards")
+            return _retriever
         vectorstore = Chroma(
             collection_name="rag-chroma",
             embedding_function=OpenAIEmbeddings(),
             persist_directory=str(persist_dir),
         )
         print(f"✅ Loaded {vectorstore._collection.count()} existing chunks")
-        _retriever = vectorstore.as_retriever()
+        _retriever = _as_retriever(vectorstore)
         return _retriever
 
     # Build from scratch
@@ -197,29 +408,59 @@ def create_vectorstore(force_rebuild: bool = False):
 
     print(f"Loaded {len(docs)} elements")
 
-    # Split text/heading chunks; keep tables and image_descriptions as-is
-    text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-        chunk_size=250,
-        chunk_overlap=0,
-    )
-
-    splittable = [d for d in docs if d.metadata.get("content_type") in ("text", "heading", None)]
-    preserved  = [d for d in docs if d.metadata.get("content_type") in ("table", "image_description")]
+    doc_splits = _split_documents(docs)
 
-    split_chunks = text_splitter.split_documents(splittable)
-    doc_splits   = split_chunks + preserved
+    # A rebuild replaces the old index entirely (possibly switching layout).
+    # It is built next to the old one and swapped in only once it succeeded,
+    # so a failed embedding call leaves the existing index untouched.
+    previous_manifest = read_manifest(persist_dir)
+    build_dir = persist_dir.with_name(persist_dir.name + ".building")
+    if build_dir.exists():
+        shutil.rmtree(build_dir)
 
-    print(f"Split into {len(doc_splits)} chunks ({len(preserved)} tables/images kept whole)")
     print("Generating embeddings (this may take a minute)...")
 
+    embedding = OpenAIEmbeddings()
+
+    if (sharding or INDEX_SHARDING) == "source":
+        try:
+            shard_counts = build_shards(doc_splits, build_dir, embedding)
+            write_manifest(build_dir, build_manifest(
+                build_dir, doc_splits, embedding.model, shard_counts, previous_manifest,
+            ))
+        except BaseException:
+            shutil.rmtree(build_dir, ignore_errors=True)
+            raise
+        _swap_in(build_dir, persist_dir)
+        print(f"✅ {len(shard_counts)} shards saved to {shards_root(persist_dir)}")
+        _retriever = _as_retriever(ShardedRetriever(
+            pool=ShardPool(persist_dir, embedding),
+            shard_names=list(shard_counts),
+        ))
+        return _retriever
+
     # Create persistent vectorstore
-    vectorstore = Chroma.from_documents(
-        documents=doc_splits,
+    try:
+        vectorstore = Chroma.from_documents(
+            documents=doc_splits,
+            collection_name="rag-chroma",
+            embedding=embedding,
+            persist_directory=str(build_dir),
+        )
+        close_store(vectorstore)
+        write_manifest(build_dir, build_manifest(
+            build_dir, doc_splits, embedding.model, previous=previous_manifest,
+        ))
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+    _swap_in(build_dir, persist_dir)
+    vectorstore = Chroma(
         collection_name="rag-chroma",
-        embedding=OpenAIEmbeddings(),
+        embedding_function=embedding,
         persist_directory=str(persist_dir),
     )
 
     print(f"✅ Vectorstore saved to {persist_dir}")
-    _retriever = vectorstore.as_retriever()
+    _retriever = _as_retriever(vectorstore)
     return _retriever
@@ -0,0 +1,230 @@
+"""``ai serve`` — a warm local daemon so CLI queries skip cold start.
+
+The daemon imports LangChain/LangGraph/Chroma, runs ``setup_environment()``,
+opens the vector store and compiles both graphs once, then listens on a Unix
+socket.  The ``ai`` CLI connects as a thin client: it sends one JSON request
+line and renders the newline-delimited JSON events streamed back (see
+``src/events.py``).  ``confirm`` events are answered with a ``{"reply": bool}``
+line from the client.
+
+This module deliberately imports only the standard library at module level —
+the client path must stay cheap.  If no daemon is listening, callers get
+``None`` from :func:`remote_events` and run the query in-process instead.
+"""
+from __future__ import annotations
+
+import json
+import os
+import socket
+import socketserver
+import threading
+from pathlib import Path
+from typing import Any
+
+PROTOCOL_VERSION = 1
+
+# Interactive tasks read from / write to the user's terminal, so they always
+# run in the client process rather than in the daemon.
+_INTERACTIVE_INTENTS = frozenset({"timer", "stopwatch"})
+
+
+def socket_path() -> Path:
+    """Location of the daemon socket.
+
+    ``$AI_ASSISTANT_SOCKET`` overrides; otherwise ``$XDG_RUNTIME_DIR/ai-assistant.sock``
+    or ``~/.cache/ai-assistant/ai.sock``.
+    """
+    override = os.getenv("AI_ASSISTANT_SOCKET")
+    if override:
+        return Path(override)
+    runtime = os.getenv("XDG_RUNTIME_DIR")
+    if runtime:
+        return Path(runtime) / "ai-assistant.sock"
+    return Path.home() / ".cache" / "ai-assistant" / "ai.sock"
+
+
+def is_interactive_query(query: str) -> bool:
+    """True for queries (timer, stopwatch) that need the user's own terminal."""
+    from src.router import find_intents  # stdlib-only, keeps the client cheap
+
+    return not _INTERACTIVE_INTENTS.isdisjoint(find_intents(query))
+
+
+# ── Wire format ──────────────────────────────────────────────────
+
+def _write(wfile, message: dict) -> None:
+    wfile.write(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+    wfile.flush()
+
+
+def _read(rfile) -> dict | None:
+    line = rfile.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+# ── Client ───────────────────────────────────────────────────────
+
+def _connect(path: Path | None = None) -> socket.socket | None:
+    path = path or socket_path()
+    if not path.exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(0.5)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(None)
+    return sock
+
+
+def _remote_stream(sock: socket.socket, request: dict):
+    with sock, sock.makefile("rwb") as f:
+        _write(f, {"v": PROTOCOL_VERSION, **request})
+        while True:
+            event = _read(f)
+            if event is None or event.get("type") == "done":
+                return
+            if event.get("type") == "confirm":
+                reply = yield event
+                _write(f, {"reply": bool(reply)})
+            else:
+                yield event
+
+
+def remote_events(request: dict, path: Path | None = None):
+    """Send ``request`` to a running daemon and return its event stream.
+
+    Returns ``None`` when no daemon is listening, so the caller can fall
+    back to in-process execution.
+    """
+    sock = _connect(path)
+    if sock is None:
+        return None
+    return _remote_stream(sock, request)
+
+
+def ping(path: Path | None = None) -> bool:
+    """True if a daemon answers on the socket."""
+    events = remote_events({"cmd": "ping"}, path)
+    if events is None:
+        return False
+    return "pong" in [e.get("type") for e in events]
+
+
+# ── Server ───────────────────────────────────────────────────────
+
+class _WarmGraphs:
+    """Compiled graphs kept alive for the lifetime of the daemon.
+
+    Both are the process-wide graphs (``get_multi_agent_graph`` /
+    ``get_graph``); requests are isolated by their ``thread_id``.
+    """
+
+    def agents(self):
+        from src.agents.graph import get_multi_agent_graph
+        return get_multi_agent_graph()
+
+    def rag(self):
+        from src.graph import get_graph
+        return get_graph()
+
+    def warm(self) -> None:
+        self.agents()
+        try:
+            self.rag()
+        except Exception as e:
+            # No books yet, missing index… rag requests will retry lazily.
+            print(f"⚠️  RAG graph not warmed: {e}")
+
+
+def _drive(events, rfile, wfile) -> None:
+    """Pump an event generator onto the socket, relaying confirm replies."""
+    reply: Any = None
+    try:
+        while True:
+            event = events.send(reply)
+            reply = None
+            _write(wfile, event)
+            if event["type"] == "confirm":
+                msg = _read(rfile)
+                if msg is None:
+                    return  # client hung up mid-run
+                reply = bool(msg.get("reply"))
+    except StopIteration:
+        pass
+    except (BrokenPipeError, ConnectionResetError):
+        return
+    except Exception as e:
+        _write(wfile, {"type": "error", "message": str(e)})
+    finally:
+        events.close()
+    _write(wfile, {"type": "done"})
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "_DaemonServer"
+
+    def handle(self) -> None:
+        from src.events import ask_events, rag_ask_events
+
+        request = _read(self.rfile)
+        if request is None:
+            return
+        cmd = request.get("cmd")
+
+        if cmd == "ping":
+            _write(self.wfile, {"type": "pong", "v": PROTOCOL_VERSION})
+            _write(self.wfile, {"type": "done"})
+            return
+
+        try:
+            if cmd == "ask":
+                events = ask_events(self.server.graphs.agents(), request["query"])
+            elif cmd == "rag_ask":
+                events = rag_ask_events(self.server.graphs.rag(), request["question"])
+            else:
+                raise ValueError(f"Unknown command: {cmd!r}")
+        except Exception as e:
+            _write(self.wfile, {"type": "error", "message": str(e)})
+            _write(self.wfile, {"type": "done"})
+            return
+
+        _drive(events, self.rfile, self.wfile)
+
+
+class _DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: Path, graphs: _WarmGraphs):
+        self.graphs = graphs
+        super().__init__(str(path), _Handler)
+
+
+def serve(path: Path | None = None) -> None:
+    """Warm everything up, then serve requests until interrupted."""
+    from src.core import setup_environment
+
+    path = path or socket_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if path.exists():
+        if ping(path):
+            raise RuntimeError(f"A daemon is already listening on {path}")
+        path.unlink()  # stale socket from a crashed daemon
+
+    setup_environment()
+    graphs = _WarmGraphs()
+    graphs.warm()
+
+    server = _DaemonServer(path, graphs)
+    os.chmod(path, 0o600)
+    print(f"✅ Listening on {path}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        path.unlink(missing_ok=True)
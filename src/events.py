@@ -0,0 +1,265 @@
+"""Pipeline runs as streams of display events.
+
+Both ``ai ask`` and ``ai rag ask`` are driven through generators that yield
+small JSON-serialisable dicts (``{"type": "plan", ...}``).  The CLI renders
+them; the ``ai serve`` daemon forwards them over its socket so a thin client
+can render the exact same output.
+
+A ``confirm`` event pauses the run: the driver answers it by ``send()``-ing
+a bool back into the generator.
+
+Event types:
+    plan      — coordinator plan (``plan``, ``reasoning``)
+    agent     — an agent finished (``agent``, ``confidence``, ``sources``)
+    node      — a RAG graph node finished (``name``, ``keys``)
+    token     — a chunk of the answer being generated (``text``)
+    status    — free-form progress line (``message``)
+    confirm   — ask the user yes/no (``kind``, ``notice``, ``prompt``, ``default``;
+                multi-agent pauses also carry the resumable ``thread_id``)
+    answer    — final answer (``title``, ``text`` plus run-specific extras)
+    error     — something failed (``message``)
+"""
+from __future__ import annotations
+
+import time
+import uuid
+from typing import Any, Generator
+
+Event = dict[str, Any]
+EventStream = Generator[Event, Any, None]
+
+
+def initial_multi_agent_state(query: str) -> dict:
+    """Blank MultiAgentState for a new query."""
+    return {
+        "query": query,
+        "language": "",
+        "translated_query": "",
+        "query_language": "",
+        "plan": [],
+        "plan_deps": [],
+        "plan_reasoning": "",
+        "current_step": 0,
+        "done_steps": [],
+        "agent_results": [],
+        "response": "",
+        "agents_used": [],
+        "needs_human_confirm": False,
+        "human_confirm_message": "",
+        "human_confirm_for": [],
+        "declined_agents": [],
+        "should_stop": False,
+    }
+
+
+# ── ai ask ───────────────────────────────────────────────────────
+
+def ask_events(graph, query: str, thread_id: str | None = None) -> EventStream:
+    """Run the multi-agent graph for ``query``, yielding display events.
+
+    With ``thread_id``, continue that run from its pending confirmation
+    instead (``ai resume``); ``query`` is then unused.
+    """
+    from langgraph.types import Command
+
+    # Each run needs a unique thread_id so the checkpointer can store and
+    # resume state if a human_check interrupt fires.
+    config = {"configurable": {"thread_id": thread_id or str(uuid.uuid4())}}
+    payload: Any = initial_multi_agent_state(query)
+    agents_used: list[str] = []  # append-only in the state: updates carry new entries
+    accumulated: dict = {}
+    interrupt_val = None
+    paused = False
+
+    try:
+        if thread_id is not None:
+            snapshot = graph.get_state(config)
+            pending = [i.value for task in snapshot.tasks for i in task.interrupts]
+            if not pending:
+                yield {"type": "error", "message": f"No paused run {thread_id!r} to resume."}
+                return
+            interrupt_val = pending[0]
+            agents_used = list(snapshot.values.get("agents_used", []))
+
+        while True:
+            if interrupt_val is None:
+                accumulated = {}
+                for step in graph.stream(payload, config=config):  # type: ignore[arg-type]
+                    # LangGraph surfaces interrupts as a special __interrupt__ key
+                    if "__interrupt__" in step:
+                        interrupt_val = step["__interrupt__"][0].value
+                        break
+                    for node_name, state in step.items():
+                        if node_name == "coordinator" and state.get("plan"):
+                            from src.agents.coordinator import plan_waves
+
+                            yield {
+                                "type": "plan",
+                                "plan": state["plan"],
+                                "waves": plan_waves(state["plan"], state.get("plan_deps")),
+                                "reasoning": state.get("plan_reasoning", ""),
+                            }
+                        elif node_name == "dispatcher":
+                            # A dispatcher pass may run several agents at once
+                            new_used = state.get("agents_used", [])
+                            new_results = state.get("agent_results", [])
+                            paired = len(new_used) == len(new_results)
+                            if not paired:
+                                new_results = [{}] * len(new_used)
+                            for agent, result in zip(new_used, new_results):
+                                yield {
+                                    "type": "agent",
+                                    "agent": agent,
+                                    "confidence": result.get("confidence", ""),
+                                    "sources": list(result.get("sources", []))[:3],
+                                }
+                        agents_used += state.get("agents_used", [])
+                        accumulated = {**accumulated, **state}
+
+                if interrupt_val is None:
+                    break
+
+            msg = (
+                interrupt_val.get("message", "Continue?")
+                if isinstance(interrupt_val, dict)
+                else str(interrupt_val)
+            )
+            paused = True
+            confirmed = yield {
+                "type": "confirm",
+                "kind": "interrupt",
+                "notice": msg,
+                "prompt": "  Proceed?",
+                "default": True,
+                "thread_id": config["configurable"]["thread_id"],
+            }
+            paused = False
+            payload = Command(resume="yes" if confirmed else "no")
+            interrupt_val = None
+
+        yield {
+            "type": "answer",
+            "title": "✅ Answer",
+            "text": accumulated.get("response", ""),
+            "agents_used": agents_used,
+        }
+    finally:
+        checkpointer = getattr(graph, "checkpointer", None)
+        if paused:
+            # Abandoned at a confirmation: keep the run so `ai resume` can
+            # pick it up later (the checkpointer's eviction bounds these).
+            if hasattr(checkpointer, "flush"):
+                checkpointer.flush()
+        elif hasattr(checkpointer, "delete_thread"):
+            # The compiled graph is shared across requests; drop this run's
+            # checkpoints so a long-lived process doesn't accumulate them.
+            checkpointer.delete_thread(config["configurable"]["thread_id"])
+
+
+# ── ai rag ask ───────────────────────────────────────────────────
+
+# Graph node whose LLM tokens are streamed to the user
+_GENERATION_NODE = "generate"
+
+
+def rag_ask_events(rag_app, question: str) -> EventStream:
+    """Run the RAG graph for ``question``, yielding display events.
+
+    Answer tokens are streamed as ``token`` events while ``generate`` runs;
+    the final ``answer`` event carries ``ttft`` (seconds to first token).
+    """
+    started = time.perf_counter()
+    ttft = None
+    last_state: dict = {}
+    for mode, chunk in rag_app.stream(  # type: ignore
+        {"question": question}, stream_mode=["updates", "messages"]
+    ):
+        if mode == "messages":
+            message, metadata = chunk
+            if metadata.get("langgraph_node") == _GENERATION_NODE and message.content:
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                yield {"type": "token", "text": message.content}
+            continue
+        for node_name, state in chunk.items():
+            yield {"type": "node", "name": node_name, "keys": list(state.keys())}
+            last_state = {**last_state, **state}
+
+    if "generation" not in last_state:
+        yield {"type": "answer", "title": "✅ Answer", "text": ""}
+        return
+
+    irrelevant = last_state.get("irrelevant_count", 0)
+    total = last_state.get("total_retrieved", 0)
+    yield {
+        "type": "answer",
+        "title": "✅ Answer",
+        "text": last_state["generation"],
+        "sources": [
+            doc.metadata.get("source", "Unknown") for doc in last_state.get("documents", [])[:5]
+        ],
+        "grading": last_state.get("grading_stats"),
+        "speculation": last_state.get("speculation"),
+        "context": last_state.get("context_report"),
+        "ttft": ttft,
+    }
+
+    # If some (but not the majority) docs were irrelevant, offer a web search follow-up
+    web_search_done = last_state.get("web_search", "No") == "Yes"
+    if irrelevant > 0 and not web_search_done:
+        wants_web = yield {
+            "type": "confirm",
+            "kind": "web_followup",
+            "notice": (
+                f"⚠️  {irrelevant}/{total} retrieved document(s) were not relevant "
+                f"to your question. The answer above is based on the {total - irrelevant} "
+                f"relevant document(s) found."
+            ),
+            "prompt": "🌐 Would you like to supplement with a web search?",
+            "default": False,
+        }
+        if wants_web:
+            yield from web_supplement_events(question)
+
+
+def web_supplement_events(question: str) -> EventStream:
+    """Run a web-supplemented RAG pass after the user opts in."""
+    from langchain_core.documents import Document
+
+    from src.context import pack_context
+    from src.core import create_question_rewriter, create_rag_chain, get_web_search_tool
+
+    yield {"type": "status", "message": "🌐 Searching the web..."}
+
+    started = time.perf_counter()
+    ttft = None
+    parts: list[str] = []
+    try:
+        rewriter = create_question_rewriter()
+        web_tool = get_web_search_tool()
+        rag_chain = create_rag_chain()
+
+        better_question = rewriter.invoke({"question": question})
+        docs = web_tool.invoke({"query": better_question})
+        web_content = "\n".join(d["content"] for d in docs)
+        web_doc = Document(page_content=web_content)
+        context, _ = pack_context([web_doc])
+
+        for text in rag_chain.stream({
+            "context": context,
+            "question": question,
+        }):
+            if ttft is None:
+                ttft = time.perf_counter() - started
+            parts.append(text)
+            yield {"type": "token", "text": text}
+    except Exception as e:
+        yield {"type": "error", "message": f"Web search failed: {e}"}
+        return
+
+    yield {
+        "type": "answer",
+        "title": "✅ Web-Supplemented Answer",
+        "text": "".join(parts),
+        "ttft": ttft,
+    }
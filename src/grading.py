@@ -0,0 +1,598 @@
+"""Relevance grading shared by the RAG graph and the Librarian agent.
+
+Adaptive-k: instead of grading a fixed top-k, callers rank a candidate pool
+once (vector search is cheap; grading is what costs LLM calls), grade a
+small first page, and only widen to the next page while too few chunks have
+come back relevant — up to a budget.  Easy questions stop after the first
+page; hard ones get a few more local chunks before anyone reaches for the
+web.
+
+Each page is graded concurrently on a thread pool (grader calls are
+network-bound), verdicts come back in input order, and a failed call is
+retried on its own without restarting the rest of the page.
+
+With ``GRADER_MODE = "batch"`` a page is graded in one call that sends the
+question once alongside N numbered documents; any document the reply fails
+to cover falls back to a per-document call.
+
+With ``PREGRADE_ENABLED`` on, clear-cut chunks are decided locally first
+(see :mod:`src.pregrade`) and only the uncertain ones cost an LLM call.
+
+With ``GRADER_MODE = "logprob"`` each chunk costs a single output token and
+its P(yes) is kept as ``relevance_score`` in the chunk's metadata.
+
+Given a ``stop_when`` predicate, per-document grading runs as a stream and
+calls that have not started yet are cancelled as soon as the predicate says
+the outcome is settled; those documents come back as ``None`` (ungraded).
+
+:func:`agrade_page` is the asyncio twin of :func:`grade_page` for the async
+RAG graph: same cache / pre-grade / early-exit behaviour, with grader calls
+as tasks on the caller's event loop.
+
+Verdicts are memoised in a persistent :class:`GradeCache` shared by every
+call site, so repeated questions skip grading entirely.
+
+Callers may pass a ``stats`` dict (see :func:`new_grading_stats`) to collect
+calls, tokens and wall time for the verbose report.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import math
+import threading
+import time
+from concurrent.futures import as_completed
+from typing import Callable
+
+from langchain_core.documents import Document
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+
+from src.config import (
+    ADAPTIVE_K_START,
+    ADAPTIVE_K_STEP,
+    ADAPTIVE_MIN_RELEVANT,
+    GRADE_CACHE_ENABLED,
+    GRADE_CACHE_SIZE,
+    GRADE_CONCURRENCY,
+    GRADE_RETRIES,
+    GRADE_RETRY_BACKOFF,
+    PREGRADE_ENABLED,
+)
+from src.pregrade import pregrade as pregrade_page
+
+
+# Metadata key for a grader's graded relevance (logprob mode)
+SCORE_KEY = "relevance_score"
+
+
+def _verdict(grade, doc: Document) -> bool:
+    score = getattr(grade, "score", None)
+    if score is not None:
+        doc.metadata[SCORE_KEY] = score
+    return grade.binary_score == "yes"  # type: ignore[union-attr]
+
+
+def grade_document(retrieval_grader, question: str, doc: Document) -> bool:
+    """True if the grader judges ``doc`` relevant to ``question``."""
+    grade = retrieval_grader.invoke({"question": question, "document": doc.page_content})
+    return _verdict(grade, doc)
+
+
+async def agrade_document(retrieval_grader, question: str, doc: Document) -> bool:
+    """Async :func:`grade_document`."""
+    grade = await retrieval_grader.ainvoke({"question": question, "document": doc.page_content})
+    return _verdict(grade, doc)
+
+
+def _grade_with_retry(
+    retrieval_grader, question: str, doc: Document, retries: int, backoff: float
+) -> bool:
+    attempt = 0
+    while True:
+        try:
+            return grade_document(retrieval_grader, question, doc)
+        except Exception:
+            if attempt >= retries:
+                raise
+            time.sleep(backoff * (2 ** attempt))
+            attempt += 1
+
+
+async def _agrade_with_retry(
+    retrieval_grader, question: str, doc: Document, retries: int, backoff: float
+) -> bool:
+    attempt = 0
+    while True:
+        try:
+            return await agrade_document(retrieval_grader, question, doc)
+        except Exception:
+            if attempt >= retries:
+                raise
+            await asyncio.sleep(backoff * (2 ** attempt))
+            attempt += 1
+
+
+def new_grading_stats() -> dict:
+    """Empty accumulator for :func:`grade_page` statistics."""
+    return {
+        "mode": "per_document",
+        "docs": 0,
+        "llm_calls": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "seconds": 0.0,
+        "fallbacks": 0,
+        "pregraded": 0,
+        "cached": 0,
+        "early_exit_saved": 0,
+    }
+
+
+# ── Grade cache ─────────────────────────────────────────────────
+
+def normalise_question(question: str) -> str:
+    """Case- and whitespace-insensitive form used in cache keys."""
+    return " ".join(question.lower().split()).rstrip("?!. ")
+
+
+def chunk_id(doc: Document) -> str:
+    """Stable chunk identity: source plus content (survives index rebuilds)."""
+    source = str(doc.metadata.get("source", ""))
+    return hashlib.sha1(f"{source}\0{doc.page_content}".encode("utf-8")).hexdigest()
+
+
+class GradeCache:
+    """Persistent verdict memo keyed by (normalised question, chunk ID, grader version).
+
+    In logprob mode the grader's P(yes) is cached alongside the verdict and
+    restored as ``SCORE_KEY`` on a hit, so cached chunks rank like fresh ones.
+    """
+
+    def __init__(self, store, version: str):
+        self.store = store
+        self.version = version
+
+    def key(self, question: str, doc: Document) -> str:
+        raw = f"{self.version}\0{normalise_question(question)}\0{chunk_id(doc)}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def lookup(self, question: str, docs: list[Document]) -> list[bool | None]:
+        keys = [self.key(question, doc) for doc in docs]
+        found = self.store.get_many(keys)
+        verdicts: list[bool | None] = []
+        for doc, key in zip(docs, keys):
+            entry = found.get(key)
+            if isinstance(entry, dict):
+                doc.metadata[SCORE_KEY] = entry["score"]
+                entry = entry["relevant"]
+            verdicts.append(entry)
+        return verdicts
+
+    def save(self, question: str, docs: list[Document], verdicts: list[bool]) -> None:
+        entries = {}
+        for doc, verdict in zip(docs, verdicts):
+            score = doc.metadata.get(SCORE_KEY)
+            entries[self.key(question, doc)] = (
+                bool(verdict) if score is None else {"relevant": bool(verdict), "score": score}
+            )
+        self.store.set_many(entries)
+
+
+_grade_cache: GradeCache | None = None
+_grade_cache_lock = threading.Lock()
+
+
+def get_grade_cache() -> GradeCache | None:
+    """The process-wide grade cache (None when GRADE_CACHE_ENABLED is off)."""
+    global _grade_cache
+    if not GRADE_CACHE_ENABLED:
+        return None
+    with _grade_cache_lock:
+        if _grade_cache is None:
+            from src.cache import DiskCache
+            from src.core import grader_version
+
+            _grade_cache = GradeCache(DiskCache("grades", GRADE_CACHE_SIZE), grader_version())
+        return _grade_cache
+
+
+class BatchRetrievalGrader:
+    """Grades a whole page in one LLM call, with per-document fallback.
+
+    ``invoke()`` is forwarded to the per-document chain, so this object can be
+    used anywhere a plain retrieval grader is expected.
+    """
+
+    mode = "batch"
+
+    def __init__(self, batch_chain, per_document):
+        self.batch_chain = batch_chain
+        self.per_document = per_document
+
+    def invoke(self, inputs, config=None):
+        return self.per_document.invoke(inputs, config)
+
+    async def ainvoke(self, inputs, config=None):
+        return await self.per_document.ainvoke(inputs, config)
+
+    @staticmethod
+    def _inputs(question: str, docs: list[Document]) -> dict:
+        numbered = "\n\n".join(
+            f"[{i}]\n{doc.page_content}" for i, doc in enumerate(docs, 1)
+        )
+        return {"question": question, "documents": numbered, "count": len(docs)}
+
+    @staticmethod
+    def _parse(result, count: int) -> list[bool | None]:
+        verdicts: list[bool | None] = [None] * count
+        for grade in getattr(result, "grades", None) or []:
+            score = str(grade.binary_score).strip().lower()
+            if 1 <= grade.index <= count and score in ("yes", "no"):
+                verdicts[grade.index - 1] = score == "yes"
+        return verdicts
+
+    def grade_many(self, question: str, docs: list[Document]) -> list[bool | None]:
+        """Verdicts in input order; ``None`` where the reply didn't cover a document."""
+        try:
+            result = self.batch_chain.invoke(self._inputs(question, docs))
+        except Exception:
+            return [None] * len(docs)
+        return self._parse(result, len(docs))
+
+    async def agrade_many(self, question: str, docs: list[Document]) -> list[bool | None]:
+        """Async :meth:`grade_many`."""
+        try:
+            result = await self.batch_chain.ainvoke(self._inputs(question, docs))
+        except Exception:
+            return [None] * len(docs)
+        return self._parse(result, len(docs))
+
+
+def _grade_each(retrieval_grader, question, docs, max_concurrency, retries, backoff) -> list[bool]:
+    def grade(doc: Document) -> bool:
+        return _grade_with_retry(retrieval_grader, question, doc, retries, backoff)
+
+    if len(docs) <= 1 or max_concurrency <= 1:
+        return [grade(doc) for doc in docs]
+
+    # ContextThreadPoolExecutor propagates callbacks (token accounting) to workers
+    with ContextThreadPoolExecutor(max_workers=min(max_concurrency, len(docs))) as executor:
+        return list(executor.map(grade, docs))
+
+
+async def _agrade_each(
+    retrieval_grader, question, docs, max_concurrency, retries, backoff
+) -> list[bool]:
+    limit = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def grade(doc: Document) -> bool:
+        async with limit:
+            return await _agrade_with_retry(retrieval_grader, question, doc, retries, backoff)
+
+    return list(await asyncio.gather(*(grade(doc) for doc in docs)))
+
+
+class LogprobGrade:
+    """Verdict from the logprob grader: P(yes) plus the thresholded yes/no."""
+
+    __slots__ = ("score", "binary_score")
+
+    def __init__(self, score: float, threshold: float):
+        self.score = score
+        self.binary_score = "yes" if score >= threshold else "no"
+
+
+def p_yes(message) -> float:
+    """P(yes) from a one-token answer's top logprobs, renormalised over yes/no.
+
+    Falls back to the answer text when neither token is in the top logprobs.
+    """
+    logprobs = (message.response_metadata.get("logprobs") or {}).get("content") or []
+    if logprobs:
+        mass = {"yes": 0.0, "no": 0.0}
+        for candidate in logprobs[0].get("top_logprobs") or []:
+            token = candidate["token"].strip().lower()
+            if token in mass:
+                mass[token] += math.exp(candidate["logprob"])
+        if mass["yes"] + mass["no"] > 0:
+            return mass["yes"] / (mass["yes"] + mass["no"])
+    return 1.0 if str(message.content).strip().lower().startswith("yes") else 0.0
+
+
+class LogprobRetrievalGrader:
+    """Single-token grader: relevance is P(yes), thresholded into a verdict."""
+
+    mode = "logprob"
+
+    def __init__(self, chain, threshold: float = 0.5):
+        self.chain = chain
+        self.threshold = threshold
+
+    def invoke(self, inputs, config=None) -> LogprobGrade:
+        return LogprobGrade(p_yes(self.chain.invoke(inputs, config)), self.threshold)
+
+    async def ainvoke(self, inputs, config=None) -> LogprobGrade:
+        return LogprobGrade(p_yes(await self.chain.ainvoke(inputs, config)), self.threshold)
+
+
+def _grade_until(
+    retrieval_grader, question, docs, pending, verdicts, stop_when,
+    max_concurrency, retries, backoff,
+) -> int:
+    """Grade ``docs[pending]`` into ``verdicts`` in place until ``stop_when(verdicts)``.
+
+    Returns the number of grader calls that were never made.
+    """
+    def grade(i: int) -> tuple[int, bool]:
+        return i, _grade_with_retry(retrieval_grader, question, docs[i], retries, backoff)
+
+    if len(pending) <= 1 or max_concurrency <= 1:
+        for n, i in enumerate(pending):
+            verdicts[i] = grade(i)[1]
+            if stop_when(verdicts):
+                return len(pending) - n - 1
+        return 0
+
+    executor = ContextThreadPoolExecutor(max_workers=min(max_concurrency, len(pending)))
+    futures = [executor.submit(grade, i) for i in pending]
+    try:
+        for future in as_completed(futures):
+            i, verdict = future.result()
+            verdicts[i] = verdict
+            if stop_when(verdicts):
+                # Calls already in flight finish in the background; their
+                # verdicts are discarded.
+                return sum(f.cancel() for f in futures)
+        return 0
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def _agrade_until(
+    retrieval_grader, question, docs, pending, verdicts, stop_when,
+    max_concurrency, retries, backoff,
+) -> int:
+    """Async :func:`_grade_until`; in-flight calls are cancelled too."""
+    limit = asyncio.Semaphore(max(1, max_concurrency))
+    started: set[int] = set()
+
+    async def grade(i: int) -> tuple[int, bool]:
+        async with limit:
+            started.add(i)
+            return i, await _agrade_with_retry(
+                retrieval_grader, question, docs[i], retries, backoff
+            )
+
+    tasks = [asyncio.create_task(grade(i)) for i in pending]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            i, verdict = await next_done
+            verdicts[i] = verdict
+            if stop_when(verdicts):
+                return sum(i not in started for i in pending)
+        return 0
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _grade_with_llm(
+    retrieval_grader, question, docs, max_concurrency, retries, backoff
+) -> tuple[list[bool], int]:
+    """LLM verdicts for ``docs`` plus the number of per-document fallbacks."""
+    if not hasattr(retrieval_grader, "grade_many"):
+        return _grade_each(
+            retrieval_grader, question, docs, max_concurrency, retries, backoff
+        ), 0
+
+    verdicts = retrieval_grader.grade_many(question, docs)
+    missing = [i for i, v in enumerate(verdicts) if v is None]
+    if missing:
+        retried = _grade_each(
+            retrieval_grader, question, [docs[i] for i in missing],
+            max_concurrency, retries, backoff,
+        )
+        for i, verdict in zip(missing, retried):
+            verdicts[i] = verdict
+    return [bool(v) for v in verdicts], len(missing)
+
+
+async def _agrade_with_llm(
+    retrieval_grader, question, docs, max_concurrency, retries, backoff
+) -> tuple[list[bool], int]:
+    """Async :func:`_grade_with_llm`."""
+    if not hasattr(retrieval_grader, "agrade_many"):
+        return await _agrade_each(
+            retrieval_grader, question, docs, max_concurrency, retries, backoff
+        ), 0
+
+    verdicts = await retrieval_grader.agrade_many(question, docs)
+    missing = [i for i, v in enumerate(verdicts) if v is None]
+    if missing:
+        retried = await _agrade_each(
+            retrieval_grader, question, [docs[i] for i in missing],
+            max_concurrency, retries, backoff,
+        )
+        for i, verdict in zip(missing, retried):
+            verdicts[i] = verdict
+    return [bool(v) for v in verdicts], len(missing)
+
+
+class _PageRun:
+    """Bookkeeping shared by :func:`grade_page` and :func:`agrade_page`.
+
+    Resolves what it can from the cache and the pre-grader up front; the
+    caller fills ``verdicts[pending]`` from the LLM grader, then ``finish()``
+    caches fresh verdicts and records stats.
+    """
+
+    def __init__(self, question: str, docs: list[Document], cache, pregrade: bool):
+        self.question = question
+        self.docs = docs
+        self.cache = cache
+        self.started = time.perf_counter()
+        self.verdicts = cache.lookup(question, docs) if cache else [None] * len(docs)
+        self.cached = sum(v is not None for v in self.verdicts)
+
+        self.undecided = [i for i, v in enumerate(self.verdicts) if v is None]
+        if pregrade and self.undecided:
+            local = pregrade_page(question, [docs[i] for i in self.undecided])
+            for i, verdict in zip(self.undecided, local):
+                self.verdicts[i] = verdict
+
+        self.pending = [i for i, v in enumerate(self.verdicts) if v is None]
+        self.fallbacks = 0
+        self.skipped = 0
+
+    @property
+    def pending_docs(self) -> list[Document]:
+        return [self.docs[i] for i in self.pending]
+
+    def fill(self, graded: list[bool]) -> None:
+        for i, verdict in zip(self.pending, graded):
+            self.verdicts[i] = verdict
+
+    def finish(self, retrieval_grader, usage, stats: dict | None, stop_when) -> list[bool | None]:
+        if self.cache:
+            fresh = [i for i in self.pending if self.verdicts[i] is not None]
+            self.cache.save(
+                self.question, [self.docs[i] for i in fresh], [self.verdicts[i] for i in fresh]
+            )
+
+        if stats is not None:
+            stats["mode"] = getattr(retrieval_grader, "mode", "per_document")
+            stats["docs"] += len(self.docs)
+            stats["llm_calls"] += usage.successful_requests
+            stats["prompt_tokens"] += usage.prompt_tokens
+            stats["completion_tokens"] += usage.completion_tokens
+            stats["seconds"] += time.perf_counter() - self.started
+            stats["fallbacks"] += self.fallbacks
+            stats["pregraded"] += len(self.undecided) - len(self.pending)
+            stats["cached"] += self.cached
+            stats["early_exit_saved"] += self.skipped
+        if stop_when is None:
+            return [bool(v) for v in self.verdicts]
+        return self.verdicts
+
+
+def grade_page(
+    retrieval_grader,
+    question: str,
+    docs: list[Document],
+    max_concurrency: int = GRADE_CONCURRENCY,
+    retries: int = GRADE_RETRIES,
+    backoff: float = GRADE_RETRY_BACKOFF,
+    stats: dict | None = None,
+    pregrade: bool | None = None,
+    cache: GradeCache | None = None,
+    stop_when: Callable[[list[bool | None]], bool] | None = None,
+) -> list[bool | None]:
+    """Grade a page of documents concurrently; verdicts are returned in input order.
+
+    Cached verdicts are used first, then the local pre-grader, and only what
+    is left goes to the LLM grader (whose verdicts are then cached).
+
+    ``stop_when(verdicts)`` enables early exit: it is called as verdicts
+    arrive (``None`` = not graded yet) and, once it returns True, outstanding
+    per-document calls are cancelled and their documents stay ``None``.
+    Batch graders answer in one call, so for them it is only checked up front.
+    """
+    from langchain_community.callbacks.manager import get_openai_callback
+
+    if not docs:
+        return []
+    run = _PageRun(question, docs, cache, PREGRADE_ENABLED if pregrade is None else pregrade)
+
+    with get_openai_callback() as usage:
+        if run.pending and stop_when is not None and stop_when(run.verdicts):
+            run.skipped = len(run.pending)
+        elif run.pending and stop_when is not None and not hasattr(retrieval_grader, "grade_many"):
+            run.skipped = _grade_until(
+                retrieval_grader, question, docs, run.pending, run.verdicts, stop_when,
+                max_concurrency, retries, backoff,
+            )
+        elif run.pending:
+            graded, run.fallbacks = _grade_with_llm(
+                retrieval_grader, question, run.pending_docs,
+                max_concurrency, retries, backoff,
+            )
+            run.fill(graded)
+
+    return run.finish(retrieval_grader, usage, stats, stop_when)
+
+
+async def agrade_page(
+    retrieval_grader,
+    question: str,
+    docs: list[Document],
+    max_concurrency: int = GRADE_CONCURRENCY,
+    retries: int = GRADE_RETRIES,
+    backoff: float = GRADE_RETRY_BACKOFF,
+    stats: dict | None = None,
+    pregrade: bool | None = None,
+    cache: GradeCache | None = None,
+    stop_when: Callable[[list[bool | None]], bool] | None = None,
+) -> list[bool | None]:
+    """Async :func:`grade_page`: grader calls run as tasks on the current event loop."""
+    from langchain_community.callbacks.manager import get_openai_callback
+
+    if not docs:
+        return []
+    run = _PageRun(question, docs, cache, PREGRADE_ENABLED if pregrade is None else pregrade)
+
+    with get_openai_callback() as usage:
+        if run.pending and stop_when is not None and stop_when(run.verdicts):
+            run.skipped = len(run.pending)
+        elif run.pending and stop_when is not None and not hasattr(retrieval_grader, "agrade_many"):
+            run.skipped = await _agrade_until(
+                retrieval_grader, question, docs, run.pending, run.verdicts, stop_when,
+                max_concurrency, retries, backoff,
+            )
+        elif run.pending:
+            graded, run.fallbacks = await _agrade_with_llm(
+                retrieval_grader, question, run.pending_docs,
+                max_concurrency, retries, backoff,
+            )
+            run.fill(graded)
+
+    return run.finish(retrieval_grader, usage, stats, stop_when)
+
+
+def should_widen(
+    relevant_count: int,
+    graded_count: int,
+    pool_size: int,
+    min_relevant: int = ADAPTIVE_MIN_RELEVANT,
+) -> bool:
+    """Grade another page only if too few are relevant and candidates remain."""
+    return relevant_count < min_relevant and graded_count < pool_size
+
+
+def adaptive_grade(
+    retrieval_grader,
+    question: str,
+    candidates: list[Document],
+    start: int = ADAPTIVE_K_START,
+    step: int = ADAPTIVE_K_STEP,
+    min_relevant: int = ADAPTIVE_MIN_RELEVANT,
+    stats: dict | None = None,
+    cache: GradeCache | None = None,
+) -> tuple[list[Document], int]:
+    """Grade ``candidates`` page by page until enough are relevant.
+
+    Returns ``(relevant_docs, graded_count)``.
+    """
+    relevant: list[Document] = []
+    graded = 0
+    next_k = min(start, len(candidates))
+
+    while True:
+        page = candidates[graded:next_k]
+        verdicts = grade_page(retrieval_grader, question, page, stats=stats, cache=cache)
+        relevant.extend(doc for doc, ok in zip(page, verdicts) if ok)
+        graded = next_k
+        if not should_widen(len(relevant), graded, len(candidates), min_relevant):
+            return relevant, graded
+        next_k = min(graded + step, len(candidates))
@@ -1,7 +1,37 @@
-"""LangGraph workflow nodes and graph compilation"""
+"""LangGraph workflow nodes and graph compilation
+
+Every network-bound node has an async twin (``aretrieve``, ``agrade_documents``,
+``atransform_query``, ``aweb_search``, ``agenerate``) built on the chains'
+async APIs; ``create_graph(use_async=True)`` compiles a graph from them that
+is driven with ``astream``/``ainvoke``, so many questions can share one event
+loop and one HTTP connection pool.  Sync and async nodes share the same
+state-update helpers, so both paths behave identically.
+"""
+import asyncio
+import threading
+
 from langchain_core.documents import Document
 from langgraph.graph import END, START, StateGraph
 from functools import partial
+from src.config import (
+    ADAPTIVE_K_BUDGET,
+    ADAPTIVE_K_START,
+    ADAPTIVE_K_STEP,
+    ADAPTIVE_MIN_RELEVANT,
+    ADAPTIVE_RETRIEVAL,
+    EARLY_EXIT_MIN_RELEVANT,
+    GRADE_EARLY_EXIT,
+    SPECULATIVE_WEB_SEARCH,
+)
+from src.context import pack_context
+from src.grading import (
+    agrade_page,
+    get_grade_cache,
+    grade_page,
+    new_grading_stats,
+    should_widen,
+)
+from src.retrieval import rank_candidates
 from src.core import (
     GraphState,
     create_rag_chain,
@@ -14,46 +44,146 @@ from src.core import (
 
 # ========== Node Functions ==========
 
-def retrieve(state, retriever):
-    """Retrieve documents based on the question"""
+def _start_speculation(question, speculator) -> dict:
+    if speculator is None:
+        return {}
+    speculation_id = speculator.start(question)
+    if speculation_id:
+        print("---SPECULATIVE WEB SEARCH STARTED---")
+        return {"speculation_id": speculation_id}
+    return {"speculation": {"outcome": "capped", "totals": speculator.stats()}}
+
+
+def _rank(retriever, question):
+    """(candidates, next_k) — the candidate pool and the first grading window."""
+    if ADAPTIVE_RETRIEVAL:
+        candidates = rank_candidates(retriever, question, ADAPTIVE_K_BUDGET)
+        return candidates, min(ADAPTIVE_K_START, len(candidates))
+    candidates = retriever.invoke(question)
+    return candidates, len(candidates)
+
+
+def _retrieved(question, candidates, next_k, speculation) -> dict:
+    return {
+        "documents": candidates[:next_k],
+        "question": question,
+        "candidates": candidates,
+        "graded_count": 0,
+        "next_k": next_k,
+        "irrelevant_count": 0,
+        "grading_stats": new_grading_stats(),
+        **speculation,
+    }
+
+
+def retrieve(state, retriever, speculator=None):
+    """Retrieve documents based on the question.
+
+    With adaptive-k on, a deeper candidate pool (ADAPTIVE_K_BUDGET) is ranked
+    once and only the first ADAPTIVE_K_START are handed to grading.  In
+    speculative mode the web rewrite + search is started here so it runs
+    while grading does.
+    """
     print("---RETRIEVE---")
     question = state["question"]
-    documents = retriever.invoke(question)
-    return {"documents": documents, "question": question}
+    speculation = _start_speculation(question, speculator)
+    candidates, next_k = _rank(retriever, question)
+    return _retrieved(question, candidates, next_k, speculation)
 
 
-def grade_documents(state, retrieval_grader):
+async def aretrieve(state, retriever, speculator=None):
+    """Async :func:`retrieve` (the local vector search runs on a worker thread)."""
+    print("---RETRIEVE---")
+    question = state["question"]
+    speculation = _start_speculation(question, speculator)
+    candidates, next_k = await asyncio.to_thread(_rank, retriever, question)
+    return _retrieved(question, candidates, next_k, speculation)
+
+
+def grade_documents(state, retrieval_grader, grade_cache=None):
     """Grade document relevance to the question.
 
+    Grades the next page of candidates (``graded_count`` → ``next_k``)
+    concurrently and accumulates the relevant ones in ``documents``.
+
     Web search is only triggered when the *majority* of retrieved documents
     are irrelevant (irrelevant_count > relevant_count).  When some documents
     are irrelevant but the majority are still relevant, the graph generates
     from local docs and the CLI can offer the user an optional web follow-up.
+    With adaptive-k, a page that already yielded ADAPTIVE_MIN_RELEVANT
+    relevant chunks never falls back to the web.  Verdicts already in the
+    grade cache are reused without an LLM call.
+
+    With GRADE_EARLY_EXIT on, grading stops as soon as the web decision is
+    settled and EARLY_EXIT_MIN_RELEVANT relevant chunks are in hand; the
+    remaining chunks are dropped ungraded.
     """
     print("---CHECK DOCUMENTS RELEVANCE TO QUESTION---")
+    page, stop_when, stats = _grading_pass(state)
+    verdicts = grade_page(
+        retrieval_grader, state["question"], page,
+        stats=stats, cache=grade_cache, stop_when=stop_when,
+    )
+    return _apply_grades(state, page, verdicts, stats)
+
+
+async def agrade_documents(state, retrieval_grader, grade_cache=None):
+    """Async :func:`grade_documents`."""
+    print("---CHECK DOCUMENTS RELEVANCE TO QUESTION---")
+    page, stop_when, stats = _grading_pass(state)
+    verdicts = await agrade_page(
+        retrieval_grader, state["question"], page,
+        stats=stats, cache=grade_cache, stop_when=stop_when,
+    )
+    return _apply_grades(state, page, verdicts, stats)
+
+
+def _grading_pass(state):
+    """(page, stop_when, stats) for the next grading pass over ``candidates``."""
+    candidates = state.get("candidates", state["documents"])
+    graded = state.get("graded_count", 0)
+    next_k = state.get("next_k", len(candidates))
+    stats = dict(state.get("grading_stats") or new_grading_stats())
+
+    stop_when = None
+    if GRADE_EARLY_EXIT:
+        stop_when = partial(
+            _decision_settled,
+            relevant_before=len(state["documents"]) if graded else 0,
+            irrelevant_before=state.get("irrelevant_count", 0),
+            total=next_k,
+        )
+    return candidates[graded:next_k], stop_when, stats
+
+
+def _apply_grades(state, page, verdicts, stats) -> dict:
+    """Fold one page of verdicts into the state and make the web decision."""
     question = state["question"]
-    documents = state["documents"]
+    graded = state.get("graded_count", 0)
+    next_k = state.get("next_k", len(state.get("candidates", state["documents"])))
 
-    filtered_docs = []
-    irrelevant_count = 0
+    # First pass starts from scratch; later passes extend the relevant set
+    filtered_docs = list(state["documents"]) if graded else []
+    irrelevant_count = state.get("irrelevant_count", 0)
 
-    for doc in documents:
-        score = retrieval_grader.invoke({
-            "question": question,
-            "document": doc.page_content
-        })
-        grade = score.binary_score
-        if grade == 'yes':
+    ungraded = 0
+    for doc, relevant in zip(page, verdicts):
+        if relevant is None:
+            ungraded += 1
+        elif relevant:
             print("---GRADE: DOCUMENT RELEVANT---")
             filtered_docs.append(doc)
         else:
             print("---GRADE: DOCUMENT NOT RELEVANT---")
             irrelevant_count += 1
+    if ungraded:
+        print(f"---EARLY EXIT: SKIPPED GRADING {ungraded} DOCUMENT(S)---")
 
-    total = len(documents)
+    total = next_k - ungraded
+    enough_local = ADAPTIVE_RETRIEVAL and len(filtered_docs) >= ADAPTIVE_MIN_RELEVANT
     # Only force web search when the majority of docs are irrelevant
     # (i.e. more irrelevant than relevant)
-    if irrelevant_count > total / 2:
+    if irrelevant_count > total / 2 and not enough_local:
         print(f"---MAJORITY IRRELEVANT ({irrelevant_count}/{total}): WILL SEARCH WEB---")
         web_search = "Yes"
     elif irrelevant_count > 0:
@@ -68,53 +198,151 @@ def grade_documents(state, retrieval_grader):
         "web_search": web_search,
         "irrelevant_count": irrelevant_count,
         "total_retrieved": total,
+        "graded_count": next_k,
+        "grading_stats": stats,
     }
 
 
-def transform_query(state, question_rewriter):
-    """Optimize the query for web search"""
+def _decision_settled(
+    verdicts, relevant_before: int, irrelevant_before: int, total: int
+) -> bool:
+    """True once grading the rest of the page can no longer change the outcome.
+
+    The web decision is settled on "no" when enough local chunks are relevant
+    or even all-irrelevant remaining chunks could not form a majority; we
+    also want EARLY_EXIT_MIN_RELEVANT chunks for the generation context.
+    """
+    relevant = relevant_before + sum(v is True for v in verdicts)
+    irrelevant = irrelevant_before + sum(v is False for v in verdicts)
+    remaining = sum(v is None for v in verdicts)
+    enough_local = ADAPTIVE_RETRIEVAL and relevant >= ADAPTIVE_MIN_RELEVANT
+    web_settled = enough_local or irrelevant + remaining <= total / 2
+    return web_settled and relevant >= EARLY_EXIT_MIN_RELEVANT
+
+
+def widen_retrieval(state):
+    """Move the grading window to the next page of candidates."""
+    next_k = min(state["graded_count"] + ADAPTIVE_K_STEP, len(state["candidates"]))
+    print(f"---WIDEN RETRIEVAL: k={next_k}---")
+    return {"next_k": next_k}
+
+
+def _speculative_rewrite(state, speculator, result, saved) -> dict:
+    better_question, web_results = result
+    print(f"---USING SPECULATIVE WEB SEARCH (saved {saved:.2f}s)---")
+    return {
+        "question": better_question,
+        "documents": state["documents"],
+        "web_results": web_results,
+        "speculation": {
+            "outcome": "used", "saved_seconds": saved, "totals": speculator.stats(),
+        },
+    }
+
+
+def transform_query(state, question_rewriter, speculator=None):
+    """Optimize the query for web search (reusing a speculative rewrite if one ran)"""
     print("---TRANSFORM QUERY---")
     question = state["question"]
     documents = state["documents"]
+    if speculator is not None and state.get("speculation_id"):
+        result, saved = speculator.take(state["speculation_id"])
+        if result is not None:
+            return _speculative_rewrite(state, speculator, result, saved)
     better_question = question_rewriter.invoke({"question": question})
     return {"question": better_question, "documents": documents}
 
 
-def web_search(state, web_search_tool):
-    """Perform web search to supplement documents"""
-    print("---WEB SEARCH---")
+async def atransform_query(state, question_rewriter, speculator=None):
+    """Async :func:`transform_query`."""
+    print("---TRANSFORM QUERY---")
     question = state["question"]
     documents = state["documents"]
-    
-    docs = web_search_tool.invoke({"query": question})
+    if speculator is not None and state.get("speculation_id"):
+        result, saved = await asyncio.to_thread(speculator.take, state["speculation_id"])
+        if result is not None:
+            return _speculative_rewrite(state, speculator, result, saved)
+    better_question = await question_rewriter.ainvoke({"question": question})
+    return {"question": better_question, "documents": documents}
+
+
+def _with_web_results(state, docs) -> dict:
+    documents = state["documents"]
     web_results = "\n".join(d["content"] for d in docs)
     web_results = Document(page_content=web_results)
     documents.append(web_results)
-    
-    return {"documents": documents, "question": question}
+    return {"documents": documents, "question": state["question"]}
+
+
+def web_search(state, web_search_tool):
+    """Perform web search to supplement documents"""
+    print("---WEB SEARCH---")
+    docs = state.get("web_results")
+    if docs is None:
+        docs = web_search_tool.invoke({"query": state["question"]})
+    return _with_web_results(state, docs)
 
 
-def generate(state, rag_chain):
-    """Generate answer using RAG"""
+async def aweb_search(state, web_search_tool):
+    """Async :func:`web_search`."""
+    print("---WEB SEARCH---")
+    docs = state.get("web_results")
+    if docs is None:
+        docs = await web_search_tool.ainvoke({"query": state["question"]})
+    return _with_web_results(state, docs)
+
+
+def _prepare_generation(state, speculator):
+    """Pack the context and settle any leftover speculation.
+
+    Returns ``(chain inputs, partial state update)``.
+    """
+    # A speculative web search that wasn't needed is thrown away
+    update = {"documents": state["documents"], "question": state["question"]}
+    if speculator is not None and speculator.discard(state.get("speculation_id")):
+        update["speculation"] = {"outcome": "discarded", "totals": speculator.stats()}
+
+    context, context_report = pack_context(state["documents"])
+    print(
+        f"---CONTEXT: {context_report['kept']} CHUNKS, "
+        f"{context_report['tokens']}/{context_report['budget']} TOKENS---"
+    )
+    update["context_report"] = context_report
+    return {"context": context, "question": state["question"]}, update
+
+
+def generate(state, rag_chain, speculator=None):
+    """Generate answer using RAG
+
+    Documents are packed into a compact, de-duplicated, token-budgeted
+    context first (see src/context.py).
+    """
     print("---GENERATE---")
-    question = state["question"]
-    documents = state["documents"]
-    
-    generation = rag_chain.invoke({
-        "context": documents, 
-        "question": question
-    })
-    
-    return {
-        "documents": documents,
-        "question": question,
-        "generation": generation
-    }
+    inputs, update = _prepare_generation(state, speculator)
+    # Streamed so callers using stream_mode="messages" see tokens as they arrive
+    generation = "".join(rag_chain.stream(inputs))
+    return {**update, "generation": generation}
+
+
+async def agenerate(state, rag_chain, speculator=None):
+    """Async :func:`generate`."""
+    print("---GENERATE---")
+    inputs, update = _prepare_generation(state, speculator)
+    generation = "".join([chunk async for chunk in rag_chain.astream(inputs)])
+    return {**update, "generation": generation}
 
 
 def decide_to_generate(state):
-    """Decide whether to generate an answer or transform query for web search"""
+    """Decide whether to widen retrieval, generate an answer, or transform query for web search"""
     print("---ASSESS GRADED DOCUMENTS---")
+    if ADAPTIVE_RETRIEVAL and should_widen(
+        len(state["documents"]),
+        state.get("graded_count", 0),
+        len(state.get("candidates", [])),
+    ):
+        print("---DECISION: TOO FEW RELEVANT DOCUMENTS. WIDEN RETRIEVAL---")
+        return "widen_retrieval"
+
     web_search = state["web_search"]
     
     if web_search == "Yes":
@@ -127,24 +355,50 @@ def decide_to_generate(state):
 
 # ========== Graph Compilation ==========
 
-def create_graph():
-    """Create and compile the LangGraph workflow"""
+def create_graph(use_async: bool = False):
+    """Create and compile the LangGraph workflow
+
+    Args:
+        use_async: Compile the async nodes instead; drive the result with
+            ``astream``/``ainvoke``.  Concurrent runs on one event loop share
+            the OpenAI connection pool (see ``config.get_async_http_client``).
+    """
     # Initialize components
     retriever = create_vectorstore()
     rag_chain = create_rag_chain()
     retrieval_grader = create_retrieval_grader()
+    grade_cache = get_grade_cache()
     question_rewriter = create_question_rewriter()
     web_search_tool = get_web_search_tool()
+    speculator = None
+    if SPECULATIVE_WEB_SEARCH:
+        from src.cache import DiskCache
+        from src.speculation import SpeculativeWebSearch
+
+        speculator = SpeculativeWebSearch(
+            question_rewriter, web_search_tool, store=DiskCache("speculation", 16),
+        )
+
+    if use_async:
+        nodes = (aretrieve, agrade_documents, atransform_query, agenerate, aweb_search)
+    else:
+        nodes = (retrieve, grade_documents, transform_query, generate, web_search)
+    retrieve_node, grade_node, transform_node, generate_node, web_search_node = nodes
     
     # Create workflow
     workflow = StateGraph(GraphState)
     
     # Add nodes with dependencies injected
-    workflow.add_node("retrieve", partial(retrieve, retriever=retriever))
-    workflow.add_node("grade_documents", partial(grade_documents, retrieval_grader=retrieval_grader))
-    workflow.add_node("transform_query", partial(transform_query, question_rewriter=question_rewriter))
-    workflow.add_node("generate", partial(generate, rag_chain=rag_chain))
-    workflow.add_node("web_search", partial(web_search, web_search_tool=web_search_tool))
+    workflow.add_node("retrieve", partial(retrieve_node, retriever=retriever, speculator=speculator))
+    workflow.add_node("grade_documents", partial(
+        grade_node, retrieval_grader=retrieval_grader, grade_cache=grade_cache,
+    ))
+    workflow.add_node("transform_query", partial(
+        transform_node, question_rewriter=question_rewriter, speculator=speculator,
+    ))
+    workflow.add_node("generate", partial(generate_node, rag_chain=rag_chain, speculator=speculator))
+    workflow.add_node("web_search", partial(web_search_node, web_search_tool=web_search_tool))
+    workflow.add_node("widen_retrieval", widen_retrieval)
     
     # Build graph edges
     workflow.add_edge(START, "retrieve")
@@ -153,12 +407,30 @@ def create_graph():
         "grade_documents", 
         decide_to_generate,
         {
+            "widen_retrieval": "widen_retrieval",
             "transform_query": "transform_query",
             "generate": "generate",
         },
     )
+    workflow.add_edge("widen_retrieval", "grade_documents")
     workflow.add_edge("transform_query", "web_search")
     workflow.add_edge("web_search", "generate")
     workflow.add_edge("generate", END)
     
     return workflow.compile()
+
+
+_graphs: dict[bool, object] = {}
+_graphs_lock = threading.Lock()
+
+
+def get_graph(use_async: bool = False):
+    """The process-wide compiled RAG graph, built on first use.
+
+    The graph holds no per-request state (no checkpointer), so every
+    request — CLI, daemon, benchmark — can share it.
+    """
+    with _graphs_lock:
+        if use_async not in _graphs:
+            _graphs[use_async] = create_graph(use_async=use_async)
+        return _graphs[use_async]
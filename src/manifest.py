@@ -0,0 +1,153 @@
+"""Index manifest — a small JSON summary written alongside the vector index.
+
+``ai rag status`` reads ``chroma_db/manifest.json`` instead of opening Chroma
+and walking the index directory, so it is instant and needs no API keys.
+``ai rag status --deep`` re-counts the live store and reports any drift.
+
+Manifest fields:
+    format                  manifest schema version
+    index_version           bumped on every rebuild
+    built_at                ISO-8601 UTC build time
+    embedding_model         embedding model used for the index
+    layout                  "single" or "sharded"
+    total_chunks            chunk count
+    chunks_by_source        {source filename: chunks}
+    chunks_by_content_type  {"text" | "heading" | "table" | "image_description": chunks}
+    shards                  {shard name: chunks}   (sharded layout only)
+    bytes                   total on-disk size of the index
+"""
+from __future__ import annotations
+
+import json
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FORMAT = 1
+COLLECTION_NAME = "rag-chroma"
+
+
+def manifest_path(persist_dir: Path) -> Path:
+    return persist_dir / MANIFEST_NAME
+
+
+def read_manifest(persist_dir: Path) -> dict | None:
+    """Load the manifest, or None if missing/unreadable."""
+    try:
+        return json.loads(manifest_path(persist_dir).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _dir_bytes(path: Path) -> int:
+    return sum(
+        f.stat().st_size for f in path.rglob("*") if f.is_file() and f.name != MANIFEST_NAME
+    )
+
+
+def build_manifest(
+    persist_dir: Path,
+    doc_splits: list,
+    embedding_model: str,
+    shards: dict[str, int] | None = None,
+    previous: dict | None = None,
+) -> dict:
+    """Summarise a freshly built index (call after the store is written)."""
+    return {
+        "format": MANIFEST_FORMAT,
+        "index_version": (previous or {}).get("index_version", 0) + 1,
+        "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "embedding_model": embedding_model,
+        "layout": "sharded" if shards else "single",
+        "total_chunks": len(doc_splits),
+        "chunks_by_source": dict(sorted(Counter(
+            d.metadata.get("source", "unknown") for d in doc_splits
+        ).items())),
+        "chunks_by_content_type": dict(sorted(Counter(
+            d.metadata.get("content_type") or "text" for d in doc_splits
+        ).items())),
+        "shards": dict(sorted((shards or {}).items())),
+        "bytes": _dir_bytes(persist_dir),
+    }
+
+
+def write_manifest(persist_dir: Path, manifest: dict) -> None:
+    """Atomically write the manifest next to the index."""
+    path = manifest_path(persist_dir)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(path)
+
+
+# ── Deep verification ───────────────────────────────────────────
+
+def _live_counts(store_dir: Path) -> tuple[int, Counter]:
+    """(total chunks, chunks per source) straight from a Chroma directory.
+
+    Uses chromadb directly so no embedding client (or API key) is needed.
+    """
+    import chromadb
+
+    client = chromadb.PersistentClient(path=str(store_dir))
+    try:
+        collection = client.get_collection(COLLECTION_NAME)
+        total = collection.count()
+        per_source: Counter = Counter()
+        page = 5000
+        for offset in range(0, total, page):
+            batch = collection.get(include=["metadatas"], limit=page, offset=offset)
+            per_source.update((m or {}).get("source", "unknown") for m in batch["metadatas"])
+        return total, per_source
+    finally:
+        client.close()
+
+
+def verify_manifest(persist_dir: Path, manifest: dict) -> dict:
+    """Recount the live store and compare with the manifest.
+
+    Returns ``{"total_chunks", "bytes", "shards", "problems": [str, ...]}``.
+    """
+    from src.sharding import list_shards, shards_root
+
+    problems: list[str] = []
+    live_sources: Counter = Counter()
+    live_shards: dict[str, int] = {}
+
+    if shards_root(persist_dir).exists():
+        for name in list_shards(persist_dir):
+            try:
+                count, per_source = _live_counts(shards_root(persist_dir) / name)
+            except Exception as e:
+                problems.append(f"shard {name} unreadable: {e}")
+                continue
+            live_shards[name] = count
+            live_sources.update(per_source)
+        for name in sorted(set(manifest.get("shards", {})) - set(live_shards)):
+            problems.append(f"shard {name} listed in manifest but missing")
+    else:
+        _, live_sources = _live_counts(persist_dir)
+
+    live_total = sum(live_sources.values())
+    if live_total != manifest.get("total_chunks"):
+        problems.append(
+            f"total chunks: manifest {manifest.get('total_chunks')}, live {live_total}"
+        )
+    expected_sources = manifest.get("chunks_by_source", {})
+    for source in sorted(set(expected_sources) | set(live_sources)):
+        if expected_sources.get(source, 0) != live_sources.get(source, 0):
+            problems.append(
+                f"{source}: manifest {expected_sources.get(source, 0)}, "
+                f"live {live_sources.get(source, 0)}"
+            )
+    for name, count in live_shards.items():
+        expected = manifest.get("shards", {}).get(name)
+        if expected is not None and expected != count:
+            problems.append(f"shard {name}: manifest {expected}, live {count}")
+
+    return {
+        "total_chunks": live_total,
+        "bytes": _dir_bytes(persist_dir),
+        "shards": live_shards,
+        "problems": problems,
+    }
@@ -0,0 +1,171 @@
+"""Local pre-grading — decide clear-cut chunks without an LLM call.
+
+Many retrieved chunks are obviously relevant (very close to the query and
+containing its keywords) or obviously not (far away, no shared keywords).
+:func:`pregrade` scores a whole page at once from two features:
+
+    similarity  cosine similarity from the retrieval distance that
+                :func:`src.retrieval.rank_candidates` stamps on each chunk
+    overlap     share of the question's keywords present in the chunk
+
+and returns ``True`` / ``False`` for chunks outside the uncertain middle
+band, ``None`` for the rest (which go to the LLM grader).  Chunks without a
+retrieval distance are always uncertain.
+
+:func:`calibrate` measures agreement with LLM-graded labels so the
+thresholds in ``src/config.py`` can be tuned (``ai rag calibrate-pregrade``).
+"""
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.config import (
+    PREGRADE_ACCEPT_OVERLAP,
+    PREGRADE_ACCEPT_SIMILARITY,
+    PREGRADE_REJECT_OVERLAP,
+    PREGRADE_REJECT_SIMILARITY,
+)
+
+# Metadata key holding the raw vector-store distance (set at ranking time)
+DISTANCE_KEY = "retrieval_distance"
+
+_WORD = re.compile(r"[^\W_]+", re.UNICODE)
+_STOPWORDS = frozenset("""
+    the and for are but not you all any can had her was one our out has him his how
+    its let may new now old see two way who did get got use what when where which
+    while with would there their them then than this that these those from into
+    about does have just more most some such very will your been being also only
+    other over under why whom whose shall should could might must each both
+""".split())
+
+
+@dataclass(frozen=True)
+class PregradeThresholds:
+    accept_similarity: float = PREGRADE_ACCEPT_SIMILARITY
+    accept_overlap: float = PREGRADE_ACCEPT_OVERLAP
+    reject_similarity: float = PREGRADE_REJECT_SIMILARITY
+    reject_overlap: float = PREGRADE_REJECT_OVERLAP
+
+
+def keywords(text: str) -> set[str]:
+    """Lower-cased content words (3+ letters, stopwords dropped)."""
+    return {
+        w for w in (m.lower() for m in _WORD.findall(text))
+        if len(w) > 2 and w not in _STOPWORDS
+    }
+
+
+def similarity_from_distance(distance):
+    """Cosine similarity from a Chroma distance.
+
+    Chroma's default space is squared L2; OpenAI embeddings are unit-norm, so
+    ``d = 2 - 2·cos``.
+    """
+    return 1.0 - distance / 2.0
+
+
+def features(question: str, docs: list[Document]) -> tuple[np.ndarray, np.ndarray]:
+    """``(similarity, overlap)`` arrays for a page; similarity is NaN when unknown."""
+    distances = np.array(
+        [doc.metadata.get(DISTANCE_KEY, np.nan) for doc in docs], dtype=np.float64
+    )
+    similarity = similarity_from_distance(distances)
+
+    query_words = keywords(question)
+    if not query_words:
+        return similarity, np.zeros(len(docs))
+    overlap = np.array(
+        [len(query_words & keywords(doc.page_content)) for doc in docs], dtype=np.float64
+    ) / len(query_words)
+    return similarity, overlap
+
+
+def pregrade(
+    question: str,
+    docs: list[Document],
+    thresholds: PregradeThresholds | None = None,
+) -> list[bool | None]:
+    """Local verdicts for ``docs``: True/False when clear-cut, None when uncertain."""
+    if not docs:
+        return []
+    t = thresholds or PregradeThresholds()
+    similarity, overlap = features(question, docs)
+    # NaN similarity compares False on both sides → uncertain
+    accept = (similarity >= t.accept_similarity) & (overlap >= t.accept_overlap)
+    reject = (similarity <= t.reject_similarity) & (overlap <= t.reject_overlap)
+    return [
+        True if a else False if r else None
+        for a, r in zip(accept.tolist(), reject.tolist())
+    ]
+
+
+# ── Calibration ─────────────────────────────────────────────────
+
+def load_labelled(path: Path) -> list[tuple[str, Document, bool]]:
+    """Read a labelled set: JSONL of ``{"question", "text", "distance", "label"}``."""
+    items = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        row = json.loads(line)
+        metadata = {} if row.get("distance") is None else {DISTANCE_KEY: row["distance"]}
+        items.append((
+            row["question"],
+            Document(page_content=row["text"], metadata=metadata),
+            str(row["label"]).lower() in ("yes", "true", "1"),
+        ))
+    return items
+
+
+def save_labelled(path: Path, items: list[tuple[str, Document, bool]]) -> None:
+    with path.open("w", encoding="utf-8") as f:
+        for question, doc, label in items:
+            f.write(json.dumps({
+                "question": question,
+                "text": doc.page_content,
+                "distance": doc.metadata.get(DISTANCE_KEY),
+                "label": "yes" if label else "no",
+            }, ensure_ascii=False) + "\n")
+
+
+def calibrate(
+    items: list[tuple[str, Document, bool]],
+    thresholds: PregradeThresholds | None = None,
+) -> dict:
+    """Compare local verdicts with LLM labels.
+
+    Returns counts (``accepted``, ``rejected``, ``uncertain``, ``false_accepts``,
+    ``false_rejects``), ``coverage`` (share decided locally, i.e. LLM calls
+    saved) and ``agreement`` (share of local decisions matching the label).
+    """
+    by_question: dict[str, list[tuple[Document, bool]]] = {}
+    for question, doc, label in items:
+        by_question.setdefault(question, []).append((doc, label))
+
+    report = {
+        "total": len(items), "accepted": 0, "rejected": 0, "uncertain": 0,
+        "false_accepts": 0, "false_rejects": 0,
+    }
+    for question, rows in by_question.items():
+        verdicts = pregrade(question, [doc for doc, _ in rows], thresholds)
+        for verdict, (_, label) in zip(verdicts, rows):
+            if verdict is None:
+                report["uncertain"] += 1
+            elif verdict:
+                report["accepted"] += 1
+                report["false_accepts"] += not label
+            else:
+                report["rejected"] += 1
+                report["false_rejects"] += label
+
+    decided = report["accepted"] + report["rejected"]
+    wrong = report["false_accepts"] + report["false_rejects"]
+    report["coverage"] = decided / len(items) if items else 0.0
+    report["agreement"] = (decided - wrong) / decided if decided else 1.0
+    return report
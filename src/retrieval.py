@@ -0,0 +1,146 @@
+"""Retrieval strategies layered over the Chroma store(s).
+
+MMR (maximal marginal relevance) over-fetches ``fetch_k`` nearest chunks,
+then greedily picks ``k`` of them that are relevant to the query but not
+redundant with each other.  Our books contain many near-duplicate passages,
+and every chunk returned costs a grader call, so a smaller, more diverse set
+gives better coverage for the same grading/generation budget.
+
+The whole selection runs on one NumPy similarity matrix: candidate×candidate
+cosine similarities are computed once and the greedy loop only updates a
+running "max similarity to anything selected" vector.
+"""
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from src.config import MMR_FETCH_K, MMR_K, MMR_LAMBDA
+from src.pregrade import DISTANCE_KEY
+
+# (document, squared L2 distance, embedding) — lower distance is better
+Candidate = tuple[Document, float, Any]
+
+
+def query_with_embeddings(store, query_vector: list[float], k: int) -> list[Candidate]:
+    """Nearest ``k`` chunks from one Chroma store, with their stored embeddings."""
+    results = store._collection.query(
+        query_embeddings=[query_vector],
+        n_results=k,
+        include=["documents", "metadatas", "distances", "embeddings"],
+    )
+    texts = results["documents"][0]
+    metadatas = results["metadatas"][0]
+    distances = results["distances"][0]
+    embeddings = results["embeddings"][0]
+    return [
+        (Document(page_content=text, metadata=meta or {}), dist, emb)
+        for text, meta, dist, emb in zip(texts, metadatas, distances, embeddings)
+    ]
+
+
+def mmr_select(
+    query_vector,
+    candidate_vectors,
+    k: int,
+    lambda_mult: float = MMR_LAMBDA,
+) -> list[int]:
+    """Indices of ``k`` candidates chosen by maximal marginal relevance.
+
+    ``lambda_mult`` trades relevance (1.0) against diversity (0.0).
+    """
+    if len(candidate_vectors) == 0 or k <= 0:
+        return []
+
+    X = np.array(candidate_vectors, dtype=np.float32)
+    q = np.array(query_vector, dtype=np.float32)
+    X /= np.maximum(np.linalg.norm(X, axis=1, keepdims=True), 1e-12)
+    q /= max(float(np.linalg.norm(q)), 1e-12)
+
+    query_sim = X @ q    # (n,)   relevance of each candidate
+    pair_sim = X @ X.T   # (n, n) the one similarity matrix
+
+    first = int(np.argmax(query_sim))
+    selected = [first]
+    redundancy = pair_sim[first].copy()  # max similarity to anything selected
+
+    for _ in range(min(k, len(X)) - 1):
+        scores = lambda_mult * query_sim - (1.0 - lambda_mult) * redundancy
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        np.maximum(redundancy, pair_sim[best], out=redundancy)
+
+    return selected
+
+
+class MMRRetriever(BaseRetriever):
+    """Over-fetch ``fetch_k`` candidates, return ``k`` diverse ones via MMR.
+
+    ``store`` is either a Chroma vectorstore or a
+    :class:`~src.sharding.ShardedRetriever` (which fans the candidate fetch
+    out over its shards).
+    """
+
+    store: Any
+    k: int = MMR_K
+    fetch_k: int = MMR_FETCH_K
+    lambda_mult: float = MMR_LAMBDA
+
+    def candidates(
+        self, query: str, fetch_k: int | None = None
+    ) -> tuple[list[float], list[Candidate]]:
+        """Embed ``query`` once and fetch its ``fetch_k`` nearest candidates."""
+        query_vector = self.store.embeddings.embed_query(query)
+        fetch_k = fetch_k or self.fetch_k
+        by_vector = getattr(self.store, "candidates_by_vector", None)
+        if by_vector is not None:
+            return query_vector, by_vector(query_vector, fetch_k)
+        return query_vector, query_with_embeddings(self.store, query_vector, fetch_k)
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        query_vector, candidates = self.candidates(query)
+        picks = mmr_select(
+            query_vector,
+            [emb for _, _, emb in candidates],
+            self.k,
+            self.lambda_mult,
+        )
+        return [candidates[i][0] for i in picks]
+
+
+def _with_distance(doc: Document, distance: float) -> Document:
+    doc.metadata[DISTANCE_KEY] = float(distance)
+    return doc
+
+
+def rank_candidates(retriever, query: str, k: int) -> list[Document]:
+    """Top ``k`` documents from any of our retrievers, best first.
+
+    Used by adaptive-k grading, which needs a deeper ranking than the
+    retriever's own fixed ``k``.  MMR selection is greedy, so the first
+    ``n`` picks of a larger selection are exactly the size-``n`` selection.
+
+    Each document's vector distance is recorded in its metadata
+    (``retrieval_distance``) for the local pre-grader.
+    """
+    if isinstance(retriever, MMRRetriever):
+        query_vector, candidates = retriever.candidates(query, max(retriever.fetch_k, k))
+        picks = mmr_select(
+            query_vector, [emb for _, _, emb in candidates], k, retriever.lambda_mult
+        )
+        return [_with_distance(candidates[i][0], candidates[i][1]) for i in picks]
+    if hasattr(retriever, "similarity_search_with_score"):  # ShardedRetriever
+        hits = retriever.similarity_search_with_score(query, k=k)
+        return [_with_distance(doc, dist) for doc, dist in hits]
+    vectorstore = getattr(retriever, "vectorstore", None)
+    if vectorstore is not None:
+        hits = vectorstore.similarity_search_with_score(query, k=k)
+        return [_with_distance(doc, dist) for doc, dist in hits]
+    return retriever.invoke(query)
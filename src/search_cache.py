@@ -0,0 +1,133 @@
+"""Web search cache — reuse search results across runs and commands.
+
+``search_web``, the researcher agent, the RAG ``web_search`` node,
+speculative search and the web-supplemented RAG answer all go through
+``get_web_search_tool()``, which now wraps the search tool in a
+:class:`CachedSearchTool`.  Results are stored on disk keyed by the
+normalised query (Unicode NFKC, case-folded, collapsed whitespace, no
+trailing punctuation) and the tool's result count.
+
+How long a result stays fresh depends on the query: time-sensitive queries
+("latest", "news", "today", a year, …) expire after
+``SEARCH_CACHE_TTL["fresh"]`` seconds, everything else after
+``SEARCH_CACHE_TTL["evergreen"]``.  The cache holds at most
+SEARCH_CACHE_SIZE result sets (least recently used are evicted).  Empty
+results and errors are never cached.  Hit / miss counters live in the
+store's own counters table, outside the result entries.  ``ai cache stats``
+/ ``ai cache clear`` inspect and empty it.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import re
+import threading
+import unicodedata
+
+from src.config import SEARCH_CACHE_ENABLED, SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL
+
+_FRESH = re.compile(
+    r"\b(?:latest|news|today|tonight|yesterday|tomorrow|now|current(?:ly)?|recent(?:ly)?"
+    r"|breaking|this (?:week|month|year)|live|price|stocks?|weather|score|trending"
+    r"|(?:19|20)\d\d)\b"
+)
+_TRAILING = re.compile(r"[\s?!.,;:]+$")
+
+
+def normalise_query(query: str) -> str:
+    text = " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+    return _TRAILING.sub("", text)
+
+
+def query_class(query: str) -> str:
+    """``"fresh"`` for time-sensitive queries, ``"evergreen"`` otherwise."""
+    return "fresh" if _FRESH.search(normalise_query(query)) else "evergreen"
+
+
+class SearchCache:
+    """Search results keyed by (normalised query, result count), TTL per query class."""
+
+    def __init__(self, store, ttl: dict[str, float] = SEARCH_CACHE_TTL):
+        self.store = store
+        self.ttl = ttl
+
+    @staticmethod
+    def key(query: str, k: int | None) -> str:
+        raw = f"{normalise_query(query)}\0{k}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def lookup(self, query: str, k: int | None) -> list | None:
+        hit = self.store.get(self.key(query, k))
+        self.store.increment("hits" if hit is not None else "misses")
+        return hit
+
+    def save(self, query: str, k: int | None, results) -> None:
+        if not isinstance(results, list) or not results:
+            return
+        self.store.set(self.key(query, k), results, ttl=self.ttl[query_class(query)])
+
+    def stats(self) -> dict:
+        """``entries``, plus cumulative ``hits`` / ``misses`` across runs."""
+        counters = self.store.counters()
+        return {
+            "entries": len(self.store),
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+        }
+
+    def clear(self) -> int:
+        """Drop every cached result and reset the counters; returns results removed."""
+        self.store.reset_counters()
+        return self.store.clear()
+
+
+class CachedSearchTool:
+    """Search tool wrapper answering repeated queries from a :class:`SearchCache`.
+
+    Exposes the ``invoke`` / ``ainvoke`` calls the pipelines use, with the
+    same ``{"query": ...}`` (or plain string) input.
+    """
+
+    def __init__(self, tool, cache: SearchCache):
+        self.tool = tool
+        self.cache = cache
+        self.k = getattr(tool, "max_results", None)
+
+    @staticmethod
+    def _query(tool_input) -> str:
+        return tool_input["query"] if isinstance(tool_input, dict) else str(tool_input)
+
+    def invoke(self, tool_input, config=None, **kwargs):
+        query = self._query(tool_input)
+        hit = self.cache.lookup(query, self.k)
+        if hit is not None:
+            return hit
+        results = self.tool.invoke(tool_input, config, **kwargs)
+        self.cache.save(query, self.k, results)
+        return results
+
+    async def ainvoke(self, tool_input, config=None, **kwargs):
+        query = self._query(tool_input)
+        hit = await asyncio.to_thread(self.cache.lookup, query, self.k)
+        if hit is not None:
+            return hit
+        results = await self.tool.ainvoke(tool_input, config, **kwargs)
+        await asyncio.to_thread(self.cache.save, query, self.k, results)
+        return results
+
+
+_search_cache: SearchCache | None = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache | None:
+    """The process-wide search cache (None when SEARCH_CACHE_ENABLED is off)."""
+    global _search_cache
+    if not SEARCH_CACHE_ENABLED:
+        return None
+    with _search_cache_lock:
+        if _search_cache is None:
+            from src.cache import DiskCache
+
+            _search_cache = SearchCache(DiskCache("search", SEARCH_CACHE_SIZE))
+        return _search_cache
@@ -0,0 +1,272 @@
+"""Sharded vector index — one Chroma store per book, searched in parallel.
+
+Layout on disk::
+
+    chroma_db/
+    └── shards/
+        ├── book-stoicism-pdf/      # a large book gets a shard of its own
+        ├── book-deep-work-epub/
+        └── bucket-07/              # small books pooled by hash of their name
+
+Each shard is an independent persistent Chroma directory, so rebuilding or
+losing one book never touches the others.  Queries are embedded once, fanned
+out to every shard on a thread pool, and the per-shard top-k lists (already
+sorted by distance) are merged with a heap.  Shard handles are opened lazily
+and kept in a bounded LRU so memory stays flat with thousands of books.
+"""
+from __future__ import annotations
+
+import heapq
+import re
+import threading
+import zlib
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterator
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from src.config import (
+    MAX_OPEN_SHARDS,
+    SHARD_BUCKETS,
+    SHARD_SEARCH_WORKERS,
+    SMALL_BOOK_CHUNKS,
+)
+
+SHARDS_DIRNAME = "shards"
+COLLECTION_NAME = "rag-chroma"
+
+
+# ── Shard assignment ────────────────────────────────────────────
+
+def _slug(source: str) -> str:
+    """Filesystem-safe shard name fragment for a source filename."""
+    slug = re.sub(r"[^a-z0-9]+", "-", source.lower()).strip("-")
+    return slug[:80] or "untitled"
+
+
+def shard_key(
+    source: str,
+    chunk_count: int,
+    small_threshold: int = SMALL_BOOK_CHUNKS,
+    buckets: int = SHARD_BUCKETS,
+) -> str:
+    """Return the shard a book's chunks belong to.
+
+    Books with at least ``small_threshold`` chunks get a dedicated
+    ``book-<slug>`` shard; smaller ones share a ``bucket-NN`` shard chosen by
+    a stable CRC32 of the source name.
+    """
+    if chunk_count >= small_threshold:
+        return f"book-{_slug(source)}"
+    return f"bucket-{zlib.crc32(source.encode('utf-8')) % buckets:02d}"
+
+
+def group_into_shards(doc_splits: list[Document]) -> dict[str, list[Document]]:
+    """Partition chunks into shards keyed by :func:`shard_key`."""
+    counts = Counter(d.metadata.get("source", "unknown") for d in doc_splits)
+    shards: dict[str, list[Document]] = {}
+    for doc in doc_splits:
+        source = doc.metadata.get("source", "unknown")
+        shards.setdefault(shard_key(source, counts[source]), []).append(doc)
+    return shards
+
+
+def shards_root(persist_dir: Path) -> Path:
+    return persist_dir / SHARDS_DIRNAME
+
+
+def list_shards(persist_dir: Path) -> list[str]:
+    """Names of all shards present on disk (sorted for stable ordering)."""
+    root = shards_root(persist_dir)
+    if not root.exists():
+        return []
+    return sorted(p.name for p in root.iterdir() if p.is_dir())
+
+
+def build_shards(doc_splits: list[Document], persist_dir: Path, embedding) -> dict[str, int]:
+    """Embed and persist every shard.  Returns ``{shard name: chunk count}``."""
+    from langchain_community.vectorstores import Chroma
+
+    root = shards_root(persist_dir)
+    root.mkdir(parents=True, exist_ok=True)
+
+    shards = group_into_shards(doc_splits)
+    for name, docs in sorted(shards.items()):
+        print(f"  🧩 {name}: {len(docs)} chunks")
+        store = Chroma.from_documents(
+            documents=docs,
+            collection_name=COLLECTION_NAME,
+            embedding=embedding,
+            persist_directory=str(root / name),
+        )
+        close_store(store)
+    return {name: len(docs) for name, docs in sorted(shards.items())}
+
+
+# ── Lazy, bounded shard handles ─────────────────────────────────
+
+def close_store(store) -> None:
+    """Release a Chroma store's client (refcounted by chromadb).
+
+    Used for shards and by ``create_vectorstore`` before it moves a freshly
+    built index into place.
+    """
+    client = getattr(store, "_client", None)
+    close = getattr(client, "close", None)
+    if close is None:
+        return
+    try:
+        close()
+    except Exception:
+        pass
+
+
+class ShardPool:
+    """LRU cache of open shard stores.
+
+    ``acquire()`` leases a handle for the duration of a search.  A handle
+    evicted while leased is only closed once its last lease is returned, so
+    a concurrent query never sees its store closed underneath it.
+    """
+
+    def __init__(self, persist_dir: Path, embedding, max_open: int = MAX_OPEN_SHARDS):
+        self.root = shards_root(persist_dir)
+        self.embedding = embedding
+        self.max_open = max(1, max_open)
+        self._open: OrderedDict[str, Any] = OrderedDict()
+        self._leases: Counter[str] = Counter()
+        self._retired: dict[str, list[Any]] = {}
+        self._lock = threading.Lock()
+
+    def _open_store(self, name: str):
+        from langchain_community.vectorstores import Chroma
+
+        return Chroma(
+            collection_name=COLLECTION_NAME,
+            embedding_function=self.embedding,
+            persist_directory=str(self.root / name),
+        )
+
+    @contextmanager
+    def acquire(self, name: str) -> Iterator[Any]:
+        with self._lock:
+            store = self._open.get(name)
+            if store is not None:
+                self._open.move_to_end(name)
+            self._leases[name] += 1
+
+        if store is None:
+            # Opening touches disk — do it outside the lock.
+            try:
+                opened = self._open_store(name)
+            except BaseException:
+                with self._lock:
+                    self._release_locked(name)
+                raise
+            with self._lock:
+                store = self._open.get(name)
+                if store is None:
+                    store = opened
+                    self._open[name] = store
+                    self._evict_locked()
+                else:
+                    self._retired.setdefault(name, []).append(opened)
+        try:
+            yield store
+        finally:
+            with self._lock:
+                self._release_locked(name)
+
+    def _release_locked(self, name: str) -> None:
+        self._leases[name] -= 1
+        if self._leases[name] <= 0:
+            del self._leases[name]
+            for old in self._retired.pop(name, []):
+                close_store(old)
+
+    def _evict_locked(self) -> None:
+        while len(self._open) > self.max_open:
+            name, store = self._open.popitem(last=False)
+            if self._leases.get(name):
+                self._retired.setdefault(name, []).append(store)
+            else:
+                close_store(store)
+
+    def open_count(self) -> int:
+        with self._lock:
+            return len(self._open)
+
+    def close_all(self) -> None:
+        with self._lock:
+            for store in self._open.values():
+                close_store(store)
+            self._open.clear()
+
+
+# ── Fan-out retriever ───────────────────────────────────────────
+
+class ShardedRetriever(BaseRetriever):
+    """Retriever that searches every shard concurrently and heap-merges the top-k."""
+
+    pool: ShardPool
+    shard_names: list[str]
+    k: int = 4
+    max_workers: int = SHARD_SEARCH_WORKERS
+
+    @property
+    def embeddings(self):
+        return self.pool.embedding
+
+    def _search_shard(self, name: str, search) -> list:
+        try:
+            with self.pool.acquire(name) as store:
+                hits = search(store)
+        except Exception as e:
+            # One broken shard must not take the whole library offline.
+            print(f"  ⚠️  Shard {name} unavailable: {e}")
+            return []
+        for hit in hits:
+            hit[0].metadata.setdefault("shard", name)
+        return hits
+
+    def _fan_out(self, search, k: int) -> list:
+        """Run ``search(store)`` on every shard concurrently, heap-merge the top-k."""
+        if not self.shard_names:
+            return []
+        workers = max(1, min(self.max_workers, len(self.shard_names)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            per_shard = list(executor.map(
+                lambda name: self._search_shard(name, search),
+                self.shard_names,
+            ))
+
+        # Each list is already sorted by ascending distance → k-way heap merge.
+        return list(islice(heapq.merge(*per_shard, key=lambda hit: hit[1]), k))
+
+    def similarity_search_with_score(self, query: str, k: int | None = None):
+        """Return ``(Document, distance)`` pairs across all shards, best first."""
+        k = k or self.k
+        query_vector = self.embeddings.embed_query(query)
+        return self._fan_out(
+            lambda store: store.similarity_search_by_vector_with_relevance_scores(
+                query_vector, k=k
+            ),
+            k,
+        )
+
+    def candidates_by_vector(self, query_vector: list[float], k: int):
+        """``(Document, distance, embedding)`` triples across all shards (for MMR)."""
+        from src.retrieval import query_with_embeddings
+
+        return self._fan_out(lambda store: query_with_embeddings(store, query_vector, k), k)
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query)]
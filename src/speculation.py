@@ -0,0 +1,141 @@
+"""Speculative web search — rewrite + Tavily search started alongside grading.
+
+When most retrieved chunks turn out irrelevant, the RAG graph runs
+grade → transform_query → web_search → generate one step after another.  In
+speculative mode :class:`SpeculativeWebSearch` starts the rewrite and the
+search on a background thread as soon as retrieval finishes; grading carries
+on in parallel.  If the graph takes the web branch, ``transform_query`` /
+``web_search`` pick up the finished (or nearly finished) result; otherwise
+``generate`` throws it away.
+
+Speculation costs a rewrite call and a Tavily search every time it is
+thrown away, so starts are capped per rolling hour.  Counters (started,
+used, discarded, capped, seconds saved) persist in the cache directory so
+``ai rag ask -v`` can show how often speculation pays off.
+"""
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+
+from src.config import SPECULATIVE_MAX_PER_HOUR
+
+_WINDOW = 3600.0
+_COUNTERS = ("started", "used", "discarded", "capped", "failed", "saved_seconds")
+
+
+@dataclass
+class _Job:
+    question: str
+    started: float
+    future: Future | None = None
+    finished: float | None = None
+
+
+class SpeculativeWebSearch:
+    """Runs question rewrite + web search ahead of the graph's web branch."""
+
+    def __init__(
+        self,
+        question_rewriter,
+        web_search_tool,
+        max_per_hour: int = SPECULATIVE_MAX_PER_HOUR,
+        store=None,
+    ):
+        self.question_rewriter = question_rewriter
+        self.web_search_tool = web_search_tool
+        self.max_per_hour = max_per_hour
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="speculate")
+        self._jobs: dict[str, _Job] = {}
+        self._lock = threading.Lock()
+        self._memory = {"counters": dict.fromkeys(_COUNTERS, 0), "recent": []}
+
+    # ── Persistent counters / cap ───────────────────────────────
+
+    def _load(self, key: str):
+        if self.store is None:
+            return self._memory[key]
+        return self.store.get(key, self._memory[key])
+
+    def _save(self, key: str, value) -> None:
+        self._memory[key] = value
+        if self.store is not None:
+            self.store.set(key, value)
+
+    def _bump(self, **deltas: float) -> None:
+        counters = {**dict.fromkeys(_COUNTERS, 0), **self._load("counters")}
+        for name, delta in deltas.items():
+            counters[name] += delta
+        self._save("counters", counters)
+
+    def stats(self) -> dict:
+        """Cumulative counters: started, used, discarded, capped, failed, saved_seconds."""
+        with self._lock:
+            return {**dict.fromkeys(_COUNTERS, 0), **self._load("counters")}
+
+    # ── Lifecycle ───────────────────────────────────────────────
+
+    def _run(self, job: _Job) -> tuple[str, list]:
+        try:
+            better_question = self.question_rewriter.invoke({"question": job.question})
+            return better_question, self.web_search_tool.invoke({"query": better_question})
+        finally:
+            job.finished = time.perf_counter()
+
+    def start(self, question: str) -> str | None:
+        """Start speculating for ``question``; None when the hourly cap is hit."""
+        now = time.time()
+        with self._lock:
+            recent = [t for t in self._load("recent") if now - t < _WINDOW]
+            if len(recent) >= self.max_per_hour:
+                self._bump(capped=1)
+                return None
+            self._save("recent", recent + [now])
+            self._bump(started=1)
+
+            job_id = uuid.uuid4().hex
+            job = _Job(question=question, started=time.perf_counter())
+            job.future = self._executor.submit(self._run, job)
+            self._jobs[job_id] = job
+        return job_id
+
+    def take(self, job_id: str | None) -> tuple[tuple[str, list] | None, float]:
+        """Wait for a speculation the graph now needs.
+
+        Returns ``(result, seconds_saved)`` — ``result`` is
+        ``(rewritten_question, search_results)`` or None if it failed.
+        """
+        with self._lock:
+            job = self._jobs.pop(job_id, None) if job_id else None
+        if job is None:
+            return None, 0.0
+
+        asked = time.perf_counter()
+        try:
+            result = job.future.result()
+        except Exception:
+            with self._lock:
+                self._bump(failed=1)
+            return None, 0.0
+
+        # Serially the work would have started now and taken its full
+        # duration; we only waited for whatever was left of it.
+        duration = (job.finished or asked) - job.started
+        saved = max(0.0, min(duration, asked - job.started))
+        with self._lock:
+            self._bump(used=1, saved_seconds=saved)
+        return result, saved
+
+    def discard(self, job_id: str | None) -> bool:
+        """Throw a speculation away (the graph generated from local docs)."""
+        with self._lock:
+            job = self._jobs.pop(job_id, None) if job_id else None
+            if job is None:
+                return False
+            job.future.cancel()
+            self._bump(discarded=1)
+        return True
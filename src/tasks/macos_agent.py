@@ -489,46 +489,44 @@ def task_agent_node(state: dict) -> dict:
     the query, dispatches to the right function, and appends to agent_results.
     """
     from src.agents import AgentResult
+    from src.router import route
 
     query: str = state.get("translated_query") or state["query"]
-    q = query.lower()
+    routed = route(query)
+    params = routed.params
 
     result_text = ""
     sources: list[str] = []
 
     # ── Dispatch ────────────────────────────────────────────────
-    if _match_alarm(q):
-        time_str, title = _extract_alarm_params(query)
-        result_text = set_alarm(time_str, title)
+    if routed.task == "alarm":
+        result_text = set_alarm(params["time"], params["title"])
         sources = ["macOS Reminders"]
 
-    elif _match_create_event(q):
-        title, start, end, loc, notes = _extract_event_params(query)
-        result_text = create_calendar_event(title, start, end, loc, notes)
+    elif routed.task == "create_event":
+        result_text = create_calendar_event(
+            params["title"], params["start"], params["end"], params["location"], params["notes"],
+        )
         sources = ["macOS Calendar"]
 
-    elif _match_calendar(q):
-        date_str = _extract_date_param(query)
-        result_text = get_calendar_events(date_str)
+    elif routed.task == "calendar":
+        result_text = get_calendar_events(params["date"])
         sources = ["macOS Calendar"]
 
-    elif _match_note(q):
-        content, title = _extract_note_params(query)
-        result_text = write_note(content, title)
+    elif routed.task == "note":
+        result_text = write_note(params["content"], params["title"])
         sources = ["macOS Notes"]
 
-    elif _match_timer(q):
-        dur = _extract_duration(query)
-        result_text = run_timer(dur)
+    elif routed.task == "timer":
+        result_text = run_timer(params["duration"])
         sources = ["Python Timer"]
 
-    elif _match_stopwatch(q):
+    elif routed.task == "stopwatch":
         result_text = run_stopwatch()
         sources = ["Python Stopwatch"]
 
-    elif _match_world_clock(q):
-        city = _extract_city(query)
-        result_text = world_clock(city)
+    elif routed.task == "world_clock":
+        result_text = world_clock(params["city"])
         sources = ["World Clock"]
 
     else:
@@ -545,76 +543,25 @@ def task_agent_node(state: dict) -> dict:
         "confidence": "high" if any(result_text.startswith(p) for p in ("✅", "📅", "📝", "⏱️", "🌍")) else "low",
     }
 
-    prior = state.get("agent_results", [])
-    used = state.get("agents_used", [])
-
     return {
-        "agent_results": prior + [agent_result],
-        "agents_used": used + ["🖥️  Task Agent"],
+        "agent_results": [agent_result],
+        "agents_used": ["🖥️  Task Agent"],
     }
 
 
 # ═══════════════════════════════════════════════════════════════════
-#  Intent matchers  (public: matches_any_task)
+#  Intent matching  (public: matches_any_task; patterns live in src/router.py)
 # ═══════════════════════════════════════════════════════════════════
 
-def _match_alarm(text: str) -> bool:
-    return bool(re.search(
-        r"(set\s+(an?\s+)?alarm|set\s+(an?\s+)?reminder|remind\s+me|wake\s+me)",
-        text, re.I,
-    ))
-
-def _match_create_event(text: str) -> bool:
-    return bool(re.search(
-        r"(create|add|schedule|set up|book|make)\s+(an?\s+)?(event|meeting|appointment|call)",
-        text, re.I,
-    ))
-
-def _match_calendar(text: str) -> bool:
-    return bool(re.search(
-        r"(calendar|schedule|events?\s+(for|on|today|tomorrow)|my\s+events"
-        r"|what('s| is)\s+on\s+my|show\s+(my\s+)?calendar)",
-        text, re.I,
-    ))
-
-def _match_note(text: str) -> bool:
-    return bool(re.search(
-        r"(write\s+(a\s+)?note|create\s+(a\s+)?note|save\s+(a\s+)?note"
-        r"|take\s+(a\s+)?note|note\s+down|jot\s+down)",
-        text, re.I,
-    ))
-
-def _match_timer(text: str) -> bool:
-    return bool(re.search(
-        r"(set\s+(a\s+)?timer|start\s+(a\s+)?timer|countdown|timer\s+for)",
-        text, re.I,
-    ))
-
-def _match_stopwatch(text: str) -> bool:
-    return bool(re.search(r"(start\s+(a\s+)?stopwatch|stopwatch)", text, re.I))
-
-def _match_world_clock(text: str) -> bool:
-    return bool(re.search(
-        r"(what\s+time\s+(is\s+it\s+)?in\s+|time\s+in\s+|world\s+clock|current\s+time\s+in\s+)",
-        text, re.I,
-    ))
-
-
 def matches_any_task(text: str) -> bool:
-    """Return True if the text matches any known task intent.
+    """Return True if the text matches any known task intent."""
+    from src.router import route
 
-    Used by the coordinator to detect action queries.
-    """
-    low = text.lower()
-    return (
-        _match_alarm(low) or _match_create_event(low) or _match_calendar(low)
-        or _match_note(low) or _match_timer(low) or _match_stopwatch(low)
-        or _match_world_clock(low)
-    )
+    return route(text, with_params=False).is_task
 
 
 # ═══════════════════════════════════════════════════════════════════
-#  Parameter extraction helpers
+#  Parameter extraction helpers  (called by src.router.route)
 # ═══════════════════════════════════════════════════════════════════
 
 def _extract_alarm_params(query: str) -> tuple[str, str]:
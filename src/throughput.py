@@ -0,0 +1,131 @@
+"""Throughput benchmarks.
+
+:func:`run_sync` answers questions one after another with the sync graph;
+:func:`run_async` answers them concurrently on one event loop with the
+async graph (``create_graph(use_async=True)``), at most ``concurrency`` in
+flight.  Both return the same report so ``ai rag bench-async`` can put them
+side by side.
+
+:func:`startup_cost` times how long each query waits for a ready graph —
+rebuilt per query vs. the process-wide compiled one (``ai bench-startup``).
+:func:`call_throughput` times a cheap per-query function such as the
+intent router (``ai bench-router``); :func:`call_latency` reports latency
+percentiles of an expensive one, e.g. a coordinator LLM call
+(``ai bench-coordinator``).
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+
+from src.config import ASYNC_CONCURRENCY
+
+
+def _report(latencies: list[float], seconds: float, errors: int) -> dict:
+    ordered = sorted(latencies)
+
+    def percentile(p: float) -> float:
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    return {
+        "questions": len(latencies) + errors,
+        "errors": errors,
+        "seconds": seconds,
+        "qps": len(latencies) / seconds if seconds else 0.0,
+        "p50": percentile(0.5),
+        "p95": percentile(0.95),
+    }
+
+
+def run_sync(app, questions: list[str]) -> dict:
+    """Answer ``questions`` sequentially with a compiled sync graph."""
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for question in questions:
+        t0 = time.perf_counter()
+        try:
+            app.invoke({"question": question})
+        except Exception:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - t0)
+    return _report(latencies, time.perf_counter() - started, errors)
+
+
+async def arun(app, questions: list[str], concurrency: int = ASYNC_CONCURRENCY) -> dict:
+    """Answer ``questions`` concurrently with a compiled async graph."""
+    gate = asyncio.Semaphore(max(1, concurrency))
+    latencies, errors = [], 0
+
+    async def one(question: str) -> None:
+        nonlocal errors
+        async with gate:
+            t0 = time.perf_counter()
+            try:
+                async for _ in app.astream({"question": question}, stream_mode="updates"):
+                    pass
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - t0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(q) for q in questions))
+    return _report(latencies, time.perf_counter() - started, errors)
+
+
+def run_async(app, questions: list[str], concurrency: int = ASYNC_CONCURRENCY) -> dict:
+    """Synchronous entry point for :func:`arun` (one event loop for the whole run)."""
+    return asyncio.run(arun(app, questions, concurrency))
+
+
+def startup_cost(build, queries: int) -> dict:
+    """Time ``build()`` (obtain a ready graph) once per query.
+
+    Returns ``first`` (seconds for the first query), ``per_query`` (mean over
+    the rest) and ``total``.
+    """
+    timings = []
+    for _ in range(max(1, queries)):
+        t0 = time.perf_counter()
+        build()
+        timings.append(time.perf_counter() - t0)
+    rest = timings[1:] or timings
+    return {
+        "first": timings[0],
+        "per_query": sum(rest) / len(rest),
+        "total": sum(timings),
+    }
+
+
+def call_throughput(fn, items: list) -> dict:
+    """Time ``fn`` over every item: ``seconds``, ``per_second``, ``us_per_call``."""
+    started = time.perf_counter()
+    for item in items:
+        fn(item)
+    seconds = time.perf_counter() - started
+    return {
+        "calls": len(items),
+        "seconds": seconds,
+        "per_second": len(items) / seconds if seconds else 0.0,
+        "us_per_call": seconds / len(items) * 1e6 if items else 0.0,
+    }
+
+
+def call_latency(fn, items: list) -> dict:
+    """Call ``fn`` once per item; the :func:`run_sync` report plus ``mean``."""
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for item in items:
+        t0 = time.perf_counter()
+        try:
+            fn(item)
+        except Exception:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - t0)
+    report = _report(latencies, time.perf_counter() - started, errors)
+    report["mean"] = sum(latencies) / len(latencies) if latencies else 0.0
+    return report
@@ -0,0 +1,65 @@
+"""Tests for src/cache.py"""
+from __future__ import annotations
+
+import time
+
+from src.cache import DiskCache
+
+
+def test_roundtrip_and_persistence(tmp_path):
+    path = tmp_path / "c.sqlite3"
+    cache = DiskCache("c", max_entries=10, path=path)
+    cache.set_many({"a": True, "b": {"x": [1, 2]}})
+    cache.close()
+
+    reopened = DiskCache("c", max_entries=10, path=path)
+    assert reopened.get_many(["a", "b", "missing"]) == {"a": True, "b": {"x": [1, 2]}}
+    assert reopened.get("missing", "default") == "default"
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    cache = DiskCache("c", max_entries=2, path=tmp_path / "c.sqlite3")
+    cache.set("a", 1)
+    time.sleep(0.01)
+    cache.set("b", 2)
+    time.sleep(0.01)
+    cache.get("a")          # a is now more recent than b
+    time.sleep(0.01)
+    cache.set("c", 3)
+    assert cache.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
+    assert len(cache) == 2
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = DiskCache("c", max_entries=10, ttl=60, path=tmp_path / "c.sqlite3")
+    cache.set("stale", 1, ttl=-1)
+    cache.set("fresh", 2)
+    assert cache.get_many(["stale", "fresh"]) == {"fresh": 2}
+
+
+def test_clear(tmp_path):
+    cache = DiskCache("c", max_entries=10, path=tmp_path / "c.sqlite3")
+    cache.set_many({"a": 1, "b": 2})
+    assert cache.clear() == 2
+    assert len(cache) == 0
+
+
+def test_meta_is_kept_out_of_the_entries(tmp_path):
+    cache = DiskCache("c", max_entries=1, path=tmp_path / "c.sqlite3")
+    cache.set_meta("version", "v1")
+    cache.set_many({"a": 1, "b": 2})
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.get_meta("version") == "v1"
+    assert cache.get_meta("missing", "default") == "default"
+
+
+def test_counters_survive_clear_and_eviction(tmp_path):
+    cache = DiskCache("c", max_entries=1, path=tmp_path / "c.sqlite3")
+    cache.increment("hits")
+    cache.increment("hits", by=2)
+    cache.set_many({"a": 1, "b": 2})
+    cache.clear()
+    assert cache.counters() == {"hits": 3}
+    cache.reset_counters()
+    assert cache.counters() == {}
@@ -0,0 +1,94 @@
+"""Tests for src/agents/checkpoint.py"""
+from __future__ import annotations
+
+import pytest
+
+import src.agents.graph as agents_graph
+from src.agents.checkpoint import SQLiteCheckpointer
+from src.events import ask_events
+
+
+def _agent(name: str, confirm: bool = False):
+    def node(state):
+        update = {
+            "agent_results": [{"agent": name, "content": name, "sources": [], "confidence": "high"}],
+            "agents_used": [name],
+        }
+        if confirm:
+            update["needs_human_confirm"] = True
+            update["human_confirm_message"] = f"{name} wants confirmation"
+        return update
+
+    return node
+
+
+@pytest.fixture(autouse=True)
+def fake_agents(monkeypatch):
+    monkeypatch.setattr(agents_graph, "AGENT_NODES", {
+        "librarian": _agent("librarian"),
+        "researcher": _agent("researcher"),
+        "critic": _agent("critic", confirm=True),
+        "summarizer": _agent("summarizer"),
+    })
+
+
+def _run(app, thread_id: str, query: str = "verify this claim from my notes"):
+    config = {"configurable": {"thread_id": thread_id}}
+    return app.invoke({"query": query}, config=config)
+
+
+def test_paused_run_resumes_after_restart(tmp_path):
+    path = tmp_path / "checkpoints.sqlite3"
+    app = agents_graph.create_multi_agent_graph(SQLiteCheckpointer(path, batch_size=1000))
+    events = ask_events(app, "verify this claim from my notes")
+    confirm = next(e for e in events if e["type"] == "confirm")
+    events.close()  # user walked away at the prompt
+
+    # A new process: fresh checkpointer on the same file
+    saver = SQLiteCheckpointer(path)
+    assert [run for run, _ in saver.paused_threads()] == [confirm["thread_id"]]
+    app = agents_graph.create_multi_agent_graph(saver)
+    resumed = ask_events(app, "", thread_id=confirm["thread_id"])
+    assert next(resumed)["notice"] == "critic wants confirmation"
+    answer = resumed.send(True)
+    while answer["type"] != "answer":
+        answer = next(resumed)
+    assert answer["agents_used"] == ["librarian", "researcher", "critic", "summarizer"]
+    resumed.close()
+    assert saver.paused_threads() == []
+    assert saver.stats()["threads"] == 0
+
+
+def test_finished_runs_never_reach_disk_between_batches(tmp_path):
+    saver = SQLiteCheckpointer(tmp_path / "c.sqlite3", batch_size=1000)
+    app = agents_graph.create_multi_agent_graph(saver)
+    _run(app, "t1", "summarize this article")
+    assert saver.stats()["checkpoints"] == 0 and saver.stats()["buffered"] > 0
+    saver.delete_thread("t1")
+    saver.flush()
+    assert saver.stats() == {"threads": 0, "checkpoints": 0, "writes": 0, "buffered": 0}
+
+
+def test_compaction_keeps_newest_checkpoints(tmp_path):
+    saver = SQLiteCheckpointer(tmp_path / "c.sqlite3", batch_size=2, keep=1)
+    app = agents_graph.create_multi_agent_graph(saver)
+    state = _run(app, "t1", "summarize this article")
+    assert saver.stats()["checkpoints"] == 1
+    # The compacted thread still has its latest state
+    latest = app.get_state({"configurable": {"thread_id": "t1"}})
+    assert latest.values["agents_used"] == state["agents_used"] == ["summarizer"]
+
+
+def test_threads_evicted_by_count_and_age(tmp_path):
+    saver = SQLiteCheckpointer(tmp_path / "c.sqlite3", batch_size=4, max_threads=5, max_age=3600)
+    app = agents_graph.create_multi_agent_graph(saver)
+    for i in range(20):
+        _run(app, f"t{i}", "summarize this article")
+    saver.flush()
+    assert saver.stats()["threads"] == 5
+    assert saver.stats()["checkpoints"] == 5
+
+    saver._conn.execute("UPDATE threads SET updated_at = updated_at - 7200")
+    _run(app, "fresh", "summarize this article")
+    saver.flush()
+    assert [t for t, in saver._conn.execute("SELECT thread_id FROM threads")] == ["fresh"]
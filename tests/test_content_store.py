@@ -0,0 +1,81 @@
+"""Tests for src/agents/content_store.py and the append-only agent channels"""
+from __future__ import annotations
+
+import pytest
+
+import src.agents.content_store as content_store
+import src.agents.checkpoint as checkpoint
+import src.agents.graph as agents_graph
+from src.agents.content_store import ContentStore, content_ref, offload, resolve
+from src.cache import DiskCache
+
+_BIG = "web page text " * 500
+
+
+def _result(agent, content):
+    return {"agent": agent, "content": content, "sources": [], "confidence": "high"}
+
+
+@pytest.fixture(autouse=True)
+def checkpointer(tmp_path, monkeypatch):
+    saver = checkpoint.SQLiteCheckpointer(tmp_path / "checkpoints.sqlite3")
+    monkeypatch.setattr(checkpoint, "_checkpointer", saver)
+    return saver
+
+
+@pytest.fixture()
+def store(tmp_path, monkeypatch):
+    store = ContentStore(DiskCache("content", 100, path=tmp_path / "content.sqlite3"))
+    monkeypatch.setattr(content_store, "_content_store", store)
+    return store
+
+
+def test_large_content_offloaded_and_resolved(store):
+    results = [_result("librarian", "short"), _result("researcher", _BIG)]
+    stored = offload(results, store, limit=100)
+
+    assert stored[0] == results[0]
+    assert stored[1]["content"] == ""
+    assert stored[1]["content_ref"] == content_ref(_BIG)
+    assert resolve(stored, store)[1]["content"] == _BIG
+
+
+def test_identical_content_stored_once(store):
+    offload([_result("a", _BIG), _result("b", _BIG)], store, limit=100)
+    assert len(store.store) == 1
+
+
+def test_missing_content_resolves_empty(store):
+    stored = offload([_result("researcher", _BIG)], store, limit=100)
+    store.store.clear()
+    assert resolve(stored, store)[0]["content"] == ""
+
+
+def _agent(name, seen):
+    def node(state):
+        prior = resolve(state.get("agent_results", []))
+        seen[name] = [len(r["content"]) for r in prior]
+        return {"agent_results": [_result(name, f"{name}: {_BIG}")], "agents_used": [name]}
+
+    return node
+
+
+def test_graph_state_and_checkpoints_hold_references(store, monkeypatch):
+    seen: dict = {}
+    monkeypatch.setattr(agents_graph, "AGENT_NODES", {
+        name: _agent(name, seen) for name in ("librarian", "researcher", "critic", "summarizer")
+    })
+    app = agents_graph.create_multi_agent_graph()
+    config = {"configurable": {"thread_id": "t1"}}
+    state = app.invoke({"query": "verify this claim from my notes"}, config=config)
+
+    # Agents returned only their own entries; the reducers appended them
+    assert state["agents_used"] == ["librarian", "researcher", "critic", "summarizer"]
+    assert all(r["content"] == "" and r["content_ref"] for r in state["agent_results"])
+    # ... and still saw every earlier result in full
+    assert seen["critic"] == [len(f"librarian: {_BIG}"), len(f"researcher: {_BIG}")]
+    assert state["response"] == f"summarizer: {_BIG}"
+
+    for checkpoint in app.checkpointer.list(config):
+        for r in checkpoint.checkpoint["channel_values"].get("agent_results", []):
+            assert r["content"] == ""
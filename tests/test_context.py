@@ -0,0 +1,90 @@
+"""Tests for src/context.py"""
+from __future__ import annotations
+
+from langchain_core.documents import Document
+
+from src.context import pack_context
+
+PASSAGE = "Anger is a brief madness that seizes the mind and will not listen to reason"
+
+
+def chunk(text: str, source: str, page=None, score=None, tokens=None) -> Document:
+    metadata = {"source": source, "page": page, "content_type": "text"}
+    if score is not None:
+        metadata["relevance_score"] = score
+    if tokens is not None:
+        metadata["tokens"] = tokens
+    return Document(page_content=text, metadata=metadata)
+
+
+def test_renders_compact_tagged_blocks_by_relevance():
+    docs = [
+        chunk("Second most relevant passage about virtue.", "ethics.pdf", page=4, score=0.6),
+        chunk(PASSAGE, "seneca.epub", page=12, score=0.9),
+        chunk("Web result text.", None),
+    ]
+    context, report = pack_context(docs, budget=1000)
+
+    assert context.startswith("[1] web\nWeb result text.")
+    assert f"[2] seneca.epub p.12\n{PASSAGE}" in context
+    assert "[3] ethics.pdf p.4\nSecond most relevant" in context
+    assert "metadata" not in context
+    assert report["kept"] == 3
+    assert len(context) < len(str(docs))
+
+
+def test_drops_overlapping_chunks():
+    docs = [
+        chunk(PASSAGE, "seneca.epub", score=0.9),
+        chunk(PASSAGE.upper() + ".", "seneca-2nd-edition.epub", score=0.8),
+        chunk("A different passage entirely, on patience and time.", "other.pdf", score=0.7),
+    ]
+    context, report = pack_context(docs, budget=1000)
+    assert report["duplicates"] == ["seneca-2nd-edition.epub"]
+    assert report["kept"] == 2
+
+
+def test_fills_budget_using_stored_token_counts():
+    docs = [
+        chunk("alpha " * 5, "a.pdf", score=0.9, tokens=50),
+        chunk("beta " * 5, "b.pdf", score=0.8, tokens=500),   # doesn't fit: cut down
+        chunk("gamma " * 5, "c.pdf", score=0.7, tokens=20),   # still fits after the cut
+        chunk("delta " * 5, "d.pdf", score=0.6, tokens=90),   # no room left
+    ]
+    context, report = pack_context(docs, budget=100)
+    assert report["truncated"] == ["b.pdf"]
+    assert report["over_budget"] == ["d.pdf"]
+    assert "a.pdf" in context and "b.pdf" in context and "c.pdf" in context
+    assert report["tokens"] <= 100
+
+
+def test_web_results_survive_a_tight_budget():
+    docs = [
+        chunk("alpha " * 5, "a.pdf", score=0.9, tokens=60),
+        chunk("beta " * 5, "b.pdf", score=0.8, tokens=60),
+        Document(page_content="Fresh web search result about the question."),
+    ]
+    context, report = pack_context(docs, budget=100)
+    assert context.startswith("[1] web\nFresh web search result")
+    assert report["over_budget"] == ["b.pdf"]
+
+
+def test_chunk_bigger_than_the_budget_is_cut_not_dropped():
+    long_text = " ".join(f"word{i}" for i in range(2000))
+    docs = [
+        Document(page_content=long_text),                       # merged web results
+        chunk("A smaller book passage.", "book.pdf", score=0.9),
+    ]
+    context, report = pack_context(docs, budget=200)
+    assert context.startswith("[1] web\nword0 word1")
+    assert report["kept"] >= 1
+    assert report["truncated"] == ["web"]
+    assert report["tokens"] <= 200
+
+
+def test_top_chunk_is_kept_even_when_the_budget_is_tiny():
+    docs = [chunk("alpha " * 400, "a.pdf", score=0.9)]
+    context, report = pack_context(docs, budget=10)
+    assert context.startswith("[1] a.pdf\nalpha")
+    assert report["kept"] == 1
+    assert report["over_budget"] == []
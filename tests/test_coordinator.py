@@ -0,0 +1,94 @@
+"""Tests for the fused translate-and-plan mode of src/agents/coordinator.py"""
+from __future__ import annotations
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import src.agents.coordinator as coordinator
+import src.agents.plan_cache as plan_cache
+import src.agents.translator as translator
+
+_QUERY = "Яагаад тэнгэр цэнхэр байдаг вэ, өнөөдөр?"
+
+
+class FakeClient:
+    """Chat-completions stand-in: answers every request as a fused or plain plan."""
+
+    def __init__(self):
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **request):
+        self.requests.append(request)
+        reply = {"plan": ["researcher"], "reasoning": "needs the web"}
+        if "translation" in request["messages"][0]["content"]:
+            reply.update(language="Mongolian", translation="Why is the sky blue, today?")
+        message = SimpleNamespace(content=json.dumps(reply))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeClient()
+    monkeypatch.setattr(coordinator, "get_openai_client", lambda: fake)
+    monkeypatch.setattr(coordinator, "_rule_based_plan", lambda query: None)
+    monkeypatch.setattr(plan_cache, "PLAN_CACHE_ENABLED", False)
+    return fake
+
+
+def _translations(monkeypatch):
+    batches = []
+
+    def fake_batch(segments, source, target):
+        batches.append((source, target))
+        return [f"[{target}] {s}" for s in segments], "Mongolian"
+
+    monkeypatch.setattr(translator, "_translate_batch", fake_batch)
+    monkeypatch.setattr(translator, "get_translation_memory", lambda: None)
+    return batches
+
+
+def _run_translators(state):
+    for step, agent in enumerate(state["plan"]):
+        if agent == "translator":
+            update = translator.translator_node({
+                **state, "current_step": step, "response": "" if step == 0 else "Rayleigh.",
+            })
+            state = {**state, **update}
+    return state
+
+
+def test_fused_plan_skips_input_translator(client, monkeypatch):
+    batches = _translations(monkeypatch)
+    state = {"query": _QUERY, **coordinator.coordinator_node({"query": _QUERY})}
+
+    assert len(client.requests) == 1
+    assert state["plan"] == ["researcher", "translator"]
+    assert state["translated_query"] == "Why is the sky blue, today?"
+    assert state["query_language"] == "Mongolian"
+    assert state["plan_deps"] == [[], [0]]
+
+    final = _run_translators(state)
+    assert batches == [("English", "Mongolian")]
+    assert final["response"] == "[Mongolian] Rayleigh."
+
+
+def test_unfused_plan_translates_in_a_separate_step(client, monkeypatch):
+    batches = _translations(monkeypatch)
+    monkeypatch.setattr(coordinator, "COORDINATOR_FUSED_TRANSLATION", False)
+    state = {"query": _QUERY, **coordinator.coordinator_node({"query": _QUERY})}
+
+    assert state["plan"] == ["translator", "researcher", "translator"]
+    assert state["translated_query"] == ""
+    _run_translators(state)
+    # planner call here, plus the input translation: one LLM call more
+    assert len(client.requests) == 1
+    assert batches == [("auto", "English"), ("English", "Mongolian")]
+
+
+def test_english_queries_use_plain_planner(client):
+    state = coordinator.coordinator_node({"query": "why is the sky blue today"})
+    assert state["plan"] == ["researcher"]
+    assert "translation" not in client.requests[0]["messages"][0]["content"]
@@ -0,0 +1,78 @@
+"""Tests for src/daemon.py — socket protocol between `ai serve` and the CLI."""
+from __future__ import annotations
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from src import daemon
+
+
+class _FakeAgentGraph:
+    """Plans librarian, pauses for confirmation, then finalizes."""
+
+    def stream(self, payload, config=None):
+        if isinstance(payload, dict):
+            yield {"coordinator": {"plan": ["librarian"], "plan_reasoning": "books"}}
+            yield {"dispatcher": {
+                "agents_used": ["📚 Librarian"],
+                "agent_results": [{"confidence": "none", "sources": []}],
+            }}
+            yield {"__interrupt__": [SimpleNamespace(value={"message": "Search the web?"})]}
+        else:
+            yield {"finalizer": {"response": f"resumed: {payload.resume}"}}
+
+
+class _FakeGraphs(daemon._WarmGraphs):
+    def agents(self):
+        return _FakeAgentGraph()
+
+
+@pytest.fixture()
+def server(tmp_path):
+    path = tmp_path / "ai.sock"
+    srv = daemon._DaemonServer(path, _FakeGraphs())
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield path
+    srv.shutdown()
+    srv.server_close()
+
+
+def _drain(events, reply):
+    seen, answer = [], None
+    while True:
+        try:
+            event = events.send(answer)
+        except StopIteration:
+            return seen
+        seen.append(event)
+        answer = reply if event["type"] == "confirm" else None
+
+
+def test_no_daemon_returns_none(tmp_path):
+    assert daemon.remote_events({"cmd": "ping"}, tmp_path / "missing.sock") is None
+
+
+def test_ping(server):
+    assert daemon.ping(server)
+
+
+def test_ask_streams_events_and_relays_confirm(server):
+    events = daemon.remote_events({"cmd": "ask", "query": "hi"}, server)
+    seen = _drain(events, reply=False)
+    assert [e["type"] for e in seen] == ["plan", "agent", "confirm", "answer"]
+    assert seen[-1]["text"] == "resumed: no"
+
+
+def test_unknown_command_reports_error(server):
+    seen = _drain(daemon.remote_events({"cmd": "bogus"}, server), reply=None)
+    assert seen[0]["type"] == "error"
+
+
+def test_interactive_queries_stay_local():
+    assert daemon.is_interactive_query("set a timer for 5 minutes")
+    assert not daemon.is_interactive_query("what time is it in Tokyo?")
+    assert daemon.is_interactive_query("Start a stopwatch please")
+    assert daemon.is_interactive_query("COUNTDOWN from ten")
@@ -0,0 +1,210 @@
+"""Tests for the multi-agent dispatcher's dependency-graph execution"""
+from __future__ import annotations
+
+import time
+
+import pytest
+
+import src.agents.checkpoint as checkpoint
+import src.agents.graph as agents_graph
+from src.agents.coordinator import plan_dependencies, plan_waves
+from src.events import ask_events
+
+
+def _agent(name: str, delay: float = 0.0, log: list | None = None, confirm: bool = False):
+    """Fake agent node that returns one result after ``delay`` seconds."""
+
+    def node(state):
+        if log is not None:
+            log.append(("start", name, time.perf_counter()))
+        time.sleep(delay)
+        seen = [r["agent"] for r in state.get("agent_results", [])]
+        result = {"agent": name, "content": f"{name} saw {seen}", "sources": [], "confidence": "high"}
+        if log is not None:
+            log.append(("end", name, time.perf_counter()))
+        update = {"agent_results": [result], "agents_used": [name]}
+        if confirm:
+            update["needs_human_confirm"] = True
+            update["human_confirm_message"] = f"{name} wants confirmation"
+        return update
+
+    return node
+
+
+@pytest.fixture(autouse=True)
+def checkpointer(tmp_path, monkeypatch):
+    saver = checkpoint.SQLiteCheckpointer(tmp_path / "checkpoints.sqlite3")
+    monkeypatch.setattr(checkpoint, "_checkpointer", saver)
+    return saver
+
+
+@pytest.fixture()
+def fake_agents(monkeypatch):
+    log: list = []
+    agents = {
+        "librarian": _agent("librarian", 0.2, log),
+        "researcher": _agent("researcher", 0.05, log),
+        "critic": _agent("critic", 0.0, log),
+        "summarizer": _agent("summarizer", 0.0, log),
+    }
+    monkeypatch.setattr(agents_graph, "AGENT_NODES", agents)
+    return log
+
+
+def test_default_verify_plan_runs_librarian_and_researcher_together():
+    plan = ["librarian", "researcher", "critic", "summarizer"]
+    deps = plan_dependencies(plan)
+    assert plan_waves(plan, deps) == [["librarian", "researcher"], ["critic"], ["summarizer"]]
+
+
+def test_input_translator_gates_everything_after_it():
+    plan = ["translator", "librarian", "researcher", "summarizer", "translator"]
+    assert plan_waves(plan, plan_dependencies(plan)) == [
+        ["translator"], ["librarian", "researcher"], ["summarizer"], ["translator"],
+    ]
+
+
+def test_explicit_researcher_dependency_is_serial():
+    plan = ["librarian", "researcher", "critic", "summarizer"]
+    deps = plan_dependencies(plan, {"researcher": ["librarian"]})
+    assert deps[1] == [0]
+    assert plan_waves(plan, deps)[:2] == [["librarian"], ["researcher"]]
+
+
+def test_sequential_mode():
+    plan = ["librarian", "researcher", "summarizer"]
+    assert plan_dependencies(plan, parallel=False) == [[], [0], [1]]
+
+
+def test_wave_runs_concurrently_and_merges_in_plan_order(fake_agents):
+    app = agents_graph.create_multi_agent_graph()
+    config = {"configurable": {"thread_id": "t1"}}
+    state = app.invoke({"query": "verify this claim from my notes"}, config=config)
+
+    # Researcher finished first, but results are merged in plan order
+    agents = [r["agent"] for r in state["agent_results"]]
+    assert agents == ["librarian", "researcher", "critic", "summarizer"]
+    assert state["agents_used"] == agents
+    assert state["done_steps"] == [0, 1, 2, 3]
+    ends = [name for kind, name, _ in fake_agents if kind == "end"]
+    assert ends.index("researcher") < ends.index("librarian")
+
+    # Independent agents didn't see each other; the critic saw both
+    contents = {r["agent"]: r["content"] for r in state["agent_results"]}
+    assert contents["researcher"] == "researcher saw []"
+    assert contents["critic"] == "critic saw ['librarian', 'researcher']"
+
+    # The two ran at the same time
+    times = {(kind, name): t for kind, name, t in fake_agents}
+    assert times[("start", "researcher")] < times[("end", "librarian")]
+    assert times[("start", "librarian")] < times[("end", "researcher")]
+
+
+def test_confirmation_requests_are_combined(monkeypatch):
+    monkeypatch.setattr(agents_graph, "AGENT_NODES", {
+        "critic": _agent("critic", confirm=True),
+        "researcher": _agent("researcher", confirm=True),
+    })
+    state = {
+        "query": "q", "plan": ["critic", "researcher"], "plan_deps": [[], []],
+        "done_steps": [], "agent_results": [], "agents_used": [],
+    }
+    update = agents_graph.dispatcher_node(state)
+    assert update["needs_human_confirm"] is True
+    assert update["human_confirm_message"].splitlines() == [
+        "critic wants confirmation", "researcher wants confirmation",
+    ]
+    assert update["done_steps"] == [0, 1]
+
+
+def _empty_librarian(state):
+    """The real librarian's reply when the books have nothing."""
+    result = {"agent": "librarian", "content": "", "sources": [], "confidence": "none"}
+    return {
+        "agent_results": [result],
+        "agents_used": ["librarian"],
+        "needs_human_confirm": True,
+        "human_confirm_message": (
+            "📚 Librarian found nothing in your books. Should I search the web instead?"
+        ),
+    }
+
+
+@pytest.fixture()
+def web_after_empty_books(monkeypatch):
+    monkeypatch.setattr(agents_graph, "AGENT_NODES", {
+        "librarian": _empty_librarian,
+        "researcher": _agent("researcher"),
+        "critic": _agent("critic"),
+        "summarizer": _agent("summarizer"),
+    })
+
+
+def test_declining_the_web_search_keeps_web_results_out(web_after_empty_books, monkeypatch):
+    from langgraph.types import Command
+
+    import src.agents.coordinator as coordinator
+
+    # Researcher waits for the librarian, so the question comes first
+    monkeypatch.setattr(coordinator, "RESEARCHER_USES_LIBRARIAN", True)
+    app = agents_graph.create_multi_agent_graph()
+    config = {"configurable": {"thread_id": "decline"}}
+    paused = app.invoke({"query": "verify this claim from my notes"}, config=config)
+    assert "search the web instead" in paused["__interrupt__"][0].value["message"]
+
+    state = app.invoke(Command(resume="no"), config=config)
+    assert state["agents_used"] == ["librarian"]
+    assert "researcher" not in state["response"]
+    assert state["response"].startswith("I wasn't able to find an answer")
+
+
+def test_web_question_is_not_asked_once_the_researcher_ran(web_after_empty_books):
+    app = agents_graph.create_multi_agent_graph()
+    config = {"configurable": {"thread_id": "same-wave"}}
+    state = app.invoke({"query": "verify this claim from my notes"}, config=config)
+
+    assert "__interrupt__" not in state
+    assert state["agents_used"] == ["librarian", "researcher", "critic", "summarizer"]
+    assert state["response"].startswith("summarizer saw")
+
+
+def test_finalizer_ignores_declined_agents():
+    state = {
+        "agent_results": [
+            {"agent": "librarian", "content": "", "sources": [], "confidence": "none"},
+            {"agent": "researcher", "content": "web answer", "sources": [], "confidence": "high"},
+        ],
+        "declined_agents": ["researcher"],
+    }
+    response = agents_graph.finalizer_node(state)["response"]
+    assert response != "web answer"
+
+
+def test_ask_events_reports_every_agent_in_a_wave(fake_agents):
+    app = agents_graph.create_multi_agent_graph()
+    events = list(ask_events(app, "verify this claim from my notes"))
+    plan = next(e for e in events if e["type"] == "plan")
+    assert plan["waves"] == [["librarian", "researcher"], ["critic"], ["summarizer"]]
+    assert [e["agent"] for e in events if e["type"] == "agent"] == [
+        "librarian", "researcher", "critic", "summarizer",
+    ]
+
+
+def test_shared_graph_isolates_concurrent_runs(fake_agents, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    monkeypatch.setattr(agents_graph, "_graph", None)
+    app = agents_graph.get_multi_agent_graph()
+    assert agents_graph.get_multi_agent_graph() is app
+
+    def answer(query):
+        events = list(ask_events(app, query))
+        return events[-1]
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        answers = list(pool.map(answer, ["verify claim one", "verify claim two"]))
+
+    for answer_event in answers:
+        assert answer_event["agents_used"] == ["librarian", "researcher", "critic", "summarizer"]
+    # Finished runs leave no checkpoints behind in the shared saver
+    assert not list(app.checkpointer.list(None))
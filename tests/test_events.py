@@ -0,0 +1,55 @@
+"""Tests for src/events.py"""
+from __future__ import annotations
+
+from typing import TypedDict
+
+from langchain_core.documents import Document
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langgraph.graph import END, START, StateGraph
+
+from src.events import rag_ask_events
+from src.graph import generate
+
+
+class _State(TypedDict, total=False):
+    question: str
+    documents: list
+    generation: str
+
+
+def _rag_app(answer: str):
+    """Minimal RAG graph: canned retrieval, real generate node on a fake LLM."""
+    rag_chain = (
+        ChatPromptTemplate.from_messages([("human", "{context}\n\n{question}")])
+        | FakeListChatModel(responses=[answer])
+        | StrOutputParser()
+    )
+    graph = StateGraph(_State)
+    book = Document(page_content="x", metadata={"source": "book.pdf"})
+    graph.add_node("retrieve", lambda s: {"documents": [book]})
+    graph.add_node("generate", lambda s: generate(s, rag_chain))
+    graph.add_edge(START, "retrieve")
+    graph.add_edge("retrieve", "generate")
+    graph.add_edge("generate", END)
+    return graph.compile()
+
+
+def test_rag_ask_streams_answer_tokens():
+    events = list(rag_ask_events(_rag_app("Seneca says anger is brief madness."), "q"))
+    kinds = [e["type"] for e in events]
+
+    tokens = [e["text"] for e in events if e["type"] == "token"]
+    assert "".join(tokens) == "Seneca says anger is brief madness."
+    # Tokens arrive before the generate node reports completion
+    generate_done = next(
+        i for i, e in enumerate(events) if e["type"] == "node" and e["name"] == "generate"
+    )
+    assert kinds.index("token") < generate_done
+
+    answer = events[-1]
+    assert answer["type"] == "answer"
+    assert answer["text"] == "Seneca says anger is brief madness."
+    assert answer["sources"] == ["book.pdf"]
+    assert answer["ttft"] is not None and answer["ttft"] >= 0
@@ -0,0 +1,331 @@
+"""Tests for src/grading.py"""
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage
+
+from src.cache import DiskCache
+from src.grading import (
+    BatchRetrievalGrader,
+    GradeCache,
+    LogprobRetrievalGrader,
+    SCORE_KEY,
+    adaptive_grade,
+    agrade_page,
+    grade_page,
+    new_grading_stats,
+    p_yes,
+    should_widen,
+)
+
+
+class FakeGrader:
+    """Says 'yes' for any document whose text is in ``relevant``."""
+
+    def __init__(self, relevant: set[str]):
+        self.relevant = relevant
+        self.calls: list[str] = []
+
+    def invoke(self, inputs: dict, config=None):
+        self.calls.append(inputs["document"])
+        verdict = "yes" if inputs["document"] in self.relevant else "no"
+        return SimpleNamespace(binary_score=verdict)
+
+    async def ainvoke(self, inputs: dict, config=None):
+        return self.invoke(inputs, config)
+
+
+@pytest.fixture()
+def pool() -> list[Document]:
+    return [Document(page_content=f"d{i}") for i in range(9)]
+
+
+def test_grade_page_keeps_order(pool):
+    grader = FakeGrader({"d1"})
+    assert grade_page(grader, "q", pool[:3]) == [False, True, False]
+
+
+def test_should_widen():
+    assert should_widen(relevant_count=1, graded_count=3, pool_size=9, min_relevant=2)
+    assert not should_widen(relevant_count=2, graded_count=3, pool_size=9, min_relevant=2)
+    assert not should_widen(relevant_count=0, graded_count=9, pool_size=9, min_relevant=2)
+
+
+class TestAdaptiveGrade:
+    def test_easy_question_stops_after_first_page(self, pool):
+        grader = FakeGrader({"d0", "d1"})
+        relevant, graded = adaptive_grade(grader, "q", pool, start=3, step=3, min_relevant=2)
+        assert [d.page_content for d in relevant] == ["d0", "d1"]
+        assert graded == 3
+        assert len(grader.calls) == 3
+
+    def test_widens_until_enough_relevant(self, pool):
+        grader = FakeGrader({"d4", "d5"})
+        relevant, graded = adaptive_grade(grader, "q", pool, start=3, step=3, min_relevant=2)
+        assert [d.page_content for d in relevant] == ["d4", "d5"]
+        assert graded == 6
+
+    def test_stops_at_budget(self, pool):
+        grader = FakeGrader(set())
+        relevant, graded = adaptive_grade(grader, "q", pool, start=3, step=3, min_relevant=2)
+        assert relevant == []
+        assert graded == 9
+        assert len(grader.calls) == 9
+
+    def test_empty_pool(self):
+        relevant, graded = adaptive_grade(FakeGrader(set()), "q", [], start=3)
+        assert (relevant, graded) == ([], 0)
+
+
+class TestConcurrentGrading:
+    def test_order_preserved_when_calls_finish_out_of_order(self, pool):
+        import time
+
+        class SlowFirstGrader(FakeGrader):
+            def invoke(self, inputs):
+                # Earlier documents take longer, so completion order is reversed
+                time.sleep(0.01 * (9 - int(inputs["document"][1:])))
+                return super().invoke(inputs)
+
+        grader = SlowFirstGrader({"d0", "d7"})
+        verdicts = grade_page(grader, "q", pool, max_concurrency=9)
+        assert verdicts == [True] + [False] * 6 + [True, False]
+
+    def test_failed_grade_retried_alone(self, pool):
+        class FlakyGrader(FakeGrader):
+            failed = False
+
+            def invoke(self, inputs):
+                if inputs["document"] == "d1" and not self.failed:
+                    self.failed = True
+                    raise TimeoutError("transient")
+                return super().invoke(inputs)
+
+        grader = FlakyGrader({"d1"})
+        verdicts = grade_page(grader, "q", pool[:3], max_concurrency=3, backoff=0)
+        assert verdicts == [False, True, False]
+        assert sorted(grader.calls) == ["d0", "d1", "d2"]
+
+    def test_persistent_failure_raises(self, pool):
+        class BrokenGrader(FakeGrader):
+            def invoke(self, inputs):
+                raise RuntimeError("down")
+
+        with pytest.raises(RuntimeError):
+            grade_page(BrokenGrader(set()), "q", pool[:2], retries=1, backoff=0)
+
+
+class FakeBatchChain:
+    """Returns canned ``grades`` (or raises) for a batch grading call."""
+
+    def __init__(self, grades=None, error: Exception | None = None):
+        self.grades = grades or []
+        self.error = error
+        self.calls: list[dict] = []
+
+    def invoke(self, inputs: dict):
+        self.calls.append(inputs)
+        if self.error:
+            raise self.error
+        return SimpleNamespace(grades=[
+            SimpleNamespace(index=i, binary_score=score) for i, score in self.grades
+        ])
+
+    async def ainvoke(self, inputs: dict, config=None):
+        return self.invoke(inputs)
+
+
+class TestBatchGrading:
+    def test_one_call_grades_the_page(self, pool):
+        chain = FakeBatchChain([(1, "no"), (2, "yes"), (3, "no")])
+        fallback = FakeGrader(set())
+        grader = BatchRetrievalGrader(chain, fallback)
+        stats = new_grading_stats()
+
+        assert grade_page(grader, "q", pool[:3], stats=stats) == [False, True, False]
+        assert len(chain.calls) == 1
+        assert chain.calls[0]["count"] == 3
+        assert "[2]\nd1" in chain.calls[0]["documents"]
+        assert fallback.calls == []
+        assert stats["mode"] == "batch"
+        assert stats["docs"] == 3
+        assert stats["fallbacks"] == 0
+
+    def test_missing_and_invalid_entries_fall_back_per_document(self, pool):
+        chain = FakeBatchChain([(1, "yes"), (3, "maybe"), (7, "yes")])
+        fallback = FakeGrader({"d2"})
+        grader = BatchRetrievalGrader(chain, fallback)
+        stats = new_grading_stats()
+
+        assert grade_page(grader, "q", pool[:3], stats=stats) == [True, False, True]
+        assert sorted(fallback.calls) == ["d1", "d2"]
+        assert stats["fallbacks"] == 2
+
+    def test_unparseable_reply_falls_back_for_every_document(self, pool):
+        chain = FakeBatchChain(error=ValueError("bad json"))
+        fallback = FakeGrader({"d0"})
+        grader = BatchRetrievalGrader(chain, fallback)
+
+        assert grade_page(grader, "q", pool[:3]) == [True, False, False]
+        assert len(fallback.calls) == 3
+
+
+class TestGradeCache:
+    def test_repeat_question_skips_grading(self, pool, tmp_path):
+        cache = GradeCache(DiskCache("grades", 100, path=tmp_path / "g.sqlite3"), "v1")
+        grader = FakeGrader({"d1"})
+        assert grade_page(grader, "What is X?", pool[:3], cache=cache) == [False, True, False]
+        assert len(grader.calls) == 3
+
+        stats = new_grading_stats()
+        again = grade_page(grader, "  what is x ", pool[:4], cache=cache, stats=stats)
+        assert again == [False, True, False, False]
+        assert grader.calls[3:] == ["d3"]
+        assert stats["cached"] == 3
+
+    def test_grader_version_is_part_of_the_key(self, pool, tmp_path):
+        store = DiskCache("grades", 100, path=tmp_path / "g.sqlite3")
+        grade_page(FakeGrader(set()), "q", pool[:2], cache=GradeCache(store, "v1"))
+        grader = FakeGrader({"d0"})
+        assert grade_page(grader, "q", pool[:2], cache=GradeCache(store, "v2")) == [True, False]
+        assert len(grader.calls) == 2
+
+
+    def test_logprob_score_is_restored_on_hit(self, tmp_path):
+        cache = GradeCache(DiskCache("grades", 100, path=tmp_path / "g.sqlite3"), "v1")
+        scored = Document(page_content="a", metadata={"source": "s", SCORE_KEY: 0.83})
+        plain = Document(page_content="b", metadata={"source": "s"})
+        cache.save("q", [scored, plain], [True, False])
+
+        fresh = [Document(page_content="a", metadata={"source": "s"}),
+                 Document(page_content="b", metadata={"source": "s"})]
+        assert cache.lookup("q", fresh) == [True, False]
+        assert fresh[0].metadata[SCORE_KEY] == 0.83
+        assert SCORE_KEY not in fresh[1].metadata
+
+
+def _two_relevant(verdicts) -> bool:
+    return sum(v is True for v in verdicts) >= 2
+
+
+class TestEarlyExit:
+    def test_serial_stops_once_settled(self, pool):
+        grader = FakeGrader({"d0", "d1"})
+        stats = new_grading_stats()
+        verdicts = grade_page(
+            grader, "q", pool[:5], max_concurrency=1, stats=stats, stop_when=_two_relevant
+        )
+        assert verdicts == [True, True, None, None, None]
+        assert grader.calls == ["d0", "d1"]
+        assert stats["early_exit_saved"] == 3
+
+    def test_concurrent_cancels_calls_not_yet_started(self, pool):
+        release = threading.Event()
+
+        class SlowTail(FakeGrader):
+            def invoke(self, inputs, config=None):
+                if inputs["document"] not in self.relevant:
+                    release.wait(5)
+                return super().invoke(inputs, config)
+
+        grader = SlowTail({"d0", "d1"})
+        stats = new_grading_stats()
+        try:
+            verdicts = grade_page(
+                grader, "q", pool[:6], max_concurrency=2, stats=stats, stop_when=_two_relevant
+            )
+        finally:
+            release.set()
+        assert verdicts[:2] == [True, True]
+        assert verdicts[2:] == [None] * 4
+        assert stats["early_exit_saved"] >= 2
+
+    def test_settled_up_front_makes_no_calls(self, pool, tmp_path):
+        cache = GradeCache(DiskCache("grades", 100, path=tmp_path / "g.sqlite3"), "v1")
+        grade_page(FakeGrader({"d0", "d1"}), "q", pool[:2], cache=cache)
+        grader = FakeGrader(set())
+        verdicts = grade_page(grader, "q", pool[:4], cache=cache, stop_when=_two_relevant)
+        assert verdicts == [True, True, None, None]
+        assert grader.calls == []
+
+
+class TestAsyncGrading:
+    def test_matches_sync_verdicts(self, pool):
+        grader = FakeGrader({"d1", "d4"})
+        assert asyncio.run(agrade_page(grader, "q", pool[:6])) == grade_page(grader, "q", pool[:6])
+
+    def test_calls_overlap(self, pool):
+        class SlowGrader(FakeGrader):
+            async def ainvoke(self, inputs, config=None):
+                await asyncio.sleep(0.05)
+                return self.invoke(inputs, config)
+
+        async def timed():
+            loop = asyncio.get_running_loop()
+            t0 = loop.time()
+            verdicts = await agrade_page(SlowGrader({"d0"}), "q", pool[:8], max_concurrency=8)
+            return verdicts, loop.time() - t0
+
+        verdicts, seconds = asyncio.run(timed())
+        assert verdicts == [True] + [False] * 7
+        assert seconds < 0.3
+
+    def test_batch_grader(self, pool):
+        chain = FakeBatchChain([(1, "no"), (2, "yes"), (3, "no")])
+        grader = BatchRetrievalGrader(chain, FakeGrader(set()))
+        assert asyncio.run(agrade_page(grader, "q", pool[:3])) == [False, True, False]
+        assert len(chain.calls) == 1
+
+    def test_early_exit(self, pool):
+        class SuspendingGrader(FakeGrader):
+            async def ainvoke(self, inputs, config=None):
+                await asyncio.sleep(0.01)
+                return self.invoke(inputs, config)
+
+        grader = SuspendingGrader({"d0", "d1"})
+        stats = new_grading_stats()
+        verdicts = asyncio.run(agrade_page(
+            grader, "q", pool[:5], max_concurrency=1, stats=stats, stop_when=_two_relevant
+        ))
+        assert verdicts == [True, True, None, None, None]
+        assert grader.calls == ["d0", "d1"]
+        # The call already in flight when the decision settled is cancelled
+        # but not counted as saved
+        assert stats["early_exit_saved"] >= 2
+
+
+def _one_token(text: str, top: dict[str, float]) -> AIMessage:
+    return AIMessage(content=text, response_metadata={"logprobs": {"content": [{
+        "token": text,
+        "logprob": top.get(text, 0.0),
+        "top_logprobs": [{"token": t, "logprob": lp} for t, lp in top.items()],
+    }]}})
+
+
+class TestLogprobGrader:
+    def test_p_yes_renormalises_over_yes_and_no(self):
+        message = _one_token("yes", {"yes": math.log(0.6), "Yes": math.log(0.1),
+                                     "no": math.log(0.1), "maybe": math.log(0.2)})
+        assert p_yes(message) == pytest.approx(0.875)
+
+    def test_p_yes_falls_back_to_text(self):
+        assert p_yes(AIMessage(content="Yes")) == 1.0
+        assert p_yes(AIMessage(content="no")) == 0.0
+
+    def test_threshold_and_score_metadata(self, pool):
+        class Chain:
+            def invoke(self, inputs, config=None):
+                p = 0.7 if inputs["document"] == "d0" else 0.3
+                return _one_token("yes", {"yes": math.log(p), "no": math.log(1 - p)})
+
+        grader = LogprobRetrievalGrader(Chain(), threshold=0.6)
+        docs = pool[:2]
+        assert grade_page(grader, "q", docs, max_concurrency=1) == [True, False]
+        assert docs[0].metadata["relevance_score"] == pytest.approx(0.7)
+        assert docs[1].metadata["relevance_score"] == pytest.approx(0.3)
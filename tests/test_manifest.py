@@ -0,0 +1,49 @@
+"""Tests for src/manifest.py"""
+from __future__ import annotations
+
+from langchain_core.documents import Document
+
+from src.manifest import build_manifest, read_manifest, write_manifest
+
+
+def _docs() -> list[Document]:
+    return [
+        Document(page_content="a", metadata={"source": "one.pdf", "content_type": "text"}),
+        Document(page_content="b", metadata={"source": "one.pdf", "content_type": "table"}),
+        Document(page_content="c", metadata={"source": "two.epub", "content_type": None}),
+    ]
+
+
+def test_build_manifest_counts(tmp_path):
+    (tmp_path / "chroma.sqlite3").write_bytes(b"x" * 10)
+    manifest = build_manifest(tmp_path, _docs(), "text-embedding-ada-002")
+
+    assert manifest["total_chunks"] == 3
+    assert manifest["chunks_by_source"] == {"one.pdf": 2, "two.epub": 1}
+    assert manifest["chunks_by_content_type"] == {"table": 1, "text": 2}
+    assert manifest["layout"] == "single"
+    assert manifest["bytes"] == 10
+    assert manifest["index_version"] == 1
+
+
+def test_index_version_increments(tmp_path):
+    manifest = build_manifest(tmp_path, _docs(), "m", previous={"index_version": 4})
+    assert manifest["index_version"] == 5
+
+
+def test_sharded_layout(tmp_path):
+    manifest = build_manifest(tmp_path, _docs(), "m", shards={"bucket-01": 3})
+    assert manifest["layout"] == "sharded"
+    assert manifest["shards"] == {"bucket-01": 3}
+
+
+def test_round_trip(tmp_path):
+    manifest = build_manifest(tmp_path, _docs(), "m")
+    write_manifest(tmp_path, manifest)
+    assert read_manifest(tmp_path) == manifest
+
+
+def test_missing_or_corrupt_manifest(tmp_path):
+    assert read_manifest(tmp_path) is None
+    (tmp_path / "manifest.json").write_text("{not json")
+    assert read_manifest(tmp_path) is None
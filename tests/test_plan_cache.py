@@ -0,0 +1,85 @@
+"""Tests for src/agents/plan_cache.py"""
+from __future__ import annotations
+
+import src.agents.coordinator as coordinator
+import src.agents.plan_cache as plan_cache
+from src.agents.graph import AGENT_NODES
+from src.agents.plan_cache import PlanCache, query_signature
+from src.cache import DiskCache
+
+
+def _store(tmp_path, ttl=None):
+    return DiskCache("plans", 100, ttl=ttl, path=tmp_path / "plans.sqlite3")
+
+
+class TestQuerySignature:
+    def test_entities_and_numbers_masked(self):
+        assert query_signature("What is the weather in Paris today?") == (
+            query_signature("what is the weather in New York City today")
+        )
+        assert query_signature("Remind me to call Bob at 7:30") == (
+            "remind me to call <ent> at <num>"
+        )
+
+    def test_quotes_and_urls_masked(self):
+        assert query_signature('Explain "Meditations" from https://a.b/c') == (
+            "explain <quote> from <url>"
+        )
+
+    def test_different_shapes_differ(self):
+        assert query_signature("compare two books") != query_signature("compare two films")
+
+
+class TestPlanCache:
+    def test_hit_for_same_shape_and_language(self, tmp_path):
+        cache = PlanCache(_store(tmp_path), "v1")
+        cache.save("Who wrote Dune?", "en", ["researcher"], "web lookup")
+        assert cache.lookup("who wrote Hamlet", "en") == (["researcher"], "web lookup")
+        assert cache.lookup("Who wrote Dune?", "other") is None
+
+    def test_version_change_drops_stale_plans(self, tmp_path):
+        store = _store(tmp_path)
+        PlanCache(store, "v1").save("Who wrote Dune?", "en", ["researcher"], "r")
+        assert PlanCache(store, "v1").lookup("Who wrote Dune?", "en") is not None
+        assert PlanCache(store, "v2").lookup("Who wrote Dune?", "en") is None
+        assert len(store) == 0
+
+    def test_version_survives_eviction(self, tmp_path):
+        store = DiskCache("plans", 2, path=tmp_path / "plans.sqlite3")
+        cache = PlanCache(store, "v1")
+        for city in ("one", "two", "three"):
+            cache.save(f"plan trip {city}", "en", ["researcher"], "r")
+        assert PlanCache(store, "v1").lookup("plan trip three", "en") is not None
+
+    def test_expired_plans_miss(self, tmp_path):
+        cache = PlanCache(_store(tmp_path, ttl=-1), "v1")
+        cache.save("Who wrote Dune?", "en", ["researcher"], "r")
+        assert cache.lookup("Who wrote Dune?", "en") is None
+
+
+def test_planner_version_tracks_agent_set(monkeypatch):
+    before = coordinator.planner_version()
+    monkeypatch.setattr(coordinator, "AVAILABLE_AGENTS", coordinator.AVAILABLE_AGENTS + ("poet",))
+    assert coordinator.planner_version() != before
+
+
+def test_registry_matches_planner_agents():
+    assert set(AGENT_NODES) == set(coordinator.AVAILABLE_AGENTS)
+
+
+def test_coordinator_skips_planner_on_hit(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_llm_plan(query, language):
+        calls.append(query)
+        return ["researcher"], "needs the web"
+
+    monkeypatch.setattr(coordinator, "_llm_plan", fake_llm_plan)
+    monkeypatch.setattr(plan_cache, "_plan_cache", PlanCache(_store(tmp_path), "v1"))
+    monkeypatch.setattr(plan_cache, "PLAN_CACHE_ENABLED", True)
+
+    first = coordinator.coordinator_node({"query": "Who painted Guernica?"})
+    second = coordinator.coordinator_node({"query": "Who painted Olympia?"})
+    assert calls == ["Who painted Guernica?"]
+    assert first["plan"] == second["plan"] == ["researcher"]
+    assert second["plan_reasoning"].endswith("(cached plan)")
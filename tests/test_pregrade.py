@@ -0,0 +1,80 @@
+"""Tests for src/pregrade.py"""
+from __future__ import annotations
+
+from langchain_core.documents import Document
+
+from src.grading import grade_page, new_grading_stats
+from src.pregrade import (
+    DISTANCE_KEY,
+    PregradeThresholds,
+    calibrate,
+    keywords,
+    load_labelled,
+    pregrade,
+    save_labelled,
+)
+
+THRESHOLDS = PregradeThresholds(
+    accept_similarity=0.85, accept_overlap=0.5, reject_similarity=0.7, reject_overlap=0.0
+)
+QUESTION = "What does Seneca say about anger?"
+
+
+def doc(text: str, similarity: float | None) -> Document:
+    metadata = {} if similarity is None else {DISTANCE_KEY: 2.0 - 2.0 * similarity}
+    return Document(page_content=text, metadata=metadata)
+
+
+def test_keywords_drop_stopwords_and_short_words():
+    assert keywords(QUESTION) == {"seneca", "say", "anger"}
+
+
+def test_bands():
+    docs = [
+        doc("Seneca wrote at length on anger.", 0.9),     # close + keywords → accept
+        doc("A recipe for sourdough bread.", 0.5),         # far + no keywords → reject
+        doc("Seneca wrote at length on anger.", 0.75),     # middle band → LLM
+        doc("Sourdough bread.", 0.95),                     # close but no keywords → LLM
+        doc("Seneca on anger.", None),                     # no score → LLM
+    ]
+    assert pregrade(QUESTION, docs, THRESHOLDS) == [True, False, None, None, None]
+
+
+def test_grade_page_only_sends_uncertain_docs_to_llm():
+    class Grader:
+        def __init__(self):
+            self.calls = []
+
+        def invoke(self, inputs, config=None):
+            self.calls.append(inputs["document"])
+            return type("Score", (), {"binary_score": "yes"})()
+
+    grader = Grader()
+    docs = [
+        doc("Seneca wrote at length on anger.", 0.95),
+        doc("A recipe for sourdough bread.", 0.3),
+        doc("Marcus Aurelius on patience.", 0.8),
+    ]
+    stats = new_grading_stats()
+    assert grade_page(grader, QUESTION, docs, stats=stats, pregrade=True) == [True, False, True]
+    assert grader.calls == ["Marcus Aurelius on patience."]
+    assert stats["pregraded"] == 2
+
+
+def test_calibration_report(tmp_path):
+    items = [
+        (QUESTION, doc("Seneca wrote at length on anger.", 0.9), True),
+        (QUESTION, doc("Seneca on anger, briefly.", 0.9), False),   # false accept
+        (QUESTION, doc("A recipe for sourdough bread.", 0.5), False),
+        (QUESTION, doc("Stoic views on anger.", 0.8), True),         # uncertain
+    ]
+    path = tmp_path / "set.jsonl"
+    save_labelled(path, items)
+    report = calibrate(load_labelled(path), THRESHOLDS)
+
+    assert report["accepted"] == 2
+    assert report["rejected"] == 1
+    assert report["uncertain"] == 1
+    assert report["false_accepts"] == 1
+    assert report["coverage"] == 0.75
+    assert report["agreement"] == 2 / 3
@@ -0,0 +1,110 @@
+"""Tests for the multi-query search in src/agents/researcher.py"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import src.agents.researcher as researcher
+from src.agents.researcher import canonical_url, merge_results
+
+_DELAY = 0.2
+
+
+def _hit(url, content=None):
+    return {"url": url, "content": content or f"page at {url}"}
+
+
+def test_canonical_url():
+    assert canonical_url("https://www.Example.com/a/?utm_source=x&b=2&a=1#top") == (
+        canonical_url("http://example.com/a?a=1&b=2")
+    )
+    assert canonical_url("https://example.com/a?id=1") != canonical_url("https://example.com/a?id=2")
+    # ``ref`` often selects content; only ``ref_src`` is tracking
+    assert canonical_url("https://gh.com/x?ref=main") != canonical_url("https://gh.com/x?ref=dev")
+    assert canonical_url("https://x.com/a?ref_src=twsrc") == canonical_url("https://x.com/a")
+
+
+def test_merge_dedups_by_url_and_content():
+    merged = merge_results([
+        [_hit("https://a.com/x"), _hit("https://b.com/y", "same text")],
+        [_hit("https://www.a.com/x/?utm_medium=rss"), _hit("https://mirror.org/y", "Same   TEXT")],
+    ])
+    assert [r["url"] for r in merged] == ["https://a.com/x", "https://b.com/y"]
+
+
+def test_merge_ranks_results_found_by_several_queries_first():
+    merged = merge_results([
+        [_hit("https://solo.com"), _hit("https://shared.com")],
+        [_hit("https://shared.com"), _hit("https://other.com")],
+    ], limit=2)
+    assert [r["url"] for r in merged] == ["https://shared.com", "https://solo.com"]
+
+
+class FakeTool:
+    """Each query returns its own page plus one common page, after ``_DELAY``."""
+
+    def __init__(self):
+        self.queries, self.lock = [], threading.Lock()
+
+    def invoke(self, inputs):
+        with self.lock:
+            self.queries.append(inputs["query"])
+        time.sleep(_DELAY)
+        slug = inputs["query"].replace(" ", "-")
+        return [_hit(f"https://site.com/{slug}"), _hit("https://common.com/")]
+
+
+class FakeClient:
+    def __init__(self):
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **request):
+        self.requests.append(request)
+        if request.get("response_format"):
+            content = json.dumps({"queries": ["sky colour physics", "rayleigh scattering", "Why is the sky blue"]})
+        else:
+            content = "Rayleigh scattering."
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def test_researcher_searches_variants_concurrently(monkeypatch):
+    tool, client = FakeTool(), FakeClient()
+    monkeypatch.setattr(researcher, "get_web_search_tool", lambda: tool)
+    monkeypatch.setattr(researcher, "get_openai_client", lambda: client)
+    monkeypatch.setattr(researcher, "RESEARCH_QUERY_VARIANTS", 3)
+
+    started = time.perf_counter()
+    update = researcher.researcher_node({"query": "Why is the sky blue", "agent_results": []})
+    elapsed = time.perf_counter() - started
+
+    # The duplicate of the user's query was dropped; every search ran once
+    assert sorted(tool.queries) == ["Why is the sky blue", "rayleigh scattering", "sky colour physics"]
+    assert elapsed < 2 * _DELAY
+    sources = update["agent_results"][0]["sources"]
+    assert sources[0] == "https://common.com/"
+    assert len(sources) == 4
+    # variants + synthesis
+    assert len(client.requests) == 2
+
+
+def _replying(content):
+    def create(**request):
+        if isinstance(content, Exception):
+            raise content
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+def test_variant_failures_fall_back_to_the_users_query(monkeypatch):
+    for reply in (RuntimeError("rate limited"), "not json", "[1, 2]", '{"queries": "one"}'):
+        monkeypatch.setattr(researcher, "get_openai_client", lambda reply=reply: _replying(reply))
+        assert researcher._search_queries("q", [], 3) == ["q"]
+
+    tool = FakeTool()
+    monkeypatch.setattr(researcher, "get_openai_client", lambda: _replying(RuntimeError("down")))
+    merged = researcher._multi_search("sky", [], tool)
+    assert tool.queries == ["sky"]
+    assert [r["url"] for r in merged] == ["https://site.com/sky", "https://common.com/"]
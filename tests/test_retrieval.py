@@ -0,0 +1,50 @@
+"""Tests for src/retrieval.py"""
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.retrieval import MMRRetriever, mmr_select
+
+
+class TestMMRSelect:
+    def test_skips_near_duplicates(self):
+        query = [1.0, 0.3]
+        candidates = [
+            [1.0, 0.12],  # best match
+            [1.0, 0.1],   # near copy of the best match
+            [0.8, 0.6],   # less relevant but different
+        ]
+        assert mmr_select(query, candidates, k=2, lambda_mult=0.5) == [0, 2]
+
+    def test_lambda_one_is_plain_similarity_ranking(self):
+        query = [1.0, 0.0]
+        candidates = [[0.5, 0.5], [1.0, 0.0], [0.99, 0.01]]
+        assert mmr_select(query, candidates, k=3, lambda_mult=1.0) == [1, 2, 0]
+
+    def test_k_larger_than_pool(self):
+        assert mmr_select([1.0, 0.0], [[1.0, 0.0]], k=5) == [0]
+
+    def test_empty_pool(self):
+        assert mmr_select([1.0, 0.0], [], k=3) == []
+
+    def test_inputs_not_mutated(self):
+        candidates = np.array([[3.0, 4.0], [1.0, 0.0]], dtype=np.float32)
+        mmr_select([1.0, 0.0], candidates, k=1)
+        assert candidates[0, 0] == 3.0
+
+
+def test_retriever_returns_k_diverse_docs():
+    store = MagicMock(spec=["embeddings", "candidates_by_vector"])
+    store.embeddings.embed_query.return_value = [1.0, 0.3]
+    store.candidates_by_vector.return_value = [
+        (Document(page_content="a"), 0.0, [1.0, 0.12]),
+        (Document(page_content="a-copy"), 0.01, [1.0, 0.1]),
+        (Document(page_content="b"), 0.3, [0.8, 0.6]),
+    ]
+    retriever = MMRRetriever(store=store, k=2, fetch_k=3)
+    docs = retriever.invoke("question")
+    assert [d.page_content for d in docs] == ["a", "b"]
+    store.candidates_by_vector.assert_called_once_with([1.0, 0.3], 3)
@@ -0,0 +1,68 @@
+"""Tests for src/router.py"""
+from __future__ import annotations
+
+import pytest
+
+from src.agents.coordinator import _rule_based_plan
+from src.router import find_intents, route, route_sequential, sample_queries
+from src.tasks.macos_agent import matches_any_task
+
+
+@pytest.mark.parametrize("query, task", [
+    ("Remind me to call mom at 7:30", "alarm"),
+    ("schedule a meeting called standup at 9:00", "create_event"),
+    ("what's on my calendar tomorrow", "calendar"),
+    ("jot down: buy milk", "note"),
+    ("set a timer for 5 minutes", "timer"),
+    ("start a stopwatch", "stopwatch"),
+    ("What time is it in Tokyo?", "world_clock"),
+    ("explain photosynthesis", None),
+])
+def test_task_intent(query, task):
+    assert route(query).task == task
+    assert matches_any_task(query) is (task is not None)
+
+
+def test_every_intent_found_in_one_scan():
+    assert find_intents("Summarize my calendar and search the latest news") == {
+        "summarize", "calendar", "web",
+    }
+    # "current time in" is both world_clock and web at the same position;
+    # the higher-priority task intent wins there, "today" is still found
+    assert find_intents("current time in Paris today") == {"world_clock", "web"}
+
+
+def test_params_extracted_with_intent():
+    routed = route("set a timer for 10 minutes")
+    assert routed.params == {"duration": "10 minutes"}
+    assert route("What time is it in Ulaanbaatar?").params == {"city": "Ulaanbaatar"}
+    assert route("start a stopwatch").params == {}
+    assert route("remind me at 7:30", with_params=False).params == {}
+
+
+@pytest.mark.parametrize("query, plan", [
+    ("Is it still true what my book says about sleep?", ["librarian", "researcher", "critic", "summarizer"]),
+    ("what does my book say about anger", ["librarian"]),
+    ("翻訳してください", ["translator"]),
+    ("summarize this article", ["summarizer"]),
+    ("latest news on AI", ["researcher"]),
+    ("summarize my calendar for today", ["task_agent", "summarizer"]),
+    ("remind me about chapter 3 from the book", ["librarian", "task_agent"]),
+    ("set an alarm for 6:00", ["task_agent"]),
+])
+def test_rule_based_plans(query, plan):
+    assert _rule_based_plan(query)[0] == plan
+
+
+def test_no_rule_for_plain_question():
+    assert _rule_based_plan("why is the sky blue") is None
+
+
+def test_matches_per_intent_scan_on_corpus():
+    for query in sample_queries(2_000, seed=1):
+        routed = route(query, with_params=False)
+        expected = routed.task or next(
+            (i for i in ("verify", "book", "translate", "summarize", "web") if i in routed.intents),
+            None,
+        )
+        assert expected == route_sequential(query), query
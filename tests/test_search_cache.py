@@ -0,0 +1,92 @@
+"""Tests for src/search_cache.py"""
+from __future__ import annotations
+
+import asyncio
+
+from src.cache import DiskCache
+from src.search_cache import CachedSearchTool, SearchCache, normalise_query, query_class
+
+_RESULTS = [{"url": "https://a.com", "content": "a"}]
+
+
+def _cache(tmp_path, ttl=None, size=100):
+    store = DiskCache("search", size, path=tmp_path / "search.sqlite3")
+    return SearchCache(store, ttl or {"fresh": 60, "evergreen": 3600})
+
+
+class FakeTool:
+    max_results = 3
+
+    def __init__(self, results=_RESULTS):
+        self.results = results
+        self.calls = 0
+
+    def invoke(self, tool_input, config=None):
+        self.calls += 1
+        return self.results
+
+    async def ainvoke(self, tool_input, config=None):
+        self.calls += 1
+        return self.results
+
+
+def test_query_normalisation_and_class():
+    assert normalise_query("  What is  Stoicism?? ") == "what is stoicism"
+    assert query_class("Latest news on AI") == "fresh"
+    assert query_class("election results 2024") == "fresh"
+    assert query_class("what is stoicism") == "evergreen"
+    assert query_class("knowledge of the ancients") == "evergreen"
+
+
+def test_repeated_queries_served_from_cache(tmp_path):
+    tool = FakeTool()
+    cached = CachedSearchTool(tool, _cache(tmp_path))
+    assert cached.invoke({"query": "What is Stoicism?"}) == _RESULTS
+    assert cached.invoke({"query": "what is  stoicism"}) == _RESULTS
+    assert asyncio.run(cached.ainvoke({"query": "WHAT IS STOICISM"})) == _RESULTS
+    assert tool.calls == 1
+    assert cached.cache.stats() == {"entries": 1, "hits": 2, "misses": 1}
+
+
+def test_keyed_by_result_count(tmp_path):
+    cache = _cache(tmp_path)
+    cache.save("stoicism", 3, _RESULTS)
+    assert cache.lookup("stoicism", 3) == _RESULTS
+    assert cache.lookup("stoicism", 5) is None
+
+
+def test_ttl_per_query_class(tmp_path):
+    cache = _cache(tmp_path, ttl={"fresh": -1, "evergreen": 3600})
+    cache.save("latest news on stoicism", 3, _RESULTS)
+    cache.save("what is stoicism", 3, _RESULTS)
+    assert cache.lookup("latest news on stoicism", 3) is None
+    assert cache.lookup("what is stoicism", 3) == _RESULTS
+
+
+def test_empty_results_not_cached(tmp_path):
+    tool = FakeTool(results=[])
+    cached = CachedSearchTool(tool, _cache(tmp_path))
+    cached.invoke({"query": "nothing here"})
+    cached.invoke({"query": "nothing here"})
+    assert tool.calls == 2
+
+
+def test_size_bound_and_clear(tmp_path):
+    cache = _cache(tmp_path, size=4)
+    for i in range(10):
+        cache.save(f"query {i}", 3, _RESULTS)
+        cache.lookup(f"query {i}", 3)
+    entries = cache.stats()["entries"]
+    assert entries == 4  # counters don't take a slot
+    assert cache.lookup("query 9", 3) == _RESULTS
+    assert cache.clear() == entries
+    assert cache.stats() == {"entries": 0, "hits": 0, "misses": 0}
+
+
+def test_counters_are_shared_by_every_handle(tmp_path):
+    first, second = _cache(tmp_path), _cache(tmp_path)
+    first.save("shared query", 3, _RESULTS)
+    first.lookup("shared query", 3)
+    second.lookup("shared query", 3)
+    second.lookup("unknown", 3)
+    assert first.stats() == second.stats() == {"entries": 1, "hits": 2, "misses": 1}
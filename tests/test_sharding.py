@@ -0,0 +1,91 @@
+"""Tests for src/sharding.py"""
+from __future__ import annotations
+
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from langchain_core.documents import Document
+
+from src.sharding import ShardPool, ShardedRetriever, group_into_shards, shard_key
+
+
+def _doc(source: str, text: str = "x") -> Document:
+    return Document(page_content=text, metadata={"source": source})
+
+
+class TestShardKey:
+    def test_large_book_gets_own_shard(self):
+        assert shard_key("Deep Work.epub", 500, small_threshold=50) == "book-deep-work-epub"
+
+    def test_small_book_goes_to_stable_bucket(self):
+        a = shard_key("tiny.pdf", 3, small_threshold=50, buckets=8)
+        b = shard_key("tiny.pdf", 3, small_threshold=50, buckets=8)
+        assert a == b
+        assert a.startswith("bucket-")
+
+    def test_group_into_shards_keeps_every_chunk(self):
+        docs = [_doc("big.pdf") for _ in range(60)] + [_doc("small.pdf") for _ in range(2)]
+        shards = group_into_shards(docs)
+        assert sum(len(v) for v in shards.values()) == 62
+        assert "book-big-pdf" in shards
+
+
+class _FakeStore:
+    def __init__(self, hits):
+        self.hits = hits
+        self.closed = False
+        self._client = MagicMock()
+        self._client.close.side_effect = lambda: setattr(self, "closed", True)
+
+    def similarity_search_by_vector_with_relevance_scores(self, vector, k):
+        return [(Document(page_content=t), d) for t, d in self.hits[:k]]
+
+
+class _FakePool(ShardPool):
+    def __init__(self, stores, max_open=64):
+        super().__init__(Path("/nonexistent"), MagicMock(), max_open=max_open)
+        self.embedding.embed_query.return_value = [0.0]
+        self.stores = stores
+        self.opened: list[str] = []
+
+    def _open_store(self, name):
+        self.opened.append(name)
+        return self.stores[name]
+
+
+class TestShardPool:
+    def test_lru_eviction_closes_least_recent(self):
+        stores = {n: _FakeStore([]) for n in ("a", "b", "c")}
+        pool = _FakePool(stores, max_open=2)
+        for name in ("a", "b", "c"):
+            with pool.acquire(name):
+                pass
+        assert pool.open_count() == 2
+        assert stores["a"].closed
+        assert not stores["c"].closed
+
+    def test_leased_store_not_closed_until_released(self):
+        stores = {n: _FakeStore([]) for n in ("a", "b")}
+        pool = _FakePool(stores, max_open=1)
+        with pool.acquire("a"):
+            with pool.acquire("b"):
+                pass
+            assert not stores["a"].closed
+        assert stores["a"].closed
+
+
+class TestShardedRetriever:
+    def test_heap_merge_returns_global_top_k(self):
+        stores = {
+            "a": _FakeStore([("a1", 0.1), ("a2", 0.5)]),
+            "b": _FakeStore([("b1", 0.2), ("b2", 0.3)]),
+        }
+        retriever = ShardedRetriever(pool=_FakePool(stores), shard_names=["a", "b"], k=3)
+        docs = retriever.invoke("question")
+        assert [d.page_content for d in docs] == ["a1", "b1", "b2"]
+
+    def test_failing_shard_is_skipped(self):
+        stores = {"a": _FakeStore([("a1", 0.1)])}
+        retriever = ShardedRetriever(pool=_FakePool(stores), shard_names=["a", "missing"], k=2)
+        docs = retriever.invoke("question")
+        assert [d.page_content for d in docs] == ["a1"]
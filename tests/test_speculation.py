@@ -0,0 +1,66 @@
+"""Tests for src/speculation.py"""
+from __future__ import annotations
+
+import time
+
+from src.cache import DiskCache
+from src.speculation import SpeculativeWebSearch
+
+
+class Rewriter:
+    def invoke(self, inputs):
+        return inputs["question"] + " (rewritten)"
+
+
+class SlowSearch:
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.queries: list[str] = []
+
+    def invoke(self, inputs):
+        self.queries.append(inputs["query"])
+        time.sleep(self.delay)
+        return [{"content": f"result for {inputs['query']}"}]
+
+
+def test_used_result_reports_overlap_saved():
+    speculator = SpeculativeWebSearch(Rewriter(), SlowSearch(0.05))
+    job = speculator.start("q")
+    time.sleep(0.08)  # grading runs meanwhile
+    result, saved = speculator.take(job)
+
+    assert result == ("q (rewritten)", [{"content": "result for q (rewritten)"}])
+    assert 0.04 <= saved <= 0.08
+    stats = speculator.stats()
+    assert stats["used"] == 1 and stats["discarded"] == 0
+
+
+def test_discard_when_local_docs_suffice():
+    speculator = SpeculativeWebSearch(Rewriter(), SlowSearch(0))
+    job = speculator.start("q")
+    assert speculator.discard(job)
+    assert not speculator.discard(job)  # already gone
+    assert speculator.take(job) == (None, 0.0)
+    assert speculator.stats()["discarded"] == 1
+
+
+def test_hourly_cap_persists_across_instances(tmp_path):
+    store = DiskCache("speculation", 16, path=tmp_path / "s.sqlite3")
+    first = SpeculativeWebSearch(Rewriter(), SlowSearch(0), max_per_hour=2, store=store)
+    assert first.start("a") and first.start("b")
+    assert first.start("c") is None
+
+    second = SpeculativeWebSearch(Rewriter(), SlowSearch(0), max_per_hour=2, store=store)
+    assert second.start("d") is None
+    assert second.stats()["started"] == 2
+    assert second.stats()["capped"] == 2
+
+
+def test_failed_search_falls_back():
+    class Broken:
+        def invoke(self, inputs):
+            raise RuntimeError("tavily down")
+
+    speculator = SpeculativeWebSearch(Rewriter(), Broken())
+    assert speculator.take(speculator.start("q")) == (None, 0.0)
+    assert speculator.stats()["failed"] == 1
@@ -0,0 +1,130 @@
+"""Tests for the async graph nodes (src/graph.py) and src/throughput.py"""
+from __future__ import annotations
+
+import asyncio
+import time
+from functools import partial
+from types import SimpleNamespace
+
+from langchain_core.documents import Document
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langgraph.graph import END, START, StateGraph
+
+from src.core import GraphState
+from src.graph import (
+    agenerate,
+    agrade_documents,
+    aretrieve,
+    generate,
+    grade_documents,
+    retrieve,
+)
+from src.throughput import run_async, run_sync, startup_cost
+
+_DELAY = 0.05
+
+
+class FakeRetriever:
+    def invoke(self, question: str):
+        return [Document(page_content=f"{question} {i}") for i in range(3)]
+
+
+class SlowGrader:
+    """Every chunk is relevant; each call takes ``_DELAY`` seconds."""
+
+    def invoke(self, inputs, config=None):
+        time.sleep(_DELAY)
+        return SimpleNamespace(binary_score="yes")
+
+    async def ainvoke(self, inputs, config=None):
+        await asyncio.sleep(_DELAY)
+        return SimpleNamespace(binary_score="yes")
+
+
+def _app(use_async: bool):
+    rag_chain = (
+        ChatPromptTemplate.from_messages([("human", "{context}\n\n{question}")])
+        | FakeListChatModel(responses=["an answer"])
+        | StrOutputParser()
+    )
+    nodes = (aretrieve, agrade_documents, agenerate) if use_async else (
+        retrieve, grade_documents, generate
+    )
+    graph = StateGraph(GraphState)
+    graph.add_node("retrieve", partial(nodes[0], retriever=FakeRetriever()))
+    graph.add_node("grade_documents", partial(nodes[1], retrieval_grader=SlowGrader()))
+    graph.add_node("generate", partial(nodes[2], rag_chain=rag_chain))
+    graph.add_edge(START, "retrieve")
+    graph.add_edge("retrieve", "grade_documents")
+    graph.add_edge("grade_documents", "generate")
+    graph.add_edge("generate", END)
+    return graph.compile()
+
+
+def test_async_nodes_match_sync_nodes():
+    sync_state = _app(False).invoke({"question": "q"})
+    async_state = asyncio.run(_app(True).ainvoke({"question": "q"}))
+    for key in ("generation", "web_search", "irrelevant_count", "total_retrieved"):
+        assert async_state[key] == sync_state[key]
+    assert [d.page_content for d in async_state["documents"]] == [
+        d.page_content for d in sync_state["documents"]
+    ]
+
+
+def test_concurrent_questions_beat_sequential():
+    questions = [f"q{i}" for i in range(8)]
+    sequential = run_sync(_app(False), questions)
+    concurrent = run_async(_app(True), questions, concurrency=8)
+
+    assert sequential["errors"] == concurrent["errors"] == 0
+    assert concurrent["questions"] == 8
+    assert concurrent["seconds"] < sequential["seconds"] / 2
+    assert concurrent["qps"] > sequential["qps"]
+
+
+def test_startup_cost_reports_first_and_steady_state():
+    built = []
+    report = startup_cost(lambda: built.append(1), 5)
+    assert len(built) == 5
+    assert report["first"] >= 0 and report["per_query"] >= 0
+    assert report["total"] >= report["first"]
+
+
+class FakePool:
+    """Stands in for a loop's pooled HTTP client; no real socket is opened."""
+
+    def __init__(self, tag: str):
+        self.tag, self.closed = tag, False
+
+    async def send(self, request, **kwargs):
+        return (self.tag, request)
+
+    async def aclose(self):
+        self.closed = True
+
+
+def test_async_http_client_pools_per_event_loop():
+    from src import config
+
+    async def one_request(tag: str):
+        pool = FakePool(tag)
+        config._loop_http_clients[asyncio.get_running_loop()] = pool
+        assert config.loop_http_client() is pool
+        shared = config.get_async_http_client()
+        response = await shared.send("request")
+        await shared.aclose()
+        assert pool.closed
+        return response
+
+    # Back-to-back asyncio.run calls each reach their own loop's pool
+    assert asyncio.run(one_request("first")) == ("first", "request")
+    assert asyncio.run(one_request("second")) == ("second", "request")
+
+    async def pools():
+        return config.loop_http_client(), config.loop_http_client()
+
+    first, again = asyncio.run(pools())
+    assert first is again
+    assert asyncio.run(pools())[0] is not first
@@ -0,0 +1,78 @@
+"""Tests for src/agents/translation_memory.py"""
+from __future__ import annotations
+
+from src.agents.translation_memory import (
+    TranslationMemory,
+    normalise_segment,
+    split_segments,
+    translate,
+)
+from src.cache import DiskCache
+
+
+class FakeBatch:
+    """Upper-cases segments; records every batch it is asked for."""
+
+    def __init__(self, language="Mongolian"):
+        self.language = language
+        self.batches = []
+
+    def __call__(self, segments, source, target):
+        self.batches.append(list(segments))
+        return [s.upper() for s in segments], self.language
+
+
+def _memory(tmp_path, version="v1"):
+    store = DiskCache("translations", 100, path=tmp_path / "translations.sqlite3")
+    return TranslationMemory(store, version)
+
+
+def test_segments_keep_layout():
+    text = "  # Title\n\n- first item  \n---\n"
+    assert "\n".join(a + b + c for a, b, c in split_segments(text)) == text
+    assert normalise_segment("Сайн  байна  уу ") == "Сайн байна уу"
+
+
+def test_layout_and_untranslatable_lines_preserved():
+    batch = FakeBatch()
+    out, _, stats = translate("  hello\n\n---\n42\nworld ", "English", batch)
+    assert out == "  HELLO\n\n---\n42\nWORLD "
+    assert batch.batches == [["hello", "world"]]
+    assert stats == {"segments": 2, "hits": 0, "translated": 2}
+
+
+def test_full_hit_skips_llm(tmp_path):
+    memory = _memory(tmp_path)
+    translate("сайн уу\nбаярлалаа", "English", FakeBatch(), memory=memory)
+
+    batch = FakeBatch()
+    out, language, stats = translate("сайн  уу\nбаярлалаа", "English", batch, memory=memory)
+    assert out == "САЙН УУ\nБАЯРЛАЛАА"
+    assert language == "Mongolian"
+    assert batch.batches == []
+    assert stats["hits"] == 2 and stats["translated"] == 0
+
+
+def test_partial_hit_translates_only_missing(tmp_path):
+    memory = _memory(tmp_path)
+    translate("one\ntwo", "French", FakeBatch(), source="English", memory=memory)
+
+    batch = FakeBatch()
+    out, _, stats = translate("one\nthree\ntwo", "French", batch, source="English", memory=memory)
+    assert out == "ONE\nTHREE\nTWO"
+    assert batch.batches == [["three"]]
+    assert stats == {"segments": 3, "hits": 2, "translated": 1}
+
+
+def test_keyed_by_language_pair_and_version(tmp_path):
+    memory = _memory(tmp_path)
+    translate("hello", "French", FakeBatch(), source="English", memory=memory)
+
+    for target, source, mem in (
+        ("German", "English", memory),
+        ("French", None, memory),
+        ("French", "English", _memory(tmp_path, version="v2")),
+    ):
+        batch = FakeBatch()
+        translate("hello", target, batch, source=source, memory=mem)
+        assert batch.batches == [["hello"]]